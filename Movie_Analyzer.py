@@ -1,16 +1,20 @@
 import streamlit as st
 import matplotlib.pyplot as plt
 
-from src.movie_analyzer import MovieAnalyzer
+from src.metrics import timed
+from src.shared import get_analyzer, reload_analyzer
 
 def main():
     st.title("Movie Analysis App")
 
+    # The analyzer is shared by every page and session; this forces a fresh load.
+    if st.sidebar.button("Reload data"):
+        with st.spinner("Reloading data..."):
+            reload_analyzer()
+
     try:
         with st.spinner("Downloading and processing data..."):
-            st.write("Initializing MovieAnalyzer...")
-            analyzer = MovieAnalyzer()
-            st.write("Data loaded successfully!")
+            analyzer = get_analyzer()
     except Exception as e:
         st.error(f"Error initializing MovieAnalyzer: {e}")
         st.stop()
@@ -20,12 +24,13 @@ def main():
     N = st.number_input("Select N:", min_value=1, max_value=100, value=10, step=1)
     try:
         movie_type_df = analyzer.movie_type(N=N)
-        fig_1, ax_1 = plt.subplots()
-        ax_1.bar(movie_type_df["Movie_Type"], movie_type_df["Count"])
-        ax_1.set_xlabel("Movie Type")
-        ax_1.set_ylabel("Count")
-        plt.setp(ax_1.get_xticklabels(), rotation=45, ha="right")
-        st.pyplot(fig_1)
+        with timed("page.figure.movie_type"):
+            fig_1, ax_1 = plt.subplots()
+            ax_1.bar(movie_type_df["Movie_Type"], movie_type_df["Count"])
+            ax_1.set_xlabel("Movie Type")
+            ax_1.set_ylabel("Count")
+            plt.setp(ax_1.get_xticklabels(), rotation=45, ha="right")
+            st.pyplot(fig_1)
     except Exception as e:
         st.error(f"Error in movie_type: {e}")
 
@@ -33,11 +38,12 @@ def main():
     st.header("Actor Count Distribution")
     try:
         actor_count_df = analyzer.actor_count()
-        fig_2, ax_2 = plt.subplots()
-        ax_2.bar(actor_count_df["Number_of_Actors"], actor_count_df["Movie_Count"])
-        ax_2.set_xlabel("Number of Actors")
-        ax_2.set_ylabel("Movie Count")
-        st.pyplot(fig_2)
+        with timed("page.figure.actor_count"):
+            fig_2, ax_2 = plt.subplots()
+            ax_2.bar(actor_count_df["Number_of_Actors"], actor_count_df["Movie_Count"])
+            ax_2.set_xlabel("Number of Actors")
+            ax_2.set_ylabel("Movie Count")
+            st.pyplot(fig_2)
     except Exception as e:
         st.error(f"Error in actor_count: {e}")
 
@@ -57,7 +63,8 @@ def main():
         )
         if do_plot:
             df, fig = result
-            st.pyplot(fig)
+            with timed("page.figure.actor_distributions"):
+                st.pyplot(fig)
             if df.empty:
                 st.info("No actor data matches the given criteria.")
             else:
@@ -0,0 +1,196 @@
+"""
+bench_queries.py
+
+Benchmarks loading and every MovieAnalyzer query on corpora scaled to a
+multiple of the CMU corpus size (1x is ~81.7k movies), generated with
+src/synthetic.py, and compares the results with a saved baseline.
+
+For each scale and query it records the first call (which builds any lazy
+index), the best of `repeat` warm calls, the peak traced memory of one call
+and the input rows processed per second. A query regresses when its warm
+time or peak memory exceeds the baseline by more than the threshold factor,
+and a query or scale the baseline does not cover fails the comparison too.
+
+    python -m benchmarks.bench_queries --scales 1 10            # compare with baseline
+    python -m benchmarks.bench_queries --scales 1 10 --save-baseline
+    python -m benchmarks.bench_queries --scales 100 --root /big/disk --save-baseline
+
+The committed baseline covers the default scales, 1x and 10x; record
+another scale with --save-baseline before comparing at it.
+
+Timings are machine-dependent: save the baseline on the machine (or CI
+runner) that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import matplotlib.pyplot as plt
+
+from src.movie_analyzer import MovieAnalyzer
+from src.synthetic import CMU_MOVIES, generate_corpus
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 1.5
+
+# name -> (call, frame whose rows the call scans, or None for a single draw)
+QUERIES: Dict[str, tuple] = {
+    "movie_type": (lambda a: a.movie_type(N=10), "movies"),
+    "actor_count": (lambda a: a.actor_count(), "actors"),
+    "actor_distributions": (lambda a: a.actor_distributions("All", 1.9, 1.6), "actors"),
+    "actor_distributions_plot": (
+        lambda a: plt.close(a.actor_distributions("F", 1.9, 1.6, plot=True)[1]), "actors"),
+    "releases": (lambda a: a.releases(), "movies"),
+    "releases_genre": (lambda a: a.releases("Drama"), "movies"),
+    "ages_year": (lambda a: a.ages("Y"), "actors"),
+    "ages_month": (lambda a: a.ages("M"), "actors"),
+    "get_random_movie_info": (lambda a: a.get_random_movie_info(), None),
+    "trope_characters": (lambda a: [a.trope_characters(t) for t in a.tropes()["Trope"].head(1)],
+                         "actors"),
+    "top_costars": (lambda a: a.top_costars(a.costar_graph.actor_ids[0]), "actors"),
+}
+
+
+def build_corpus(root: str, scale: float) -> str:
+    """Generates (once) a synthetic corpus of scale x CMU_MOVIES movies; returns its download dir."""
+    download_dir = os.path.join(root, f"x{scale:g}")
+    done = os.path.join(download_dir, "MovieSummaries", "tvtropes.clusters.txt")
+    if not os.path.exists(done):  # written last
+        generate_corpus(download_dir, max(1, round(scale * CMU_MOVIES)), seed=0)
+    return download_dir
+
+
+def _peak_bytes(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn: Callable[[], object], rows: int, repeat: int = 3) -> dict:
+    """Times fn once cold and `repeat` times warm, then traces one call's peak memory."""
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    seconds = min(times) if times else first
+    return {
+        "rows": rows,
+        "first_seconds": first,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else float("inf"),
+        "peak_bytes": _peak_bytes(fn),
+    }
+
+
+def run(scales: List[float], root: str, repeat: int = 3,
+        log: Callable[[str], None] = print) -> Dict[str, dict]:
+    """Returns {"<scale>x/<query>": measurement} for loading and every query."""
+    results: Dict[str, dict] = {}
+    for scale in scales:
+        download_dir = build_corpus(root, scale)
+        cache_dir = os.path.join(download_dir, "cache")
+
+        def parse() -> MovieAnalyzer:
+            return MovieAnalyzer(download_dir=download_dir, use_cache=False)
+
+        def load_cached() -> MovieAnalyzer:
+            return MovieAnalyzer(download_dir=download_dir)
+
+        # Parse timings run first and drop their frames, so only one copy is alive at a time.
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        entries = {"load_parse": measure(parse, 0, repeat=0)}
+        load_cached()  # writes the cache
+        entries["load_cache"] = measure(load_cached, 0, repeat)
+        # Memoized results would turn every warm repeat into a cache hit.
+        analyzer = MovieAnalyzer(download_dir=download_dir, query_cache_bytes=0)
+        total_rows = len(analyzer.movies_df) + len(analyzer.actors_df) + len(analyzer.summaries_df)
+        for entry in entries.values():
+            entry["rows"] = total_rows
+            entry["rows_per_sec"] = total_rows / entry["seconds"]
+        for name, (call, frame) in QUERIES.items():
+            rows = len(getattr(analyzer, f"{frame}_df")) if frame else 1
+            entries[name] = measure(lambda: call(analyzer), rows, repeat)
+        for name, entry in entries.items():
+            results[f"{scale:g}x/{name}"] = entry
+            log(f"{scale:g}x {name:<26} {entry['seconds'] * 1e3:10.2f} ms "
+                f"(first {entry['first_seconds'] * 1e3:.2f} ms) "
+                f"{entry['peak_bytes'] / 1e6:9.2f} MB peak {entry['rows_per_sec']:14,.0f} rows/s")
+        del analyzer
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Describes every result whose time or peak memory exceeds threshold x its
+    baseline, and every result the baseline has no entry for (so a new query
+    or scale cannot go unchecked; record it with --save-baseline).
+    """
+    regressions = []
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if base is None:
+            regressions.append(f"{key}: missing from the baseline")
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if base[metric] > 0 and entry[metric] > threshold * base[metric]:
+                regressions.append(f"{key} {metric}: {entry[metric]:.6g} vs baseline "
+                                   f"{base[metric]:.6g} ({entry[metric] / base[metric]:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark MovieAnalyzer queries.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 10.0],
+                        help="corpus sizes as multiples of the CMU corpus (e.g. 1 10 100)")
+    parser.add_argument("--root", default=None,
+                        help="directory for the generated corpora (default: a temporary one)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="merge these results into the baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    root = args.root or tempfile.mkdtemp(prefix="movie_bench_")
+    try:
+        results = run(args.scales, root, args.repeat)
+    finally:
+        if args.root is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print("REGRESSION", line)
+    print(f"{len(regressions)} regression(s) against {args.baseline} "
+          f"(threshold {args.threshold:g}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+load_test.py
+
+Load test for the HTTP query service (src/server.py).
+
+`concurrency` clients, each on its own keep-alive connection, send requests
+drawn round-robin from a mix of endpoints until `requests` have been sent,
+and the script reports throughput, latency percentiles per endpoint and the
+server's own counters (how many requests were coalesced or served from its
+response cache).
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 32
+    python -m benchmarks.load_test --spawn --download-dir /tmp/synthetic/x1
+
+With --spawn the server is started in a subprocess for the run (and stopped
+afterwards) instead of using one that is already listening at --url.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+DEFAULT_MIX = [
+    "/movie_type?N=10",
+    "/actor_count",
+    "/actor_distributions?gender=F&min_height=1.6&max_height=1.9",
+    "/releases",
+    "/releases?genre=Drama",
+    "/ages?mode=Y",
+    "/ages?mode=M",
+    "/random_movie",
+]
+
+
+async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str,
+               path: str) -> Tuple[int, bytes]:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def fetch(url: str, path: str) -> Tuple[int, dict]:
+    """One request on a fresh connection; returns (status, decoded JSON body)."""
+    address = urlsplit(url)
+    reader, writer = await asyncio.open_connection(address.hostname, address.port)
+    try:
+        status, body = await _get(reader, writer, address.netloc, path)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return status, json.loads(body)
+
+
+async def run_load(url: str, paths: List[str], requests: int, concurrency: int) -> dict:
+    """Sends `requests` requests over `concurrency` connections and summarizes them."""
+    address = urlsplit(url)
+    latencies: Dict[str, List[float]] = {path: [] for path in paths}
+    errors: Dict[str, int] = {path: 0 for path in paths}
+    counter = iter(range(requests))
+
+    async def client() -> None:
+        reader, writer = await asyncio.open_connection(address.hostname, address.port)
+        try:
+            for i in counter:
+                path = paths[i % len(paths)]
+                start = time.perf_counter()
+                status, _ = await _get(reader, writer, address.netloc, path)
+                latencies[path].append(time.perf_counter() - start)
+                errors[path] += status != 200
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    _, before = await fetch(url, "/stats")
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    _, after = await fetch(url, "/stats")
+
+    def summary(values: List[float]) -> dict:
+        p50, p90, p99 = np.quantile(values, [0.5, 0.9, 0.99]) if values else (0.0, 0.0, 0.0)
+        return {"count": len(values), "mean_ms": float(np.mean(values)) * 1e3 if values else 0.0,
+                "p50_ms": p50 * 1e3, "p90_ms": p90 * 1e3, "p99_ms": p99 * 1e3}
+
+    every = [value for values in latencies.values() for value in values]
+    return {
+        "requests": len(every),
+        "seconds": elapsed,
+        "throughput_rps": len(every) / elapsed if elapsed > 0 else 0.0,
+        "errors": sum(errors.values()),
+        "coalesced": after["coalesced"] - before["coalesced"],
+        "cached": after["cached"] - before["cached"],
+        "latency": summary(every),
+        "endpoints": {path: dict(summary(latencies[path]), errors=errors[path]) for path in paths},
+    }
+
+
+async def wait_until_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, _ = await fetch(url, "/health")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise Exception(f"Server at {url} did not start within {timeout:g}s.")
+        await asyncio.sleep(0.2)
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency"]
+    print(f"{report['requests']} requests in {report['seconds']:.2f}s: "
+          f"{report['throughput_rps']:.1f} req/s, {report['errors']} errors, "
+          f"{report['coalesced']} coalesced, {report['cached']} served from the response cache")
+    print(f"latency ms: mean {latency['mean_ms']:.2f}  p50 {latency['p50_ms']:.2f}  "
+          f"p90 {latency['p90_ms']:.2f}  p99 {latency['p99_ms']:.2f}")
+    for path, entry in report["endpoints"].items():
+        print(f"  {path:<62} p50 {entry['p50_ms']:8.2f}  p99 {entry['p99_ms']:8.2f}  "
+              f"errors {entry['errors']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the MovieAnalyzer HTTP service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_MIX,
+                        help="request paths, sent round-robin")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start `python -m src.server` for the run")
+    parser.add_argument("--download-dir", default=None, help="data for the spawned server")
+    parser.add_argument("--workers", type=int, default=None, help="workers of the spawned server")
+    parser.add_argument("--server-args", nargs=argparse.REMAINDER, default=[],
+                        help="further options for the spawned server (e.g. --no-coalesce)")
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.spawn:
+        address = urlsplit(args.url)
+        command = [sys.executable, "-m", "src.server", "--host", address.hostname,
+                   "--port", str(address.port)]
+        if args.download_dir:
+            command += ["--download-dir", args.download_dir]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        command += args.server_args
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        process = subprocess.Popen(command, cwd=root)
+    try:
+        asyncio.run(wait_until_ready(args.url, args.startup_timeout if args.spawn else 5.0))
+        report = asyncio.run(run_load(args.url, args.paths, args.requests, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,12 @@
 import streamlit as st
 import matplotlib.pyplot as plt
-from src.movie_analyzer import MovieAnalyzer
+from src.metrics import timed
+from src.shared import get_analyzer
 
 def main():
     st.title("Chronological Information")
     try:
-        analyzer = MovieAnalyzer()
+        analyzer = get_analyzer()
     except Exception as e:
         st.error(f"Could not load data: {e}")
         st.stop()
@@ -22,12 +23,13 @@ def main():
         if releases_df.empty:
             st.info("No movies found for that genre or the data is missing.")
         else:
-            fig1, ax1 = plt.subplots()
-            ax1.bar(releases_df["Year"], releases_df["Count"])
-            ax1.set_xlabel("Year")
-            ax1.set_ylabel("Number of Movies")
-            ax1.set_title("Movie Releases Over Time")
-            st.pyplot(fig1)
+            with timed("page.figure.releases"):
+                fig1, ax1 = plt.subplots()
+                ax1.bar(releases_df["Year"], releases_df["Count"])
+                ax1.set_xlabel("Year")
+                ax1.set_ylabel("Number of Movies")
+                ax1.set_title("Movie Releases Over Time")
+                st.pyplot(fig1)
     except Exception as e:
         st.error(f"Error computing releases: {e}")
 
@@ -39,16 +41,18 @@ def main():
             st.info("No valid actor birthdate data found.")
         else:
             if mode == "M":
-                x_col = "Birth Month"
+                x_col = "Birth_Month"
             else:
-                x_col = "Birth Year"
-                
-            fig2, ax2 = plt.subplots()
-            ax2.bar(ages_df[x_col], ages_df["Count"])
-            ax2.set_xlabel(x_col)
-            ax2.set_ylabel("Count")
-            ax2.set_title("Actor Births Grouped by " + x_col)
-            st.pyplot(fig2)
+                x_col = "Birth_Year"
+            x_label = x_col.replace("_", " ")
+
+            with timed("page.figure.ages"):
+                fig2, ax2 = plt.subplots()
+                ax2.bar(ages_df[x_col], ages_df["Count"])
+                ax2.set_xlabel(x_label)
+                ax2.set_ylabel("Count")
+                ax2.set_title("Actor Births Grouped by " + x_label)
+                st.pyplot(fig2)
     except Exception as e:
         st.error(f"Error computing ages: {e}")
 
@@ -1,8 +1,9 @@
-import re
 import streamlit as st
 import matplotlib.pyplot as plt
 
-from src.movie_analyzer import MovieAnalyzer
+from src.classifier import DEFAULT_MODEL, build_prompt, stream_reply, strip_thinking
+from src.metrics import timed
+from src.shared import get_analyzer
 
 # pip install ollama
 from ollama import chat
@@ -11,50 +12,48 @@ def main():
     st.title("Local LLM Genre Classifier")
 
     try:
-        analyzer = MovieAnalyzer()
+        analyzer = get_analyzer()
     except Exception as e:
         st.error(f"Could not initialize MovieAnalyzer: {e}")
         st.stop()
 
     st.write("Click **Shuffle** to classify a random movie by its plot summary.")
 
+    top_genres = analyzer.movie_type(N=50)["Movie_Type"]
+    genre_options = ["Any"] + top_genres[top_genres != "Unknown"].tolist()
+    genre_choice = st.selectbox("Restrict to genre", genre_options)
+    streaming = st.toggle("Stream the response", value=True,
+                          help="Show the answer as it is generated and stop once the verdict is in.")
+
     if "random_movie_info" not in st.session_state:
         st.session_state["random_movie_info"] = None
     if "final_reply" not in st.session_state:
         st.session_state["final_reply"] = None
 
     def shuffle_and_classify():
-        random_movie = analyzer.get_random_movie_info()
+        random_movie = analyzer.get_random_movie_info(
+            genre=None if genre_choice == "Any" else genre_choice, with_summary=True
+        )
         summary_text = random_movie["summary"]
         db_genres_list = random_movie["genres_list"]
 
         # Combined prompt letting the model think, including chain-of-thought.
-        prompt = f"""
-You are a concise movie-genre classifier and verifier.
-Given the following movie summary and the database genres, determine the genres that apply, then verify if they match the database.
-Output in this format:
-
-(START OF FORMAT DONT OUTPUT THIS LINE)
-I've identified the genres: (LIST GENRES HERE) 
-Do they match the database? (YES/NO)
-(END OF FORMAT DONT OUTPUT THIS LINE)
-
-        
-Movie Summary:
-{summary_text}
-
-Database Genres:
-{', '.join(db_genres_list)}
-"""
+        prompt = build_prompt(summary_text, db_genres_list)
+        st.session_state["random_movie_info"] = random_movie
+        if streaming:
+            # Generated while rendering the response area below.
+            st.session_state["prompt"] = prompt
+            st.session_state["final_reply"] = None
+            return
         try:
-            response = chat(model="deepseek-r1:7b", messages=[{"role": "user", "content": prompt}])
+            with timed("llm.chat"):
+                response = chat(model=DEFAULT_MODEL, messages=[{"role": "user", "content": prompt}])
             full_reply = response['message']['content'].strip()
             # Remove chain-of-thought: delete anything between <think> and </think> (including the tags)
-            final_reply = re.sub(r'<think>.*?</think>', '', full_reply, flags=re.DOTALL).strip()
+            final_reply = strip_thinking(full_reply)
         except Exception as e:
             final_reply = f"Error with LLM: {e}"
 
-        st.session_state["random_movie_info"] = random_movie
         st.session_state["final_reply"] = final_reply
 
     if st.button("Shuffle"):
@@ -64,7 +63,26 @@ Database Genres:
         info = st.session_state["random_movie_info"]
         st.text_area("Title & Summary", f"{info['title']}\n\n{info['summary']}", height=200)
         st.text_area("Database Genres", ", ".join(info["genres_list"]), height=68)
-        st.text_area("LLM Response", st.session_state["final_reply"] or "", height=100)
+        # Nearest neighbours by plot summary, for comparison with the LLM's answer.
+        try:
+            similar = analyzer.similar_movies(int(info["movie_id"]), k=5)
+            similar["genres_list"] = similar["genres_list"].map(", ".join)
+            st.caption("Movies with similar plots")
+            st.dataframe(similar[["title", "similarity", "genres_list"]].rename(
+                columns={"title": "Title", "similarity": "Similarity", "genres_list": "Genres"}),
+                hide_index=True)
+        except Exception as e:
+            st.warning(f"Could not find similar movies: {e}")
+        if st.session_state["final_reply"] is None:
+            st.caption("LLM Response")
+            try:
+                final_reply = st.write_stream(stream_reply(chat, st.session_state["prompt"]))
+            except Exception as e:
+                final_reply = f"Error with LLM: {e}"
+                st.error(final_reply)
+            st.session_state["final_reply"] = final_reply if isinstance(final_reply, str) else ""
+        else:
+            st.text_area("LLM Response", st.session_state["final_reply"], height=100)
 
 if __name__ == "__main__":
     main()
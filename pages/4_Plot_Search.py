@@ -0,0 +1,66 @@
+import time
+
+import streamlit as st
+
+from src.filters import Genre, Years
+from src.search import snippet
+from src.shared import get_analyzer
+
+def main():
+    st.title("Plot Search")
+    try:
+        analyzer = get_analyzer()
+    except Exception as e:
+        st.error(f"Could not load data: {e}")
+        st.stop()
+
+    query = st.text_input("Search plot summaries", placeholder="e.g. heist train")
+
+    col1, col2, col3 = st.columns(3)
+    top_genres = analyzer.movie_type(N=50)["Movie_Type"]
+    genre_choice = col1.selectbox("Genre", ["Any"] + top_genres[top_genres != "Unknown"].tolist())
+    years = analyzer.releases()["Year"]
+    year_range = None
+    if not years.empty:
+        year_range = col2.slider("Release years", int(years.min()), int(years.max()),
+                                 (int(years.min()), int(years.max())))
+    k = col3.number_input("Results", min_value=1, max_value=100, value=10, step=1)
+    require_all = st.checkbox("Match all words", value=True)
+
+    if not query.strip():
+        st.info("Enter a few words to search the plot summaries.")
+        return
+
+    # Only filter when the user narrowed something, so movies without a
+    # known release year are not dropped by default.
+    where = None
+    if genre_choice != "Any":
+        where = Genre(genre_choice)
+    if year_range is not None and year_range != (int(years.min()), int(years.max())):
+        span = Years(*year_range)
+        where = span if where is None else where & span
+
+    try:
+        start = time.perf_counter()
+        results = analyzer.search(query, k=int(k), where=where, require_all=require_all)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        st.error(f"Error searching: {e}")
+        return
+
+    st.caption(f"{len(results)} results in {elapsed_ms:.1f} ms")
+    if results.empty:
+        st.info("No plot summary matches that search.")
+        return
+
+    for result in results.itertuples():
+        summary = ""
+        row = analyzer.movie_index.row_of(result.movie_id)
+        if row >= 0:
+            summary_row = analyzer.movie_index.summary_rows[row]
+            summary = str(analyzer.summaries_df["summary"].iloc[summary_row])
+        with st.expander(f"{result.title or result.movie_id} (score {result.score:.2f})"):
+            st.write(snippet(summary, query, width=400))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import pandas as pd
+import streamlit as st
+
+from src.metrics import peak_rss, registry
+from src.shared import get_analyzer
+
+def main():
+    st.title("Debug: Timings and Memory")
+    st.write("Per-stage timings and peak-RSS growth recorded in this process since it started "
+             "(or since the last reset). Times are in milliseconds.")
+
+    if not registry.enabled:
+        st.info("Instrumentation is off (MOVIE_ANALYZER_METRICS=0).")
+        st.stop()
+
+    if st.button("Reset"):
+        registry.reset()
+
+    snapshot = registry.snapshot()
+    st.metric("Peak RSS (MB)", f"{peak_rss() / 2**20:.1f}")
+    if not snapshot:
+        st.info("Nothing recorded yet.")
+    else:
+        df = pd.DataFrame.from_dict(snapshot, orient="index")
+        seconds = [c for c in df.columns if c.endswith("_seconds")]
+        df[seconds] = df[seconds] * 1000
+        df = df.rename(columns={c: c.replace("_seconds", "_ms") for c in seconds})
+        df["max_rss_growth_mb"] = df.pop("max_rss_growth_bytes") / 2**20
+        df = df.drop(columns="peak_rss_bytes")
+        st.dataframe(df.sort_values("total_ms", ascending=False), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    col1.download_button("Download JSON", registry.to_json(), file_name="metrics.json",
+                         mime="application/json")
+    col2.download_button("Download Prometheus", registry.to_prometheus(), file_name="metrics.prom",
+                         mime="text/plain")
+
+    try:
+        analyzer = get_analyzer()
+    except Exception as e:
+        st.error(f"Could not load data: {e}")
+        st.stop()
+    st.subheader("Query cache")
+    st.write(analyzer.query_cache.stats())
+    st.subheader("Memory by component")
+    if analyzer.shared_version is not None:
+        st.caption(f"Frames are mapped from version {analyzer.shared_version} of the shared store "
+                   "and counted here in every process, though held once per host.")
+    st.dataframe(analyzer.memory_report(), use_container_width=True)
+
+if __name__ == "__main__":
+    main()
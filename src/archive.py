@@ -0,0 +1,54 @@
+"""
+archive.py
+
+Streaming access to members of MovieSummaries.tar.gz without extracting it.
+"""
+
+import io
+import os
+import tarfile
+from typing import IO, Iterable, Iterator, Tuple
+
+
+class _MemberStream(io.RawIOBase):
+    """
+    Forward-only raw stream over a member of a streamed tarball.
+    tarfile's own member objects probe seekable() on the underlying gzip
+    stream, which does not implement it, so parsers get this wrapper instead.
+    """
+
+    def __init__(self, member_file):
+        self._member_file = member_file
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._member_file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def iter_members(archive_path: str, wanted: Iterable[str]) -> Iterator[Tuple[str, IO[bytes]]]:
+    """
+    Yields (file name, readable stream) for every wanted member of a gzip
+    tarball, in archive order, matching on the base name of each member.
+
+    The archive is read as a single forward stream ("r|gz"), so nothing is
+    written to disk and members that are not wanted are skipped without being
+    parsed. Decompression stops as soon as the last wanted member has been
+    yielded. Each stream is only valid until the next member is requested.
+    """
+    remaining = set(wanted)
+    if not remaining:
+        return
+    with tarfile.open(archive_path, "r|gz") as tar:
+        for member in tar:
+            name = os.path.basename(member.name)
+            if not member.isfile() or name not in remaining:
+                continue
+            stream = io.BufferedReader(_MemberStream(tar.extractfile(member)), 1 << 20)
+            yield name, stream
+            remaining.discard(name)
+            if not remaining:
+                break
@@ -0,0 +1,199 @@
+"""
+cache.py
+
+On-disk columnar cache of the parsed MovieSummaries frames.
+
+Parsing the raw TSVs is dominated by CSV tokenizing, so after the first parse
+every frame is written as a Feather (Arrow IPC) file and later starts read
+those back instead. A manifest records the schema version and a fingerprint
+(size and mtime, optionally a content hash) of every source file; any mismatch
+invalidates the whole cache.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+# Bump whenever parsing or post-processing in MovieAnalyzer changes what the
+# cached frames contain, so stale caches are rebuilt instead of reused.
+CACHE_SCHEMA_VERSION = 10
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(sources: Dict[str, str], content_hash: bool = False) -> dict:
+    """
+    Returns a JSON-serializable fingerprint of the given source files.
+    Missing files are recorded as None so that their later appearance
+    also invalidates the cache.
+    """
+    result = {}
+    for name, path in sorted(sources.items()):
+        if not os.path.exists(path):
+            result[name] = None
+            continue
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if content_hash:
+            entry["sha256"] = _file_hash(path)
+        result[name] = entry
+    return result
+
+
+def _arrow_strings(arrow_type: pa.DataType):
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def _arrow_categories(series: pd.Series) -> pd.Series:
+    """The categorical series with pyarrow-backed string categories, as compact_frame makes them."""
+    categories = series.cat.categories
+    if categories.dtype != object or pd.api.types.infer_dtype(categories) != "string":
+        return series
+    dtype = pd.CategoricalDtype(categories.astype("string[pyarrow]"), ordered=series.cat.ordered)
+    return pd.Series(pd.Categorical.from_codes(series.cat.codes, dtype=dtype),
+                     index=series.index, name=series.name)
+
+
+def load_frames(cache_dir: str, sources: Dict[str, str], content_hash: bool = False,
+                variant: str = "") -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Returns the cached frames if the cache matches the current schema version,
+    load variant (e.g. the dtype profile) and source fingerprint, otherwise None.
+    """
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("schema_version") != CACHE_SCHEMA_VERSION:
+        return None
+    if manifest.get("variant", "") != variant:
+        return None
+    if manifest.get("sources") != fingerprint(sources, content_hash=content_hash):
+        return None
+
+    frames = {}
+    try:
+        for name in manifest["frames"]:
+            table = feather.read_table(os.path.join(cache_dir, f"{name}.feather"))
+            # Strings come back Arrow-backed; columns that were plain Python
+            # objects are restored as such, with the NaN that read_csv uses.
+            df = table.to_pandas(types_mapper=_arrow_strings)
+            for col in df.columns[df.dtypes == "category"]:
+                # types_mapper does not reach dictionary values.
+                df[col] = _arrow_categories(df[col])
+            for col in manifest["object_columns"][name]:
+                df[col] = df[col].astype(object).fillna(np.nan)
+            frames[name] = df
+    except (OSError, ValueError, KeyError):
+        return None
+    return frames
+
+
+def save_frames(cache_dir: str, sources: Dict[str, str], frames: Dict[str, pd.DataFrame],
+                content_hash: bool = False, variant: str = "") -> bool:
+    """
+    Writes the frames and a manifest describing their sources.
+    Every file is written to a temporary path and renamed into place, and the
+    manifest goes last, so a crash never leaves a cache that looks valid.
+    Returns False if the frames could not be written (for example because a
+    column holds values Arrow cannot represent); the cache is then left unused.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILENAME)
+    # Remove the old manifest first so a half-replaced cache is never trusted.
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    try:
+        for name, df in frames.items():
+            path = os.path.join(cache_dir, f"{name}.feather")
+            df.reset_index(drop=True).to_feather(path + ".tmp")
+            os.replace(path + ".tmp", path)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Could not write data cache: {e}")
+        return False
+
+    manifest = {
+        "schema_version": CACHE_SCHEMA_VERSION,
+        "sources": fingerprint(sources, content_hash=content_hash),
+        "variant": variant,
+        "frames": list(frames),
+        "object_columns": {
+            name: [str(col) for col in df.columns[df.dtypes == object]]
+            for name, df in frames.items()
+        },
+    }
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return True
+
+
+def load_arrays(directory: str, expected: dict
+                ) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, str], dict]]:
+    """
+    Opens arrays saved by save_arrays, memory-mapped, if every key of
+    expected (e.g. a schema version and a source fingerprint) matches the
+    manifest. Returns (arrays, texts, manifest), or None if anything is
+    missing or stale.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILENAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if any(manifest.get(key) != value for key, value in expected.items()):
+            return None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                  for name in manifest["arrays"]}
+        texts = {}
+        for name in manifest["texts"]:
+            with open(os.path.join(directory, f"{name}.txt"), encoding="utf-8") as f:
+                texts[name] = f.read()
+    except (OSError, ValueError, KeyError):
+        return None
+    return arrays, texts, manifest
+
+
+def save_arrays(directory: str, arrays: Dict[str, np.ndarray], manifest: dict,
+                texts: Optional[Dict[str, str]] = None) -> None:
+    """
+    Writes arrays as .npy files and texts as .txt files, then the manifest,
+    with the same temporary-file-then-rename order as save_frames.
+    """
+    texts = texts or {}
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name, array in arrays.items():
+        path = os.path.join(directory, f"{name}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(path + ".tmp", path)
+    for name, text in texts.items():
+        path = os.path.join(directory, f"{name}.txt")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+    manifest = dict(manifest, arrays=list(arrays), texts=list(texts))
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
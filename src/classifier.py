@@ -0,0 +1,363 @@
+"""
+classifier.py
+
+LLM genre classification of plot summaries through a local Ollama server.
+
+The Genre Classifier page classifies one movie per click; classify_movies()
+runs the same prompt over many movies at once through a bounded thread pool,
+with per-request timeouts and retries. Every finished reply is appended to a
+JSON-lines ResultCache keyed by movie ID, model and prompt hash, so an
+interrupted or repeated run only sends the movies it has not seen yet.
+
+stream_reply() is the interactive counterpart used by the page: it hides the
+<think> block while the tokens arrive and stops generation as soon as the
+verdict line is complete.
+
+Run headless with, e.g.
+
+    python -m src.classifier --n 200 --concurrency 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from ollama import Client
+
+from src.metrics import registry, timed
+
+DEFAULT_MODEL = "deepseek-r1:7b"
+
+PROMPT_TEMPLATE = """
+You are a concise movie-genre classifier and verifier.
+Given the following movie summary and the database genres, determine the genres that apply, then verify if they match the database.
+Output in this format:
+
+(START OF FORMAT DONT OUTPUT THIS LINE)
+I've identified the genres: (LIST GENRES HERE)
+Do they match the database? (YES/NO)
+(END OF FORMAT DONT OUTPUT THIS LINE)
+
+
+Movie Summary:
+{summary}
+
+Database Genres:
+{genres}
+"""
+
+# Identifies the prompt wording in cache keys, so editing it invalidates old replies.
+PROMPT_HASH = hashlib.sha256(PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+
+_THINK_RE = re.compile(r"<think>.*?</think>", flags=re.DOTALL)
+_GENRES_RE = re.compile(r"identified the genres:\s*(.*)", flags=re.IGNORECASE)
+_MATCH_RE = re.compile(r"match the database\?\s*\**\s*\b(YES|NO)\b", flags=re.IGNORECASE)
+# While streaming, \b also matches at the end of the text received so far
+# ("Yes" of "Yesterday"), so the verdict only counts once a non-word follows.
+_STREAMED_MATCH_RE = re.compile(_MATCH_RE.pattern + r"(?=\W)", flags=re.IGNORECASE)
+
+
+def build_prompt(summary: str, genres: List[str]) -> str:
+    return PROMPT_TEMPLATE.format(summary=summary, genres=", ".join(genres))
+
+
+def strip_thinking(reply: str) -> str:
+    """Removes the chain-of-thought (anything between <think> and </think>)."""
+    return _THINK_RE.sub("", reply).strip()
+
+
+def parse_reply(reply: str) -> Tuple[List[str], Optional[bool]]:
+    """
+    Extracts (identified genres, model's YES/NO verdict) from a visible reply.
+    Either part is empty / None when the model did not follow the format.
+    """
+    genres: List[str] = []
+    found = _GENRES_RE.search(reply)
+    if found:
+        genres = [g.strip(" .*[]()") for g in found.group(1).split(",")]
+        genres = [g for g in genres if g]
+    verdict = _MATCH_RE.search(reply)
+    return genres, (verdict.group(1).upper() == "YES" if verdict else None)
+
+
+def genre_overlap(predicted: List[str], database: List[str]) -> float:
+    """Case-insensitive Jaccard similarity of two genre lists (1.0 if both are empty)."""
+    a = {g.lower() for g in predicted}
+    b = {g.lower() for g in database}
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+class ThinkFilter:
+    """
+    Streaming counterpart of strip_thinking(): feed() takes the reply chunk by
+    chunk and returns the visible text that is certain so far. Tags split
+    across chunks are handled by holding back a possible partial tag.
+    """
+
+    OPEN, CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._inside = False
+        self._started = False
+
+    @staticmethod
+    def _partial_tag(text: str, tag: str) -> int:
+        """Length of the longest suffix of text that is a proper prefix of tag."""
+        for n in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:n]):
+                return n
+        return 0
+
+    def _emit(self, text: str) -> str:
+        # Like strip(): drop the whitespace that follows the hidden block.
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        out = []
+        while True:
+            if self._inside:
+                end = self._buffer.find(self.CLOSE)
+                if end < 0:
+                    keep = self._partial_tag(self._buffer, self.CLOSE)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[end + len(self.CLOSE):]
+                self._inside = False
+            else:
+                start = self._buffer.find(self.OPEN)
+                if start < 0:
+                    keep = self._partial_tag(self._buffer, self.OPEN)
+                    out.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                out.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self.OPEN):]
+                self._inside = True
+        return self._emit("".join(out))
+
+    def flush(self) -> str:
+        """Returns the held-back text at the end of the reply."""
+        text, self._buffer = ("" if self._inside else self._buffer), ""
+        return self._emit(text).rstrip()
+
+
+def stream_reply(chat: Callable, prompt: str, model: str = DEFAULT_MODEL,
+                 stop_at_verdict: bool = True) -> Iterator[str]:
+    """
+    Yields the visible reply to prompt as it is generated, through
+    chat(model=..., messages=..., stream=True) (ollama.chat or Client.chat).
+    With stop_at_verdict the response stream is closed, which stops the
+    server's generation, once the "Do they match the database?" answer
+    has arrived as a whole word (or the reply ends).
+    """
+    # Timed by hand: the consumer runs its own code between the chunks.
+    start = time.perf_counter()
+    stream = chat(model=model, messages=[{"role": "user", "content": prompt}], stream=True)
+    think = ThinkFilter()
+    visible = ""
+    try:
+        for part in stream:
+            text = think.feed(part["message"]["content"])
+            verdict = None
+            if text:
+                if not visible:
+                    registry.record("llm.first_visible_token", time.perf_counter() - start)
+                visible += text
+                if stop_at_verdict:
+                    verdict = _STREAMED_MATCH_RE.search(visible)
+                if verdict is not None:
+                    # Up to the verdict, not the text that confirmed its end.
+                    text = text[:len(text) - (len(visible) - verdict.end())]
+                if text:
+                    yield text
+            if verdict is not None:
+                return
+        tail = think.flush()
+        if tail:
+            yield tail
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+        registry.record("llm.stream", time.perf_counter() - start)
+
+
+class ResultCache:
+    """
+    Append-only JSON-lines store of classification results. A line that was
+    cut short by an interrupted run is ignored on the next load.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.results: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                        self.results[result["key"]] = result
+                    except (ValueError, KeyError):
+                        continue
+
+    @staticmethod
+    def key(movie_id: int, model: str, prompt_hash: str = PROMPT_HASH) -> str:
+        return f"{movie_id}:{model}:{prompt_hash}"
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.results.get(key)
+
+    def put(self, result: dict) -> None:
+        with self._lock:
+            self.results[result["key"]] = result
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(result) + "\n")
+
+
+def classify_one(client: Client, movie: dict, model: str = DEFAULT_MODEL,
+                 retries: int = 2, backoff: float = 1.0) -> dict:
+    """
+    Classifies one movie (a get_random_movie_info()-style dict), retrying
+    failed requests with exponential backoff. Raises the last error.
+    """
+    prompt = build_prompt(movie["summary"], movie["genres_list"])
+    for attempt in range(retries + 1):
+        try:
+            with timed("llm.chat"):
+                response = client.chat(model=model, messages=[{"role": "user", "content": prompt}])
+            break
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+    reply = strip_thinking(response["message"]["content"])
+    predicted, verdict = parse_reply(reply)
+    return {
+        "key": ResultCache.key(movie["movie_id"], model),
+        "movie_id": int(movie["movie_id"]),
+        "model": model,
+        "prompt_hash": PROMPT_HASH,
+        "reply": reply,
+        "predicted": predicted,
+        "database": list(movie["genres_list"]),
+        "verdict": verdict,
+        "overlap": genre_overlap(predicted, movie["genres_list"]),
+    }
+
+
+def classify_movies(
+    movies: List[dict],
+    host: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+    concurrency: int = 4,
+    timeout: float = 120.0,
+    retries: int = 2,
+    backoff: float = 1.0,
+    cache: Optional[ResultCache] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[pd.DataFrame, dict]:
+    """
+    Classifies movies with at most `concurrency` requests in flight and
+    returns (results, report). results has one row per movie that has a
+    result (cached or new); report holds the counts, elapsed seconds,
+    throughput of the new requests and agreement with the database genres:
+    the share of YES verdicts and the mean genre overlap.
+    """
+    cache = cache if cache is not None else ResultCache(None)
+    results: Dict[int, dict] = {}
+    todo = []
+    for movie in movies:
+        cached = cache.get(ResultCache.key(movie["movie_id"], model))
+        if cached is not None:
+            results[int(movie["movie_id"])] = cached
+        else:
+            todo.append(movie)
+
+    client = Client(host=host, timeout=timeout)
+    failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(classify_one, client, movie, model, retries, backoff)
+                   for movie in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception:
+                failed += 1
+            else:
+                cache.put(result)
+                results[result["movie_id"]] = result
+            if progress is not None:
+                progress(done, len(futures))
+    seconds = time.perf_counter() - start
+
+    frame = pd.DataFrame(list(results.values()),
+                         columns=["movie_id", "model", "predicted", "database", "verdict",
+                                  "overlap", "reply"])
+    classified = len(todo) - failed
+    verdicts = frame["verdict"].dropna()
+    report = {
+        "movies": len(movies),
+        "cached": len(movies) - len(todo),
+        "classified": classified,
+        "failed": failed,
+        "seconds": seconds,
+        "throughput": classified / seconds if seconds > 0 else 0.0,
+        "match_rate": float(verdicts.astype(bool).mean()) if len(verdicts) else None,
+        "mean_overlap": float(frame["overlap"].mean()) if len(frame) else None,
+    }
+    return frame, report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.movie_analyzer import MovieAnalyzer
+
+    parser = argparse.ArgumentParser(description="Batch LLM genre classification.")
+    parser.add_argument("--n", type=int, default=None,
+                        help="number of random movies (default: every movie with a summary)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--genre", default=None)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--host", default=None, help="Ollama server (default: $OLLAMA_HOST)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--cache", default=None,
+                        help="results file (default: <download_dir>/cache/classifications.jsonl)")
+    parser.add_argument("--download-dir", default=None)
+    args = parser.parse_args(argv)
+
+    analyzer = MovieAnalyzer(download_dir=args.download_dir)
+    n = args.n
+    if n is None:
+        n = len(analyzer.movie_index.pool(args.genre, with_summary=True))
+    movies = analyzer.sample_movies(n, seed=args.seed, genre=args.genre, with_summary=True)
+    cache = ResultCache(args.cache or os.path.join(analyzer.cache_dir, "classifications.jsonl"))
+
+    def print_done(done: int, total: int) -> None:
+        if done % 10 == 0 or done == total:
+            print(f"Classified {done}/{total}")
+
+    _, report = classify_movies(movies, host=args.host, model=args.model,
+                                concurrency=args.concurrency, timeout=args.timeout,
+                                retries=args.retries, cache=cache, progress=print_done)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+clusters.py
+
+The character clusters that ship with the corpus, joined to the character table.
+
+tvtropes.clusters.txt files 501 characters under 72 tvtropes.com character
+types ("trope<TAB>{json}" lines), and name.clusters.txt lists 2,666 characters
+under 970 names used in at least two movies ("name<TAB>id" lines). Both refer
+to a character by its Freebase character/actor map ID, the map_id column of
+actors_df. MapIdIndex is a hash index over that column, so an ID resolves to
+its actors_df row in O(1) instead of a merge against the whole table, and
+ClusterIndex resolves every cluster entry once and keeps the entries of each
+trope and name as arrays of positions.
+"""
+
+import json
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+TROPE_COLUMNS = ["trope", "character_name", "movie_title", "map_id", "actor_name"]
+NAME_COLUMNS = ["name", "map_id"]
+
+
+def read_tropes(source) -> pd.DataFrame:
+    """Parses tvtropes.clusters.txt (a path or a binary stream) into TROPE_COLUMNS."""
+    raw = pd.read_csv(source, sep="\t", header=None, names=["trope", "record"],
+                      encoding="utf-8", quoting=3, dtype=str)
+    records = [json.loads(record) for record in raw["record"]]
+    return pd.DataFrame({
+        "trope": raw["trope"],
+        "character_name": [r.get("char") for r in records],
+        "movie_title": [r.get("movie") for r in records],
+        "map_id": [r.get("id") for r in records],
+        "actor_name": [r.get("actor") for r in records],
+    }, columns=TROPE_COLUMNS)
+
+
+def read_names(source) -> pd.DataFrame:
+    """Parses name.clusters.txt (a path or a binary stream) into NAME_COLUMNS."""
+    return pd.read_csv(source, sep="\t", header=None, names=NAME_COLUMNS,
+                       encoding="utf-8", quoting=3, dtype=str)
+
+
+def _groups(keys: pd.Series) -> Dict[str, np.ndarray]:
+    """{key: ascending positions of its rows}."""
+    return {key: np.asarray(rows, dtype=np.int64)
+            for key, rows in keys.groupby(keys, sort=False).indices.items()}
+
+
+class MapIdIndex:
+    """
+    Hash index from map ID to actors_df row. A map ID names one character
+    played by one actor in one movie, so it should occur once; if it repeats,
+    the first row wins.
+    """
+
+    def __init__(self, map_ids: pd.Series):
+        codes, uniques = pd.factorize(map_ids)
+        self._first_rows = np.full(len(uniques), -1, dtype=np.int64)
+        # Written in reverse, so the first row of every ID is the one kept.
+        rows = np.flatnonzero(codes >= 0)[::-1]
+        self._first_rows[codes[rows]] = rows
+        self._ids = pd.Index(np.asarray(uniques, dtype=object))
+
+    def rows(self, map_ids) -> np.ndarray:
+        """actors_df row of every given map ID, or -1 where it is unknown."""
+        positions = self._ids.get_indexer(pd.Index(np.asarray(map_ids, dtype=object)))
+        return np.where(positions >= 0, self._first_rows[positions], -1)
+
+    def row(self, map_id: str) -> int:
+        return int(self.rows([map_id])[0])
+
+    def nbytes(self) -> int:
+        return int(self._first_rows.nbytes + self._ids.memory_usage(deep=True))
+
+
+class ClusterIndex:
+    """
+    - tropes and names are the parsed cluster files (see read_tropes and
+      read_names), and tropes_rows / names_rows the actors_df row of every
+      entry (-1 if the character table has no such map ID).
+    - entries("trope", t) / entries("name", n) are the positions of a
+      trope's or name's entries in those frames.
+    """
+
+    def __init__(self, map_ids: MapIdIndex, tropes: pd.DataFrame, names: pd.DataFrame):
+        self.tropes = tropes
+        self.names = names
+        self.tropes_rows = map_ids.rows(tropes["map_id"])
+        self.names_rows = map_ids.rows(names["map_id"])
+        self._entries = {"trope": _groups(tropes["trope"]), "name": _groups(names["name"])}
+
+    def entries(self, kind: str, key: str) -> np.ndarray:
+        found = self._entries[kind].get(key)
+        if found is None:
+            raise Exception(f"Unknown {kind}: {key}")
+        return found
+
+    def counts(self, kind: str) -> pd.Series:
+        """Entries per trope or name, most common first (ties by name)."""
+        sizes = pd.Series({key: len(rows) for key, rows in self._entries[kind].items()},
+                          dtype=np.int64)
+        return sizes.sort_index().sort_values(ascending=False, kind="stable")
+
+    def nbytes(self) -> int:
+        frames = (self.tropes.memory_usage(index=True, deep=True).sum()
+                  + self.names.memory_usage(index=True, deep=True).sum())
+        groups = sum(rows.nbytes for groups in self._entries.values() for rows in groups.values())
+        return int(frames + self.tropes_rows.nbytes + self.names_rows.nbytes + groups)
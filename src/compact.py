@@ -0,0 +1,81 @@
+"""
+compact.py
+
+Compact in-memory dtypes for the parsed frames, and the per-column memory
+breakdown behind MovieAnalyzer.memory_report().
+"""
+
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Columns no query method reads; dropped at parse time with skip_unused_columns.
+# col8 is the actor ethnicity, col11 the Freebase character ID. The JSON
+# columns of movies are read once into facets and dropped after that.
+UNUSED_COLUMNS: Dict[str, List[str]] = {
+    "actors": ["col8", "col11"],
+    "movies": ["languages", "countries", "genres"],
+}
+
+# Float columns for which float32 is precise enough (meters, years, minutes).
+FLOAT32_COLUMNS: Dict[str, List[str]] = {
+    "movies": ["runtime"],
+    "actors": ["height", "age"],
+}
+
+# String columns with at most this share of distinct values become categoricals;
+# the others become pyarrow-backed strings.
+CATEGORY_MAX_RATIO = 0.5
+
+# Rows parsed at a time by read_arrow_strings.
+PARSE_CHUNK_ROWS = 200_000
+
+
+def read_arrow_strings(read: Callable[..., Any], source) -> pd.DataFrame:
+    """
+    read(source, chunksize=PARSE_CHUNK_ROWS) (a chunked read_csv) with the
+    text columns of every chunk turned into pyarrow strings before the next
+    one is parsed, so only one chunk's cells are ever Python str objects
+    (a whole file of them takes several times its size on disk).
+    """
+    chunks = []
+    with read(source, chunksize=PARSE_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            for col in chunk.columns:
+                if chunk[col].dtype == object:
+                    chunk[col] = chunk[col].astype("string[pyarrow]")
+            chunks.append(chunk)
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+
+def compact_frame(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the columns of a parsed frame in place to compact dtypes:
+    categoricals for low-cardinality strings, pyarrow strings for the rest,
+    float32 for FLOAT32_COLUMNS and the smallest integer type that fits.
+    """
+    for col in df.columns:
+        series = df[col]
+        if col in FLOAT32_COLUMNS.get(name, ()):
+            df[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            if len(series) and series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+                # pyarrow-backed categories: no Python object per distinct value.
+                df[col] = series.astype("string[pyarrow]").astype("category")
+            else:
+                df[col] = series.astype("string[pyarrow]")
+    return df
+
+
+def frame_memory(frame: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes held by every column of df (strings and categories included)."""
+    usage = df.memory_usage(index=False, deep=True)
+    return pd.DataFrame({
+        "frame": frame,
+        "column": usage.index.astype(str),
+        "dtype": [str(df[col].dtype) for col in usage.index],
+        "bytes": usage.to_numpy(dtype=np.int64),
+    })
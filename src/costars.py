@@ -0,0 +1,282 @@
+"""
+costars.py
+
+The actor co-star graph over the character table.
+
+Actors are integer-coded by their Freebase actor ID (the actor_id column of
+actors_df) and movies by movie ID. The actor x movie incidence matrix is
+kept in CSR form both ways (each actor's movies, each movie's actors), and
+the co-star adjacency derived from it is another CSR matrix whose weights
+count the movies two actors share. Connected components are labelled once
+at build time by min-label propagation with pointer jumping.
+
+Everything is plain NumPy arrays, saved next to the frame cache with
+save_arrays and reopened memory-mapped, so startup does not rebuild the graph
+and a query only touches the rows it reads. Shortest co-star paths are found
+by a bidirectional breadth-first search that expands whole levels at once.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_arrays, save_arrays
+from src.similarity import expand_rows
+
+# Bump whenever the graph or the file layout changes.
+COSTAR_SCHEMA_VERSION = 1
+
+ARRAYS = ["movie_ids", "actor_offsets", "actor_movies", "actor_rows", "movie_offsets",
+          "movie_actors", "adj_offsets", "adj_actors", "adj_weights", "components", "alias_actors"]
+
+# Expanded (actor, co-star) pairs per block while building the adjacency.
+BLOCK_PAIRS = 1 << 22
+
+
+def _csr(rows: np.ndarray, n_rows: int) -> np.ndarray:
+    """Offsets of a CSR matrix whose entries, sorted by row, have the given rows."""
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return offsets
+
+
+def _adjacency(actor_offsets: np.ndarray, actor_movies: np.ndarray, movie_offsets: np.ndarray,
+               movie_actors: np.ndarray, block_pairs: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Co-star CSR (offsets, actors, shared-movie counts), built over blocks of actors."""
+    n_actors = len(actor_offsets) - 1
+    cast_sizes = np.diff(movie_offsets)
+    # Pairs each actor expands to: the casts of all their movies.
+    cumulative = np.concatenate([[0], np.cumsum(cast_sizes[actor_movies])])
+    costs = cumulative[actor_offsets[1:]] - cumulative[actor_offsets[:-1]]
+    degrees, actors, weights = [], [], []
+    start = 0
+    while start < n_actors:
+        end = start + 1
+        total = costs[start]
+        while end < n_actors and total + costs[end] <= block_pairs:
+            total += costs[end]
+            end += 1
+        block = np.arange(start, end)
+        owners, entries = expand_rows(actor_offsets, block)
+        pair_owners, positions = expand_rows(movie_offsets, actor_movies[entries])
+        sources = block[owners[pair_owners]]
+        targets = movie_actors[positions].astype(np.int64)
+        keep = sources != targets
+        keys, counts = np.unique(sources[keep] * n_actors + targets[keep], return_counts=True)
+        # Narrow each block right away: piling up int64 keys until the end
+        # holds several times the finished adjacency at once.
+        degrees.append(np.bincount(keys // n_actors - start, minlength=end - start))
+        actors.append((keys % n_actors).astype(np.int32))
+        weights.append(counts.astype(np.int32))
+        start = end
+    adj_offsets = np.zeros(n_actors + 1, dtype=np.int64)
+    if degrees:
+        np.cumsum(np.concatenate(degrees), out=adj_offsets[1:])
+    return (adj_offsets, np.concatenate(actors) if actors else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.int32))
+
+
+def _components(adj_offsets: np.ndarray, adj_actors: np.ndarray) -> np.ndarray:
+    """Component label (its smallest actor code) of every actor."""
+    n_actors = len(adj_offsets) - 1
+    labels = np.arange(n_actors, dtype=np.int32)
+    linked = np.flatnonzero(np.diff(adj_offsets) > 0)
+    if not len(linked):
+        return labels
+    starts = adj_offsets[linked]
+    while True:
+        smallest = np.minimum.reduceat(labels[adj_actors], starts)
+        updated = labels.copy()
+        updated[linked] = np.minimum(labels[linked], smallest)
+        # Pointer jumping: follow labels to their own labels.
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class CostarGraph:
+    """
+    - actor_ids[a] / actor_names[a] are the Freebase ID and first listed
+      name of actor a, and movie_ids[m] the movie ID of movie m (ascending).
+    - aliases[i] is a name actor alias_actors[i] is listed under (every
+      distinct pair once), for lookups by name.
+    - actor_offsets delimits each actor's movies in actor_movies (int32,
+      ascending), with actor_rows the actors_df row of each entry.
+    - movie_offsets delimits each movie's cast in movie_actors (int32).
+    - adj_offsets delimits each actor's co-stars in adj_actors (int32,
+      ascending), with adj_weights the number of movies they share.
+    - components[a] labels actor a's connected component.
+    """
+
+    def __init__(self, actor_ids: List[str], actor_names: List[str], aliases: List[str],
+                 **arrays: np.ndarray):
+        self.actor_ids = actor_ids
+        self.actor_names = actor_names
+        self.aliases = aliases
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.n_actors = len(actor_ids)
+        self._codes = {actor_id: a for a, actor_id in enumerate(actor_ids)}
+        self._codes_by_name: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def build(cls, actor_ids: pd.Series, actor_names: pd.Series, movie_ids: pd.Series,
+              block_pairs: Optional[int] = None) -> "CostarGraph":
+        """Builds the graph from the actor ID, actor name and movie ID columns of actors_df."""
+        known = np.flatnonzero(actor_ids.notna().to_numpy())
+        actor_codes, uniques = pd.factorize(actor_ids.iloc[known], sort=True)
+        movie_codes, movies = pd.factorize(movie_ids.iloc[known], sort=True)
+        # One entry per (actor, movie); the first row of a repeated pair wins.
+        keys, first = np.unique(actor_codes.astype(np.int64) * max(1, len(movies)) + movie_codes,
+                                return_index=True)
+        entry_actors = keys // max(1, len(movies))
+        entry_movies = (keys % max(1, len(movies))).astype(np.int32)
+        actor_offsets = _csr(entry_actors, len(uniques))
+        by_movie = np.argsort(entry_movies, kind="stable")
+        movie_offsets = _csr(entry_movies[by_movie], len(movies))
+        movie_actors = entry_actors[by_movie].astype(np.int32)
+        adj_offsets, adj_actors, adj_weights = _adjacency(actor_offsets, entry_movies, movie_offsets,
+                                                          movie_actors, block_pairs or BLOCK_PAIRS)
+        names = actor_names.iloc[known].astype(object).fillna("").astype(str).to_numpy()
+        first_row = np.zeros(len(uniques), dtype=np.int64)
+        first_row[actor_codes[::-1]] = np.arange(len(actor_codes))[::-1]
+        name_codes, name_uniques = pd.factorize(names)
+        pairs = np.unique(actor_codes.astype(np.int64) * max(1, len(name_uniques)) + name_codes)
+        return cls(
+            [str(a) for a in uniques],
+            names[first_row].tolist(),
+            name_uniques[pairs % max(1, len(name_uniques))].tolist(),
+            alias_actors=(pairs // max(1, len(name_uniques))).astype(np.int32),
+            movie_ids=np.asarray(movies, dtype=np.int64),
+            actor_offsets=actor_offsets,
+            actor_movies=entry_movies,
+            actor_rows=known[first],
+            movie_offsets=movie_offsets,
+            movie_actors=movie_actors,
+            adj_offsets=adj_offsets,
+            adj_actors=adj_actors,
+            adj_weights=adj_weights,
+            components=_components(adj_offsets, adj_actors),
+        )
+
+    def actor_code(self, actor: str) -> int:
+        """
+        Code of an actor given by Freebase ID or by name. A name shared by
+        several actors resolves to the one with the most movies.
+        """
+        code = self._codes.get(actor)
+        if code is not None:
+            return code
+        if self._codes_by_name is None:
+            by_name: Dict[str, List[int]] = {}
+            for name, a in zip(self.aliases, self.alias_actors.tolist()):
+                by_name.setdefault(name, []).append(a)
+            self._codes_by_name = by_name
+        codes = self._codes_by_name.get(actor)
+        if not codes:
+            raise Exception(f"Unknown actor: {actor}")
+        films = [self.actor_offsets[a + 1] - self.actor_offsets[a] for a in codes]
+        return codes[int(np.argmax(films))]
+
+    def movies(self, actor: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(movie codes, actors_df rows) of an actor's filmography."""
+        start, end = self.actor_offsets[actor], self.actor_offsets[actor + 1]
+        return self.actor_movies[start:end], self.actor_rows[start:end]
+
+    def costars(self, actor: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(co-star codes, shared movie counts) of an actor."""
+        start, end = self.adj_offsets[actor], self.adj_offsets[actor + 1]
+        return self.adj_actors[start:end], self.adj_weights[start:end]
+
+    def top_costars(self, actor: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The k co-stars sharing the most movies with actor (ties by code)."""
+        costars, weights = self.costars(actor)
+        order = np.lexsort((costars, -weights))[:k]
+        return costars[order], weights[order]
+
+    def shared_movie(self, a: int, b: int) -> int:
+        """The first movie code two co-stars share."""
+        return int(np.intersect1d(self.movies(a)[0], self.movies(b)[0])[0])
+
+    def _expand_level(self, frontier: np.ndarray, depth: np.ndarray,
+                      parent: np.ndarray) -> np.ndarray:
+        """Visits the unvisited neighbours of frontier; returns the new frontier."""
+        owners, positions = expand_rows(self.adj_offsets, frontier)
+        neighbours = self.adj_actors[positions]
+        new = depth[neighbours] < 0
+        reached, first = np.unique(neighbours[new], return_index=True)
+        parent[reached] = frontier[owners[new][first]]
+        depth[reached] = depth[frontier[0]] + 1
+        return reached
+
+    def shortest_path(self, source: int, target: int,
+                      max_depth: Optional[int] = None) -> List[int]:
+        """
+        Actor codes of a shortest co-star path from source to target (both
+        included), or [] if none exists within max_depth steps.
+        """
+        if source == target:
+            return [source]
+        if self.components[source] != self.components[target]:
+            return []
+        depths = [np.full(self.n_actors, -1, dtype=np.int32) for _ in range(2)]
+        parents = [np.full(self.n_actors, -1, dtype=np.int32) for _ in range(2)]
+        frontiers = [np.array([source], dtype=np.int32), np.array([target], dtype=np.int32)]
+        depths[0][source] = depths[1][target] = 0
+        steps = 0
+        while len(frontiers[0]) and len(frontiers[1]):
+            if max_depth is not None and steps >= max_depth:
+                return []
+            # Expand the side whose next level is cheaper.
+            costs = [int((self.adj_offsets[f + 1] - self.adj_offsets[f]).sum()) for f in frontiers]
+            side = 0 if costs[0] <= costs[1] else 1
+            other = 1 - side
+            frontiers[side] = self._expand_level(frontiers[side], depths[side], parents[side])
+            steps += 1
+            met = frontiers[side][depths[other][frontiers[side]] >= 0]
+            if len(met):
+                middle = int(met[np.argmin(depths[other][met])])
+                halves = []
+                for s in (0, 1):
+                    path, node = [], middle
+                    while node >= 0:
+                        path.append(node)
+                        node = int(parents[s][node])
+                    halves.append(path)
+                return halves[0][::-1] + halves[1][1:]
+        return []
+
+    def component_sizes(self) -> np.ndarray:
+        """Number of actors of every component."""
+        sizes = np.bincount(self.components, minlength=self.n_actors)
+        return sizes[sizes > 0]
+
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, name).nbytes for name in ARRAYS))
+
+
+def load_graph(graph_dir: str, sources: dict, n_rows: int) -> Optional[CostarGraph]:
+    """Opens a saved graph, memory-mapped, if it was built from the same sources."""
+    saved = load_arrays(graph_dir, {"schema_version": COSTAR_SCHEMA_VERSION, "sources": sources,
+                                    "n_rows": n_rows})
+    if saved is None:
+        return None
+    arrays, texts, _ = saved
+    actor_ids = texts["actor_ids"].split("\n") if texts["actor_ids"] else []
+    actor_names = texts["actor_names"].split("\n") if actor_ids else []
+    aliases = texts["aliases"].split("\n") if len(arrays["alias_actors"]) else []
+    return CostarGraph(actor_ids, actor_names, aliases, **arrays)
+
+
+def save_graph(graph: CostarGraph, graph_dir: str, sources: dict, n_rows: int) -> None:
+    # Names are stored one per line.
+    def lines(names: List[str]) -> str:
+        return "\n".join(name.replace("\n", " ") for name in names)
+
+    save_arrays(graph_dir, {name: getattr(graph, name) for name in ARRAYS},
+                {"schema_version": COSTAR_SCHEMA_VERSION, "sources": sources, "n_rows": n_rows,
+                 "n_actors": graph.n_actors, "n_movies": len(graph.movie_ids)},
+                texts={"actor_ids": "\n".join(graph.actor_ids), "actor_names": lines(graph.actor_names),
+                       "aliases": lines(graph.aliases)})
@@ -0,0 +1,63 @@
+"""
+dates.py
+
+Vectorized parsing of the partial dates used throughout the corpus.
+
+Date columns mix "YYYY", "YYYY-MM" and "YYYY-MM-DD" strings. pd.to_datetime
+infers one format from the first value and coerces everything else to NaT
+(or falls back to slow per-element parsing), so instead the strings are laid
+out as a fixed-width code point matrix and every position is checked at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Values of the precision columns.
+PRECISION_NONE = 0
+PRECISION_YEAR = 1
+PRECISION_MONTH = 2
+PRECISION_DAY = 3
+
+_WIDTH = 11  # one more than "YYYY-MM-DD", so longer strings are detectable
+
+
+def split_partial_dates(values: pd.Series) -> pd.DataFrame:
+    """
+    Splits a column of partial dates into integer columns aligned with it:
+
+    - year (int16) and month (int8), 0 where unknown,
+    - precision (int8): PRECISION_NONE/YEAR/MONTH/DAY.
+
+    Missing values, malformed strings and impossible months or days
+    (e.g. "2010-13-01") have PRECISION_NONE and year = month = 0.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        # A column holding only bare years may have been read as numbers.
+        values = values.astype("Int64").astype("string")
+    text = values.astype(object).fillna("").to_numpy(dtype=f"<U{_WIDTH}")
+    chars = text.view(np.uint32).reshape(len(text), _WIDTH).astype(np.int32)
+    digits = chars - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+    dash = ord("-")
+
+    year_ok = is_digit[:, 0:4].all(axis=1)
+    month_ok = year_ok & (chars[:, 4] == dash) & is_digit[:, 5:7].all(axis=1)
+    day_ok = month_ok & (chars[:, 7] == dash) & is_digit[:, 8:10].all(axis=1) & (chars[:, 10] == 0)
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    month_ok &= (month >= 1) & (month <= 12)
+    day_ok &= month_ok & (day >= 1) & (day <= 31)
+
+    precision = np.full(len(text), PRECISION_NONE, dtype=np.int8)
+    precision[year_ok & (chars[:, 4] == 0)] = PRECISION_YEAR
+    precision[month_ok & (chars[:, 7] == 0)] = PRECISION_MONTH
+    precision[day_ok] = PRECISION_DAY
+
+    known = precision > PRECISION_NONE
+    return pd.DataFrame({
+        "year": np.where(known, year, 0).astype(np.int16),
+        "month": np.where(precision >= PRECISION_MONTH, month, 0).astype(np.int8),
+        "precision": precision,
+    }, index=values.index)
@@ -0,0 +1,221 @@
+"""
+download.py
+
+Resumable, integrity-checked download of the corpus archive.
+
+Data is never written to the final path directly. When the server supports
+byte ranges the file is split into parts that are fetched in parallel over one
+pooled keep-alive session; every part lives in its own "<dest>.partN" file, so
+an interrupted download resumes each part from where it stopped with an HTTP
+Range request. "<dest>.parts.json" records the URL, size and byte ranges the
+parts were started with; part files left by a download of anything else (or
+without that record) are discarded instead of resumed. The parts are then
+joined while being hashed, checked against the expected size and (optional)
+SHA-256, and atomically renamed into place.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 1 << 20
+
+# progress(bytes_done, total_bytes or None, bytes_per_second)
+ProgressCallback = Callable[[int, Optional[int], float], None]
+
+
+def print_progress(done: int, total: Optional[int], rate: float) -> None:
+    """Default progress reporter."""
+    if total:
+        print(f"Downloaded {done / 1e6:.1f}/{total / 1e6:.1f} MB "
+              f"({100 * done / total:.0f}%) at {rate / 1e6:.2f} MB/s")
+    else:
+        print(f"Downloaded {done / 1e6:.1f} MB at {rate / 1e6:.2f} MB/s")
+
+
+class _Progress:
+    """Thread-safe byte counter that reports at most once per interval."""
+
+    def __init__(self, total: Optional[int], callback: Optional[ProgressCallback],
+                 already_done: int = 0, interval: float = 1.0):
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+        self.done = already_done
+        self.fetched = 0
+        self.start = time.perf_counter()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.done += n
+            self.fetched += n
+            now = time.perf_counter()
+            if self.callback is None or now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self.callback(self.done, self.total, self.rate())
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        return self.fetched / elapsed if elapsed > 0 else 0.0
+
+    def finish(self) -> None:
+        if self.callback is not None:
+            self.callback(self.done, self.total, self.rate())
+
+
+def _prepare_parts(dest: str, state: dict) -> None:
+    """
+    Removes the part files of dest unless <dest>.parts.json shows they were
+    started for the same state, then records state for the next attempt.
+    """
+    state_path = f"{dest}.parts.json"
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = None
+    if previous != state:
+        for path in glob.glob(glob.escape(dest) + ".part*"):
+            if re.search(r"\.part\d+$", path):
+                os.remove(path)
+    with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(state_path + ".tmp", state_path)
+
+
+def _make_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _fetch_range(session: requests.Session, url: str, part_path: str, start: int, end: int,
+                 progress: _Progress, timeout: float) -> None:
+    """Fetches bytes [start, end] into part_path, resuming after what it already holds."""
+    have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if start + have > end:
+        return
+    headers = {"Range": f"bytes={start + have}-{end}"}
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise Exception(f"Server ignored range request for {url}")
+        with open(part_path, "ab") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                progress.add(len(chunk))
+
+
+def _fetch_whole(session: requests.Session, url: str, part_path: str, ranged: bool,
+                 progress: _Progress, timeout: float) -> None:
+    """Fetches the whole file into part_path, resuming if the server allows it."""
+    have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={have}-"} if ranged and have else {}
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        mode = "ab" if response.status_code == 206 else "wb"
+        if mode == "wb":
+            progress.done -= have
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                progress.add(len(chunk))
+
+
+def download_file(
+    url: str,
+    dest: str,
+    sha256: Optional[str] = None,
+    parts: int = 4,
+    timeout: float = 30.0,
+    progress: Optional[ProgressCallback] = print_progress,
+    session: Optional[requests.Session] = None,
+) -> dict:
+    """
+    Downloads url to dest and returns {"bytes", "seconds", "throughput"}
+    (throughput in bytes per second, counting only bytes fetched this run).
+
+    Raises an Exception, leaving dest untouched, if the joined file does not
+    have the advertised size or does not match sha256. Part files of a failed
+    integrity check are removed; part files of an interrupted transfer are
+    kept so the next call for the same url and size resumes them.
+    """
+    parts = max(1, parts)
+    own_session = session is None
+    if own_session:
+        session = _make_session(parts)
+    start_time = time.perf_counter()
+    try:
+        head = session.head(url, allow_redirects=True, timeout=timeout)
+        head.raise_for_status()
+        total = int(head.headers["Content-Length"]) if "Content-Length" in head.headers else None
+        ranged = head.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+        if ranged and total:
+            n = min(parts, max(1, total // CHUNK_SIZE))
+            bounds = [(i * total // n, (i + 1) * total // n - 1) for i in range(n)]
+        else:
+            bounds = [(0, None)]
+        part_paths = [f"{dest}.part{i}" for i in range(len(bounds))]
+        _prepare_parts(dest, {"url": url, "total": total, "parts": [list(b) for b in bounds]})
+        already = sum(os.path.getsize(p) for p in part_paths if os.path.exists(p))
+        tracker = _Progress(total, progress, already_done=already)
+
+        if bounds[0][1] is None:
+            _fetch_whole(session, url, part_paths[0], ranged, tracker, timeout)
+        else:
+            with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+                jobs = [
+                    pool.submit(_fetch_range, session, url, path, start, end, tracker, timeout)
+                    for path, (start, end) in zip(part_paths, bounds)
+                ]
+                for job in jobs:
+                    job.result()
+        tracker.finish()
+    finally:
+        if own_session:
+            session.close()
+
+    # Join the parts while hashing them, then verify before the atomic rename.
+    joined_path = f"{dest}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    with open(joined_path, "wb") as out:
+        for path in part_paths:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+
+    problem = None
+    if total is not None and size != total:
+        problem = f"expected {total} bytes, got {size}"
+    elif sha256 is not None and digest.hexdigest() != sha256.lower():
+        problem = f"SHA-256 mismatch (got {digest.hexdigest()})"
+    state_path = f"{dest}.parts.json"
+    if problem is not None:
+        for path in part_paths + [joined_path, state_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        raise Exception(f"Downloaded file failed integrity check: {problem}")
+
+    os.replace(joined_path, dest)
+    for path in part_paths + [state_path]:
+        os.remove(path)
+    seconds = time.perf_counter() - start_time
+    return {"bytes": size, "seconds": seconds, "throughput": tracker.rate()}
@@ -0,0 +1,100 @@
+"""
+facets.py
+
+Integer-coded vocabularies for the Freebase tuple columns of movie.metadata.tsv
+("genres", "languages", "countries"). Each column holds a JSON object such as
+{"/m/07s9rl0": "Drama", "/m/01z4y": "Comedy"}; it is parsed once at load into a
+Facet, and every query works on the resulting integer arrays instead of
+re-parsing the JSON strings.
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FACET_COLUMNS = ("genres", "languages", "countries")
+
+
+class Facet:
+    """
+    Movie x value membership for one tuple column, in CSR form.
+
+    - values[code] is the name of value `code` (codes assigned in first-seen order).
+    - rows/codes are the exploded (movie row, value code) pairs, int32,
+      grouped by movie row and keeping the order of the source JSON.
+    - indptr[i]:indptr[i + 1] is the slice of rows/codes for movie row i.
+
+    Movie rows are positions in movies_df, not movie IDs.
+    """
+
+    def __init__(self, values: List[str], rows: np.ndarray, codes: np.ndarray, n_rows: int):
+        self.values = np.asarray(values, dtype=object)
+        self.code_of = {value: code for code, value in enumerate(values)}
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.n_rows = n_rows
+        self.indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.rows, minlength=n_rows), out=self.indptr[1:])
+
+    @classmethod
+    def from_series(cls, series: Optional[pd.Series]) -> "Facet":
+        """Parses a column of Freebase JSON objects. Missing or invalid cells have no values."""
+        if series is None:
+            return cls([], [], [], 0)
+        values: List[str] = []
+        code_of = {}
+        rows = []
+        codes = []
+        for row, cell in enumerate(series.tolist()):
+            if not isinstance(cell, str) or cell.strip() in ("", "{}"):
+                continue
+            try:
+                names = json.loads(cell).values()
+            except Exception:
+                continue
+            for name in names:
+                code = code_of.get(name)
+                if code is None:
+                    code = code_of[name] = len(values)
+                    values.append(name)
+                rows.append(row)
+                codes.append(code)
+        return cls(values, rows, codes, len(series))
+
+    def to_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Returns (vocabulary, membership) frames for the on-disk cache."""
+        vocab = pd.DataFrame({"value": self.values.astype(str)})
+        members = pd.DataFrame({"row": self.rows, "code": self.codes})
+        return vocab, members
+
+    @classmethod
+    def from_frames(cls, vocab: pd.DataFrame, members: pd.DataFrame, n_rows: int) -> "Facet":
+        return cls(vocab["value"].tolist(), members["row"].to_numpy(),
+                   members["code"].to_numpy(), n_rows)
+
+    def row_values(self, row: int) -> List[str]:
+        """Names of the values of one movie row, in source order."""
+        return self.values[self.codes[self.indptr[row]:self.indptr[row + 1]]].tolist()
+
+    def value_counts(self) -> pd.Series:
+        """Number of movies per value, indexed by name, most common first."""
+        counts = np.bincount(self.codes, minlength=len(self.values))
+        order = np.argsort(-counts, kind="stable")
+        return pd.Series(counts[order], index=self.values[order])
+
+    def empty_rows(self) -> np.ndarray:
+        """Boolean mask of movie rows with no value at all."""
+        return np.diff(self.indptr) == 0
+
+    def contains(self, value: str) -> np.ndarray:
+        """Boolean mask of movie rows that have the given value."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        code = self.code_of.get(value)
+        if code is not None:
+            mask[self.rows[self.codes == code]] = True
+        return mask
+
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.codes.nbytes + self.indptr.nbytes
@@ -0,0 +1,228 @@
+"""
+filters.py
+
+Bitmap-indexed movie filters.
+
+Filters are small expression trees built from Genre, Language, Country and
+Years leaves combined with & (and), | (or) and ~ (not), for example
+
+    (Genre("Drama") | Genre("Comedy")) & Country("France") & Years(1990, 1999)
+
+or from the equivalent JSON-style dict (see from_dict). They are evaluated
+against a FilterIndex, which holds one packed bitmap (one bit per movie row)
+per facet value and per release year, so every filter is a handful of
+vectorized AND/OR/NOT operations over ~10 KB arrays.
+"""
+
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.facets import Facet
+
+
+class Filter:
+    """Base class of filter expressions."""
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return And(self, other)
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return Or(self, other)
+
+    def __invert__(self) -> "Filter":
+        return Not(self)
+
+    def evaluate(self, index: "FilterIndex") -> np.ndarray:
+        """Returns the packed bitmap of matching movie rows."""
+        raise NotImplementedError
+
+
+class FacetValue(Filter):
+    """Movies whose facet column contains the given value."""
+
+    column = ""
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def evaluate(self, index: "FilterIndex") -> np.ndarray:
+        return index.value_bitmap(self.column, self.value)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.value!r})"
+
+
+class Genre(FacetValue):
+    column = "genres"
+
+
+class Language(FacetValue):
+    column = "languages"
+
+
+class Country(FacetValue):
+    column = "countries"
+
+
+class Years(Filter):
+    """Movies released between start and end (inclusive); either bound may be None."""
+
+    def __init__(self, start: Optional[int] = None, end: Optional[int] = None):
+        self.start = start
+        self.end = end
+
+    def evaluate(self, index: "FilterIndex") -> np.ndarray:
+        return index.year_bitmap(self.start, self.end)
+
+    def __repr__(self) -> str:
+        return f"Years({self.start!r}, {self.end!r})"
+
+
+class And(Filter):
+    def __init__(self, *parts: Filter):
+        self.parts = parts
+
+    def evaluate(self, index: "FilterIndex") -> np.ndarray:
+        result = index.all_bitmap()
+        for part in self.parts:
+            result = result & part.evaluate(index)
+        return result
+
+    def __repr__(self) -> str:
+        return "(" + " & ".join(map(repr, self.parts)) + ")"
+
+
+class Or(Filter):
+    def __init__(self, *parts: Filter):
+        self.parts = parts
+
+    def evaluate(self, index: "FilterIndex") -> np.ndarray:
+        result = np.zeros_like(index.all_bitmap())
+        for part in self.parts:
+            result = result | part.evaluate(index)
+        return result
+
+    def __repr__(self) -> str:
+        return "(" + " | ".join(map(repr, self.parts)) + ")"
+
+
+class Not(Filter):
+    def __init__(self, part: Filter):
+        self.part = part
+
+    def evaluate(self, index: "FilterIndex") -> np.ndarray:
+        return index.all_bitmap() & ~self.part.evaluate(index)
+
+    def __repr__(self) -> str:
+        return f"~{self.part!r}"
+
+
+_LEAVES = {"genre": Genre, "language": Language, "country": Country}
+
+
+def from_dict(spec: Union[Filter, dict, None]) -> Optional[Filter]:
+    """
+    Builds a Filter from its JSON-style form:
+
+        {"genre": "Drama"}, {"language": ...}, {"country": ...},
+        {"years": [1990, 1999]}  (either bound may be null),
+        {"and": [...]}, {"or": [...]}, {"not": {...}}
+
+    Filter instances and None are returned unchanged.
+    """
+    if spec is None or isinstance(spec, Filter):
+        return spec
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise Exception(f"Invalid filter: {spec!r}")
+    key, arg = next(iter(spec.items()))
+    if key in _LEAVES:
+        return _LEAVES[key](arg)
+    if key == "years":
+        start, end = arg
+        return Years(start, end)
+    if key == "and":
+        return And(*(from_dict(part) for part in arg))
+    if key == "or":
+        return Or(*(from_dict(part) for part in arg))
+    if key == "not":
+        return Not(from_dict(arg))
+    raise Exception(f"Unknown filter key: {key!r}")
+
+
+class FilterIndex:
+    """
+    Packed per-value bitmaps over the rows of movies_df.
+
+    Facet bitmaps are stored as one uint8 matrix per facet column
+    (n_values x ceil(n_rows / 8)). Release years are stored as cumulative
+    bitmaps, cum[i] = movies released in or before years[i], so any year range
+    is one AND-NOT of two rows. Rows without a known year match no Years filter.
+    """
+
+    def __init__(self, facets: Dict[str, Facet], release_years: np.ndarray):
+        self.n_rows = len(release_years)
+        self.n_bytes = (self.n_rows + 7) // 8
+        self.release_years = release_years
+        self._all = np.packbits(np.ones(self.n_rows, dtype=bool))
+
+        self.facets = facets
+        self.bitmaps = {}
+        for column, facet in facets.items():
+            bitmaps = np.zeros((len(facet.values), self.n_bytes), dtype=np.uint8)
+            bits = (np.uint8(128) >> (facet.rows & 7).astype(np.uint8))
+            np.bitwise_or.at(bitmaps, (facet.codes, facet.rows >> 3), bits)
+            self.bitmaps[column] = bitmaps
+
+        known = release_years >= 0
+        self.years = np.unique(release_years[known])
+        per_year = np.zeros((len(self.years), self.n_bytes), dtype=np.uint8)
+        rows = np.flatnonzero(known)
+        bits = (np.uint8(128) >> (rows & 7).astype(np.uint8))
+        np.bitwise_or.at(per_year, (np.searchsorted(self.years, release_years[known]), rows >> 3),
+                         bits)
+        self.cumulative_years = np.bitwise_or.accumulate(per_year, axis=0)
+
+    def nbytes(self) -> int:
+        return (sum(bitmaps.nbytes for bitmaps in self.bitmaps.values())
+                + self.cumulative_years.nbytes + self.release_years.nbytes)
+
+    def all_bitmap(self) -> np.ndarray:
+        return self._all
+
+    def value_bitmap(self, column: str, value: str) -> np.ndarray:
+        code = self.facets[column].code_of.get(value)
+        if code is None:
+            return np.zeros(self.n_bytes, dtype=np.uint8)
+        return self.bitmaps[column][code]
+
+    def year_bitmap(self, start: Optional[int], end: Optional[int]) -> np.ndarray:
+        # Index of the last year <= bound in the sorted distinct years.
+        hi = len(self.years) - 1 if end is None else np.searchsorted(self.years, end, "right") - 1
+        if hi < 0:
+            return np.zeros(self.n_bytes, dtype=np.uint8)
+        result = self.cumulative_years[hi]
+        if start is not None:
+            lo = np.searchsorted(self.years, start, "left") - 1
+            if lo >= 0:
+                result = result & ~self.cumulative_years[lo]
+        return result
+
+    def bitmap(self, where: Optional[Filter]) -> np.ndarray:
+        return self._all if where is None else where.evaluate(self)
+
+    def mask(self, where: Optional[Filter]) -> np.ndarray:
+        """Boolean mask over movie rows."""
+        return np.unpackbits(self.bitmap(where), count=self.n_rows).astype(bool)
+
+    def count(self, where: Optional[Filter]) -> int:
+        return int(np.bitwise_count(self.bitmap(where)).sum())
+
+    def count_by_year(self, where: Optional[Filter]) -> pd.DataFrame:
+        """Matching movies per release year, as a ["Year", "Count"] frame."""
+        years = self.release_years[self.mask(where)]
+        years = years[years >= 0]
+        counts = np.bincount(np.searchsorted(self.years, years), minlength=len(self.years))
+        present = counts > 0
+        return pd.DataFrame({"Year": self.years[present], "Count": counts[present]})
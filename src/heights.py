@@ -0,0 +1,81 @@
+"""
+heights.py
+
+Sorted per-gender height arrays over actors_df, so height-range queries are
+two binary searches and histograms come from bin-edge searches instead of a
+pass over the filtered rows.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class HeightIndex:
+    """
+    For every gender value, plus "All", keeps the non-missing heights in
+    ascending order together with the actors_df row position of each one.
+    """
+
+    def __init__(self, actors_df: pd.DataFrame):
+        self.views: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if actors_df.empty:
+            return
+        height = actors_df["height"].to_numpy()
+        known = np.flatnonzero(~np.isnan(height))
+        order = known[np.argsort(height[known], kind="stable")]
+        self.views["All"] = (height[order], order)
+
+        genders = actors_df["gender"].to_numpy(dtype=object)[order]
+        for gender in pd.unique(genders):
+            rows = order[genders == gender]
+            self.views[str(gender)] = (height[rows], rows)
+
+    def _slice(self, gender: str, min_height: float, max_height: float) -> Tuple[np.ndarray, np.ndarray]:
+        heights, rows = self.views.get(gender, (np.empty(0), np.empty(0, dtype=np.int64)))
+        # Compare in the heights' own dtype, so 1.727 still matches a float32 1.727.
+        lo = np.searchsorted(heights, heights.dtype.type(min_height), side="left")
+        hi = np.searchsorted(heights, heights.dtype.type(max_height), side="right")
+        return heights[lo:hi], rows[lo:hi]
+
+    def nbytes(self) -> int:
+        return sum(heights.nbytes + rows.nbytes for heights, rows in self.views.values())
+
+    def rows(self, gender: str, min_height: float, max_height: float) -> np.ndarray:
+        """Row positions with min_height <= height <= max_height, in frame order."""
+        return np.sort(self._slice(gender, min_height, max_height)[1])
+
+    def count(self, gender: str, min_height: float, max_height: float) -> int:
+        return len(self._slice(gender, min_height, max_height)[0])
+
+    def histogram(self, gender: str, min_height: float, max_height: float,
+                  bins: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (counts, edges) exactly as np.histogram(selected_heights, bins)
+        would: equal-width bins spanning the selected minimum and maximum,
+        half-open except for the last one.
+        """
+        heights, _ = self._slice(gender, min_height, max_height)
+        return sorted_histogram(heights, None, min_height, max_height, bins)
+
+
+def sorted_histogram(heights: np.ndarray, counts: Optional[np.ndarray], min_height: float,
+                     max_height: float, bins: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    np.histogram of already selected, ascending heights, each repeated
+    counts[i] times (once if counts is None), via searches of the bin edges.
+    """
+    if len(heights) == 0:
+        return np.zeros(bins, dtype=np.int64), np.linspace(min_height, max_height, bins + 1)
+    first, last = heights[0], heights[-1]
+    if first == last:
+        # np.histogram widens a degenerate range by 0.5 on each side.
+        first, last = first - 0.5, last + 0.5
+    edges = np.linspace(first, last, bins + 1, dtype=np.result_type(first, last, heights))
+    starts = np.searchsorted(heights, edges, side="left")
+    starts[-1] = len(heights)
+    if counts is None:
+        return np.diff(starts), edges
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    return np.diff(cumulative[starts]), edges
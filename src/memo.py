@@ -0,0 +1,217 @@
+"""
+memo.py
+
+Memoized query results for MovieAnalyzer.
+
+The dashboard sends the same handful of queries (movie_type(N=10),
+releases(genre="Drama"), ...) over and over, from every session sharing the
+analyzer. QueryCache keeps their results in an LRU bounded by entry count and
+by bytes, keyed by method name and normalized arguments.
+
+A cached frame is shared by every caller, so it is frozen when stored: its
+NumPy-backed columns are made read-only, and every hit hands out a shallow
+copy. Writing into a result raises "assignment destination is read-only",
+while adding, replacing or dropping columns only changes the caller's copy.
+Python objects inside cells (e.g. genre lists) are not protected.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.filters import Filter
+
+# Object columns are sized from this many evenly spaced values.
+SIZE_SAMPLE = 1000
+
+
+def _normalize(value: Any) -> Hashable:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    if isinstance(value, Filter):
+        return ("filter", repr(value))
+    raise TypeError(f"Cannot use {type(value).__name__} in a cache key.")
+
+
+def make_key(method: str, arguments: dict) -> Optional[tuple]:
+    """A hashable key for a call, or None if an argument cannot be normalized."""
+    try:
+        return (method,) + tuple((name, _normalize(value)) for name, value in arguments.items())
+    except TypeError:
+        return None
+
+
+def cacheable(value: Any) -> bool:
+    """Frames, arrays and plain values (or tuples of them); not figures."""
+    if isinstance(value, tuple):
+        return all(cacheable(v) for v in value)
+    return value is None or isinstance(value, (pd.DataFrame, pd.Series, np.ndarray,
+                                                bool, int, float, str, bytes, np.generic))
+
+
+def _objects_nbytes(values: np.ndarray) -> int:
+    """Pointers plus the Python objects, sized from a sample of at most SIZE_SAMPLE."""
+    n = len(values)
+    if n > SIZE_SAMPLE:
+        sample = values[np.linspace(0, n - 1, SIZE_SAMPLE).astype(np.intp)]
+    else:
+        sample = values
+    if not len(sample):
+        return int(values.nbytes)
+    deep = sum(sys.getsizeof(v) for v in sample)
+    return int(values.nbytes + deep * n / len(sample))
+
+
+def _array_nbytes(array) -> int:
+    data = getattr(array, "_ndarray", array)  # NumPy-backed extension arrays
+    if isinstance(data, np.ndarray) and data.dtype == object:
+        return _objects_nbytes(data)
+    return int(array.nbytes)
+
+
+def _index_nbytes(index: pd.Index) -> int:
+    # A RangeIndex has no buffer; its .array would build one.
+    if index.dtype == object:
+        return _objects_nbytes(index.to_numpy())
+    return int(index.memory_usage())
+
+
+def result_nbytes(value: Any) -> int:
+    """
+    Approximate bytes held by a result: the buffer sizes of NumPy, Arrow and
+    categorical data, and for Python objects an estimate from a sample (a
+    deep count over a large object column costs about as much as the query).
+    """
+    if isinstance(value, tuple):
+        return sum(result_nbytes(v) for v in value)
+    if isinstance(value, pd.DataFrame):
+        return (_index_nbytes(value.index)
+                + sum(_array_nbytes(column.array) for _, column in value.items()))
+    if isinstance(value, pd.Series):
+        return _index_nbytes(value.index) + _array_nbytes(value.array)
+    if isinstance(value, np.ndarray):
+        return _array_nbytes(value)
+    if isinstance(value, bytes):
+        return len(value)
+    return 64
+
+
+def _frozen_arrays(value):
+    if isinstance(value, pd.DataFrame):
+        return value._mgr.arrays
+    return [value.array]
+
+
+def freeze(value: Any) -> Any:
+    """Makes the NumPy data of a result read-only, in place, and returns it."""
+    if isinstance(value, tuple):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        for array in _frozen_arrays(value):
+            # Categoricals and datetimes wrap an ndarray too.
+            data = array if isinstance(array, np.ndarray) else getattr(array, "_ndarray", None)
+            if data is not None:
+                data.flags.writeable = False
+    return value
+
+
+def share(value: Any) -> Any:
+    """A caller's view of a frozen result."""
+    if isinstance(value, tuple):
+        return tuple(share(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return value.view()
+    if isinstance(value, pd.DataFrame):
+        out = value.copy(deep=False)
+        for i, dtype in enumerate(value.dtypes):
+            if isinstance(dtype, np.dtype):
+                continue
+            array = value.iloc[:, i].array
+            if getattr(array, "_ndarray", None) is None:
+                # e.g. Arrow-backed strings: setting values replaces the
+                # array's data in place, so each caller gets its own wrapper
+                # (copying it is O(1), Arrow data is immutable).
+                out.isetitem(i, array.copy())
+        return out
+    if isinstance(value, pd.Series):
+        return value.copy(deep=getattr(value.array, "_ndarray", None) is None)
+    return value
+
+
+class QueryCache:
+    """
+    Thread-safe LRU of query results, bounded by max_entries and max_bytes
+    (as measured by result_nbytes). max_bytes=0 disables caching.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, max_entries: int = 1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Tuple[bool, Any]:
+        """Returns (found, result); a found result is a read-only view."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return True, share(entry[0])
+
+    def put(self, key: tuple, value: Any) -> Any:
+        """
+        Stores a freshly computed result if it is cacheable and fits, and
+        returns what the caller should receive (a read-only view if stored).
+        """
+        if self.max_bytes <= 0 or not cacheable(value):
+            return value
+        size = result_nbytes(value)
+        if size > self.max_bytes:
+            return value
+        value = freeze(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return share(value)
+
+    def clear(self) -> None:
+        """Drops every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries), "bytes": self.bytes,
+                    "max_bytes": self.max_bytes, "max_entries": self.max_entries}
+
+    def nbytes(self) -> int:
+        return self.bytes
@@ -0,0 +1,205 @@
+"""
+metrics.py
+
+In-process timing and memory instrumentation.
+
+Every instrumented stage (download, extraction, parsing each file, index
+builds, query methods, figure building in the pages, LLM calls) records its
+wall time and the growth of the process's peak resident memory into the
+module-level `registry`. The registry keeps count, total, min and max per
+stage plus a ring buffer of recent samples for percentiles, and can be
+exported as JSON or in the Prometheus text format. Recording one sample costs
+a few microseconds (two clock reads, two getrusage calls and a lock), so it
+stays on in production; set MOVIE_ANALYZER_METRICS=0 to turn it off.
+
+With MOVIE_ANALYZER_METRICS_FILE set, a snapshot is written there at exit
+(JSON if the name ends in .json, the Prometheus format otherwise).
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+METRICS_ENV = "MOVIE_ANALYZER_METRICS"
+METRICS_FILE_ENV = "MOVIE_ANALYZER_METRICS_FILE"
+
+# Recent samples kept per stage for the percentiles.
+WINDOW = 1024
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+def peak_rss() -> int:
+    """High-water mark of the process's resident memory in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+class _Stage:
+    __slots__ = ("count", "errors", "total", "min", "max", "samples", "peak_rss", "max_rss_growth")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.samples = np.zeros(WINDOW)
+        self.peak_rss = 0
+        self.max_rss_growth = 0
+
+
+class Registry:
+    """Thread-safe per-stage statistics of recorded samples."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stages: Dict[str, _Stage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, rss: int = 0, rss_growth: int = 0,
+               error: bool = False) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = _Stage()
+            stage.samples[stage.count % WINDOW] = seconds
+            stage.count += 1
+            stage.errors += error
+            stage.total += seconds
+            stage.min = min(stage.min, seconds)
+            stage.max = max(stage.max, seconds)
+            stage.peak_rss = max(stage.peak_rss, rss)
+            stage.max_rss_growth = max(stage.max_rss_growth, rss_growth)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """{stage: statistics}, with seconds for the times and bytes for memory."""
+        with self._lock:
+            result = {}
+            for name, stage in sorted(self._stages.items()):
+                recent = stage.samples[:min(stage.count, WINDOW)]
+                entry = {
+                    "count": stage.count,
+                    "errors": stage.errors,
+                    "total_seconds": stage.total,
+                    "mean_seconds": stage.total / stage.count,
+                    "min_seconds": stage.min,
+                    "max_seconds": stage.max,
+                    "peak_rss_bytes": stage.peak_rss,
+                    "max_rss_growth_bytes": stage.max_rss_growth,
+                }
+                for q, value in zip(QUANTILES, np.quantile(recent, QUANTILES)):
+                    entry[f"p{round(q * 100)}_seconds"] = float(value)
+                result[name] = entry
+            return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "movie_analyzer") -> str:
+        """The snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_duration_seconds Wall time of instrumented stages.",
+                 f"# TYPE {prefix}_duration_seconds summary"]
+        for name, entry in snapshot.items():
+            for q in QUANTILES:
+                lines.append(f'{prefix}_duration_seconds{{stage="{name}",quantile="{q:g}"}} '
+                             f'{entry[f"p{round(q * 100)}_seconds"]:.9g}')
+            lines.append(f'{prefix}_duration_seconds_sum{{stage="{name}"}} {entry["total_seconds"]:.9g}')
+            lines.append(f'{prefix}_duration_seconds_count{{stage="{name}"}} {entry["count"]}')
+        lines += [f"# HELP {prefix}_errors_total Instrumented calls that raised.",
+                  f"# TYPE {prefix}_errors_total counter"]
+        lines += [f'{prefix}_errors_total{{stage="{name}"}} {entry["errors"]}'
+                  for name, entry in snapshot.items()]
+        lines += [f"# HELP {prefix}_rss_growth_bytes Largest growth of the peak RSS during a stage.",
+                  f"# TYPE {prefix}_rss_growth_bytes gauge"]
+        lines += [f'{prefix}_rss_growth_bytes{{stage="{name}"}} {entry["max_rss_growth_bytes"]}'
+                  for name, entry in snapshot.items()]
+        lines += [f"# HELP {prefix}_peak_rss_bytes Peak resident memory of the process.",
+                  f"# TYPE {prefix}_peak_rss_bytes gauge",
+                  f"{prefix}_peak_rss_bytes {peak_rss()}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Writes the snapshot to path, as JSON if it ends in .json, else as Prometheus text."""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+
+registry = Registry(enabled=os.environ.get(METRICS_ENV, "1") != "0")
+
+_local = threading.local()
+
+
+@contextmanager
+def timed(name: str, validation: Optional[str] = None) -> Iterator[None]:
+    """
+    Records the wall time and peak-RSS growth of the block as stage `name`.
+    With validation set, the time until body_started() is called inside the
+    block (i.e. the argument validation in front of a method body) is also
+    recorded as that stage.
+    """
+    if not registry.enabled:
+        yield
+        return
+    stack = _local.__dict__.setdefault("stack", [])
+    frame = [None]
+    stack.append(frame)
+    rss = peak_rss()
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        # Blocks in generators can close out of order; remove this one by identity.
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i] is frame:
+                del stack[i]
+                break
+        end_rss = peak_rss()
+        registry.record(name, seconds, end_rss, end_rss - rss, error)
+        if validation is not None and frame[0] is not None:
+            registry.record(validation, frame[0] - start)
+
+
+def body_started() -> None:
+    """Marks the end of argument validation for the innermost timed() block."""
+    stack = getattr(_local, "stack", None)
+    if stack and stack[-1][0] is None:
+        stack[-1][0] = time.perf_counter()
+
+
+def _write_at_exit() -> None:
+    path = os.environ.get(METRICS_FILE_ENV)
+    if path and registry.snapshot():
+        registry.write(path)
+
+
+atexit.register(_write_at_exit)
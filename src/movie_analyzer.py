@@ -2,172 +2,778 @@
 movie_analyzer.py
 """
 
+import copy
 import os
 import tarfile
-import json
-import requests
+import threading
+import functools
+import inspect
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from concurrent.futures import Future, ThreadPoolExecutor
 from pydantic import validate_call
-from typing import Optional
+from typing import List, Optional, Union
+
+from src.archive import iter_members
+from src.cache import CACHE_SCHEMA_VERSION, fingerprint, load_frames, save_frames
+from src.clusters import (NAME_COLUMNS, TROPE_COLUMNS, ClusterIndex, MapIdIndex, read_names,
+                          read_tropes)
+from src.compact import (FLOAT32_COLUMNS, UNUSED_COLUMNS, compact_frame, frame_memory,
+                         read_arrow_strings)
+from src.costars import CostarGraph, load_graph, save_graph
+from src.dates import PRECISION_MONTH, PRECISION_NONE, split_partial_dates
+from src.download import download_file
+from src.facets import FACET_COLUMNS, Facet
+from src.filters import Filter, FilterIndex, Genre, from_dict
+from src.heights import HeightIndex
+from src.memo import QueryCache, make_key
+from src.metrics import body_started, timed
+from src.outofcore import (AGGREGATE_COLUMNS, ActorAggregates, average_line_bytes, chunk_rows,
+                           new_spill_dir, spill_partitions)
+from src.sampling import MovieIndex
+from src.search import SearchIndex, load_index, save_index
+from src.similarity import SimilarityIndex, load_similarity, save_similarity
+from src.sharedstore import attach, current_version, publish, store_lock, store_name
+from src.shards import parse_workers as default_parse_workers, read_sharded
+
+# Environment variable overriding the default download_dir, e.g. to point the
+# app at a synthetic corpus (see src/synthetic.py).
+DATA_DIR_ENV = "MOVIE_ANALYZER_DATA_DIR"
+
+# Set to "1" to make shared_store the default, e.g. for every Streamlit or
+# server worker process on a host.
+SHARED_STORE_ENV = "MOVIE_ANALYZER_SHARED_STORE"
+
+# Raw corpus files, keyed by the dataset (and frame) each one is parsed into.
+DATASET_FILES = {
+    "movies": "movie.metadata.tsv",
+    "actors": "character.metadata.tsv",
+    "summaries": "plot_summaries.txt",
+}
+
+# Explicit dtypes for every column but the integer movie_id: inferred per
+# shard (or chunk), a shard holding e.g. only bare years and blanks would
+# parse release_date as float and differ from a single read_csv. height is
+# read as text and coerced in _prepare_actors.
+MOVIE_DTYPES = {
+    "freebase_id": str, "title": str, "release_date": str, "imdb_id": "float64",
+    "runtime": "float64", "languages": str, "countries": str, "genres": str,
+}
+ACTOR_DTYPES = {
+    "persona_id": str, "movie_date": str, "character_name": str, "actor_birthdate": str,
+    "gender": str, "height": str, "col8": str, "actor_name": str, "age": "float64",
+    "map_id": str, "col11": str, "actor_id": str,
+}
+
+# Character clusters keyed by kind, read on first use (see src/clusters.py).
+CLUSTER_FILES = {
+    "trope": "tvtropes.clusters.txt",
+    "name": "name.clusters.txt",
+}
+
+
+class _Deferred:
+    """
+    An attribute (a frame, or an index derived from one) that may still be
+    loading in a background thread. Reading it blocks until it is available.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name]
+        if isinstance(value, Future):
+            return value.result()
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+def _add_date_columns(df: pd.DataFrame, column: str, prefix: str) -> None:
+    """
+    Adds integer <prefix>_year, <prefix>_month and <prefix>_precision columns
+    derived from a partial-date column (see src/dates.py).
+    """
+    parts = split_partial_dates(df[column])
+    for part in ("year", "month", "precision"):
+        df[f"{prefix}_{part}"] = parts[part]
+
+
+# Names of the lazily built indexes, for memory_report().
+_LAZY_INDEXES: List[str] = []
+
+
+def _lazy_index(build):
+    """
+    Turns a method into a read-only property holding a derived index that is
+    built on first use, under the analyzer's lock, and then kept for the
+    lifetime of the analyzer (its frames never change after loading).
+    """
+    attr = "_" + build.__name__
+    _LAZY_INDEXES.append(build.__name__)
+
+    @functools.wraps(build)
+    def getter(self):
+        value = self.__dict__.get(attr)
+        if value is None:
+            with self._index_lock:
+                value = self.__dict__.get(attr)
+                if value is None:
+                    with timed(f"index.{build.__name__}"):
+                        value = self.__dict__[attr] = build(self)
+        return value
+
+    return property(getter)
+
+
+def _memoized(method):
+    """
+    Serves repeated calls of a query method from the analyzer's QueryCache,
+    keyed by the method name and its arguments with defaults applied. _query
+    applies it below validate_call, so the key is built from validated arguments.
+    Results that cannot be cached (e.g. ones holding a figure) are returned
+    as they are.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments["self"]
+        key = make_key(method.__name__, arguments)
+        if key is None:
+            return method(self, *args, **kwargs)
+        found, result = self.query_cache.get(key)
+        if found:
+            return result
+        return self.query_cache.put(key, method(self, *args, **kwargs))
+
+    return wrapper
+
+
+def _query(config: Optional[dict] = None, memoize: bool = True):
+    """
+    Decorator of the public query methods: validates their arguments with
+    pydantic's validate_call, serves repeated calls from the query cache
+    (unless memoize=False) and times every call into the metrics registry
+    as "query.<name>", with the time validate_call spends before the body
+    starts recorded separately as "validate_call.<name>" (see src/metrics.py).
+    """
+    def decorate(method):
+        name = method.__name__
+        body = _memoized(method) if memoize else method
+
+        @functools.wraps(body)
+        def entered(*args, **kwargs):
+            body_started()
+            return body(*args, **kwargs)
+
+        validated = validate_call(config=config)(entered) if config else validate_call(entered)
+
+        @functools.wraps(validated)
+        def wrapper(*args, **kwargs):
+            with timed(f"query.{name}", validation=f"validate_call.{name}"):
+                return validated(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
 
-# ADDED: Additional imports for random sampling
-import random
 
 class MovieAnalyzer:
     """
     A class to handle movie data analysis. Downloads the data into a
-    "downloads" folder at the project root.
+    "downloads" folder at the project root (or into download_dir if given,
+    or $MOVIE_ANALYZER_DATA_DIR if set).
+
+    Parsed frames are cached as Feather files in "<download_dir>/cache" and
+    reused on later starts while the source files are unchanged. Set
+    use_cache=False to always parse the raw files, or verify_cache_hash=True
+    to validate the cache against file contents instead of size and mtime.
+
+    With extract=False the archive is never unpacked: the needed members are
+    streamed straight out of the tarball into the parsers by a background
+    thread, and each frame becomes usable as soon as its member has been read.
+    datasets restricts loading to a subset of "movies", "actors" and
+    "summaries"; the others stay empty and their members are skipped.
+
+    Extracted files are parsed concurrently, each split on line boundaries
+    into shards that run on parse_workers threads (one per core by default,
+    see src/shards.py).
+
+    The archive is downloaded with resume support and checked against the
+    advertised size and, when data_sha256 is given, its SHA-256 before it is
+    moved into place, so an interrupted download is never mistaken for a
+    complete one.
+
+    With compact=True (the default) columns get compact dtypes after parsing
+    (see src/compact.py); skip_unused_columns=True also drops the columns no
+    query reads. memory_report() breaks down the resulting footprint.
+
+    With out_of_core=True the character table is never held in memory: it is
+    streamed in chunks sized from memory_budget (bytes) into mergeable
+    aggregates (see src/outofcore.py) that answer actor_count, ages and the
+    height histograms with the same results, and actor_distributions re-streams
+    the file to collect the matching rows. actors_df stays empty and the frame
+    cache is not used.
+
+    Query results are memoized in query_cache, an LRU bounded by
+    query_cache_bytes (see src/memo.py; 0 disables it). Cached frames are
+    read-only, and query_cache.stats() reports hits and misses.
+
+    The tvtropes and name clusters shipped with the corpus are joined to
+    actors_df through a hash index on its map_id column (the Freebase
+    character/actor map ID) on first use; see trope_characters and
+    movies_sharing_character.
+
+    costar_graph links actors (by Freebase actor ID) through the movies they
+    share, for filmography, top_costars, degrees_of_separation and
+    costar_components (see src/costars.py).
+
+    With shared_store=True (or $MOVIE_ANALYZER_SHARED_STORE=1) the frames
+    are memory-mapped read-only from the versioned store in
+    "<download_dir>/shared/<name>" (see src/sharedstore.py; one store per
+    compact, skip_unused_columns and datasets setting), so the worker
+    processes of a host hold one copy between them. The first process to find no usable
+    version loads the data as usual and publishes it, while the others wait
+    and then attach; shared_version is the version attached.
+    publish_shared() publishes a new version, and attach_latest() returns an
+    analyzer on the version that is live now, leaving this one untouched.
     """
 
+    movies_df = _Deferred()
+    actors_df = _Deferred()
+    summaries_df = _Deferred()
+    # Facet per Freebase tuple column of movies_df (see src/facets.py).
+    facets = _Deferred()
+
     @validate_call
-    def __init__(self) -> None:
-        # Determine the project root (assumes this file is in <project_root>/src/)
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.download_dir = os.path.join(base_dir, "downloads")
+    def __init__(
+        self,
+        download_dir: Optional[str] = None,
+        use_cache: bool = True,
+        verify_cache_hash: bool = False,
+        extract: bool = True,
+        datasets: Optional[List[str]] = None,
+        data_sha256: Optional[str] = None,
+        compact: bool = True,
+        skip_unused_columns: bool = False,
+        out_of_core: bool = False,
+        memory_budget: int = 256 * 2**20,
+        parse_workers: Optional[int] = None,
+        query_cache_bytes: int = 64 * 2**20,
+        shared_store: Optional[bool] = None,
+    ) -> None:
+        if download_dir is None:
+            download_dir = os.environ.get(DATA_DIR_ENV)
+        if download_dir is None:
+            # Determine the project root (assumes this file is in <project_root>/src/)
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            download_dir = os.path.join(base_dir, "downloads")
+        self.download_dir = download_dir
+        self.use_cache = use_cache
+        self.verify_cache_hash = verify_cache_hash
+        self.cache_dir = os.path.join(self.download_dir, "cache")
+        self.extract = extract
+        self.compact = compact
+        self.skip_unused_columns = skip_unused_columns
+        self.out_of_core = out_of_core
+        self.memory_budget = memory_budget
+        self.actor_aggregates: Optional[ActorAggregates] = None
+        self.parse_workers = parse_workers or default_parse_workers()
+        self._shard_pool: Optional[ThreadPoolExecutor] = None
+        self.query_cache = QueryCache(max_bytes=query_cache_bytes)
+        if shared_store is None:
+            shared_store = os.environ.get(SHARED_STORE_ENV) == "1"
+        if shared_store and out_of_core:
+            raise Exception("shared_store cannot be combined with out_of_core.")
+        self.shared_store = shared_store
+        self.shared_version: Optional[int] = None
+        if out_of_core:
+            # The frame cache would hold the full actors_df again.
+            self.use_cache = False
+        self.datasets = list(DATASET_FILES) if datasets is None else datasets
+        unknown = set(self.datasets) - set(DATASET_FILES)
+        if unknown:
+            raise Exception(f"Unknown datasets: {sorted(unknown)}")
+        # One store per way of building the frames, so processes with other
+        # options publish next to this one instead of replacing its version.
+        self.shared_dir = os.path.join(self.download_dir, "shared", store_name({
+            "schema_version": CACHE_SCHEMA_VERSION,
+            "variant": self._cache_variant(),
+            "datasets": sorted(self.datasets),
+        }))
+        self._loader: Optional[threading.Thread] = None
+        self._index_lock = threading.RLock()
         self.data_filename = "MovieSummaries.tar.gz"
         self.data_url = "https://www.cs.cmu.edu/~ark/personas/data/MovieSummaries.tar.gz"
         self.data_filepath = os.path.join(self.download_dir, self.data_filename)
+        self.data_sha256 = data_sha256
+        self.extracted_folder = os.path.join(self.download_dir, "MovieSummaries")
 
         # Ensure the downloads folder exists.
         os.makedirs(self.download_dir, exist_ok=True)
 
-        # Download the file if it doesn't exist.
-        if not os.path.exists(self.data_filepath):
-            self._download_data()
-
-        # Extract the file if not already extracted.
-        self.extracted_folder = os.path.join(self.download_dir, "MovieSummaries")
-        if not os.path.exists(self.extracted_folder):
-            if self.data_filepath.endswith(".tar.gz"):
-                with tarfile.open(self.data_filepath, "r:gz") as tar:
-                    tar.extractall(path=self.download_dir)
-            else:
+        # The archive is needed when streaming from it, or when any requested
+        # file has not been extracted yet (the folder itself ships with the
+        # cluster files, so its existence proves nothing).
+        needs_archive = not self.extract or not all(
+            os.path.exists(os.path.join(self.extracted_folder, DATASET_FILES[name]))
+            for name in self.datasets
+        )
+        if needs_archive:
+            # Download the file if it doesn't exist.
+            if not os.path.exists(self.data_filepath):
+                self._download_data()
+            if not self.data_filepath.endswith(".tar.gz"):
                 raise Exception("Unsupported archive format.")
+            if self.extract:
+                with timed("load.extract"), tarfile.open(self.data_filepath, "r:gz") as tar:
+                    tar.extractall(path=self.download_dir)
 
         # Load the datasets.
         self._load_data()
 
     def _download_data(self) -> None:
         print("Downloading data...")
-        response = requests.get(self.data_url, stream=True)
-        response.raise_for_status()
-        with open(self.data_filepath, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print("Download complete.")
+        with timed("load.download"):
+            stats = download_file(self.data_url, self.data_filepath, sha256=self.data_sha256)
+        print(f"Download complete ({stats['bytes'] / 1e6:.1f} MB "
+              f"at {stats['throughput'] / 1e6:.2f} MB/s).")
+
+    def _sources(self) -> dict:
+        """Returns the files the loaded frames are derived from, for the cache fingerprint."""
+        if self.extract:
+            return {
+                filename: os.path.join(self.extracted_folder, filename)
+                for filename in DATASET_FILES.values()
+            }
+        return {self.data_filename: self.data_filepath}
+
+    def _cache_variant(self) -> str:
+        """Load options that change the cached frames, so each gets its own cache."""
+        return f"compact={self.compact};skip_unused_columns={self.skip_unused_columns}"
 
     def _load_data(self) -> None:
-        # For movies, we use column names based on your sample:
-        # movie_id, freebase_id, title, release_date, imdb_id, runtime, languages, countries, genres
-        movie_metadata_path = os.path.join(self.extracted_folder, "movie.metadata.tsv")
-        # For actors, the sample data has 13 columns.
-        character_metadata_path = os.path.join(self.extracted_folder, "character.metadata.tsv")
-
-        # Load Movies
-        if os.path.exists(movie_metadata_path):
-            self.movies_df = pd.read_csv(
-                movie_metadata_path,
-                sep="\t",
-                header=None,
-                names=["movie_id", "freebase_id", "title", "release_date",
-                       "imdb_id", "runtime", "languages", "countries", "genres"],
-                encoding="utf-8",
-                na_values=["\\N"]
-            )
+        """
+        Loads the frames from the on-disk cache when it is still valid,
+        otherwise parses the raw files (or streams the archive) and refreshes the cache.
+        With shared_store, attaches to the shared store instead, loading and
+        publishing the data first if no version matches it.
+        Memoized query results of earlier data are dropped.
+        """
+        self.query_cache.clear()
+        sources = self._sources()
+        if not self.shared_store:
+            self._load_frames(sources)
+            return
+        if self._attach_shared(sources):
+            return
+        # One process loads and publishes; the others wait here, then attach.
+        with store_lock(self.shared_dir, "load"):
+            if self._attach_shared(sources):
+                return
+            self._load_frames(sources)
+            try:
+                self.publish_shared()
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Could not publish to the shared store: {e}")
+                return
+            # Drop the private copy in favour of the mapped one.
+            self._attach_shared(sources)
+
+    def _load_frames(self, sources: dict) -> None:
+        if self.use_cache:
+            with timed("load.cache_read"):
+                frames = load_frames(self.cache_dir, sources, content_hash=self.verify_cache_hash,
+                                     variant=self._cache_variant())
+            if frames is not None and set(self.datasets) <= set(frames):
+                self._set_frames(frames)
+                return
+
+        if self.extract:
+            self._parse_data()
+            self.facets = self._movie_facets(self.movies_df)
+            self._save_cache(sources)
+        else:
+            self._stream_archive(sources)
+
+    def _set_frames(self, frames: dict) -> None:
+        """Takes the frames of the datasets (and facets) from a cache or the shared store."""
+        for name in DATASET_FILES:
+            frame = frames[name] if name in self.datasets else self._empty_frame(name)
+            setattr(self, f"{name}_df", frame)
+        if "movies" in self.datasets:
+            self.facets = {
+                col: Facet.from_frames(frames[f"{col}_vocab"], frames[f"{col}_members"],
+                                       len(self.movies_df))
+                for col in FACET_COLUMNS
+            }
         else:
-            self.movies_df = pd.DataFrame()
-
-        # Load Actors
-        if os.path.exists(character_metadata_path):
-            self.actors_df = pd.read_csv(
-                character_metadata_path,
-                sep="\t",
-                header=None,
-                names=[
-                    "movie_id",
-                    "persona_id",
-                    "movie_date",
-                    "character_name",
-                    "actor_birthdate",
-                    "gender",
-                    "height",
-                    "col8",
-                    "actor_name",
-                    "age",
-                    "col10",
-                    "col11",
-                    "col12"
-                ],
-                encoding="utf-8",
-                na_values=["\\N"]
-            )
-            # Convert height to numeric (in meters)
-            self.actors_df["height"] = pd.to_numeric(self.actors_df["height"], errors="coerce")
+            self.facets = self._build_facets(self.movies_df)
+
+    def _frames(self) -> dict:
+        """The dataset frames and the facets as frames, as cached and published."""
+        frames = {name: getattr(self, f"{name}_df") for name in DATASET_FILES}
+        for col, facet in self.facets.items():
+            frames[f"{col}_vocab"], frames[f"{col}_members"] = facet.to_frames()
+        return frames
+
+    def _save_cache(self, sources: dict) -> None:
+        # A partial load must not replace a complete cache.
+        if not self.use_cache or set(self.datasets) != set(DATASET_FILES):
+            return
+        with timed("load.cache_write"):
+            save_frames(self.cache_dir, sources, self._frames(),
+                        content_hash=self.verify_cache_hash, variant=self._cache_variant())
+
+    def _shared_manifest(self, sources: dict) -> dict:
+        """What a version of the shared store must have been built from to be attached."""
+        return {
+            "schema_version": CACHE_SCHEMA_VERSION,
+            "variant": self._cache_variant(),
+            "datasets": sorted(self.datasets),
+            "sources": fingerprint(sources, content_hash=self.verify_cache_hash),
+        }
+
+    def _attach_shared(self, sources: dict) -> bool:
+        with timed("load.shared_attach"):
+            attached = attach(self.shared_dir, self._shared_manifest(sources))
+        if attached is None:
+            return False
+        self.shared_version, frames = attached
+        self._set_frames(frames)
+        return True
+
+    def publish_shared(self) -> int:
+        """
+        Publishes the loaded frames as the new live version of the shared
+        store and returns its number. Processes attached to earlier versions
+        keep them until they call attach_latest().
+        """
+        self.wait_until_loaded()
+        with timed("load.shared_publish"):
+            return publish(self.shared_dir, self._frames(), self._shared_manifest(self._sources()))
+
+    def shared_outdated(self) -> bool:
+        """True if this analyzer is attached to the shared store and a newer version is live."""
+        if self.shared_version is None:
+            return False
+        live = current_version(self.shared_dir)
+        return live is not None and live != self.shared_version
+
+    def attach_latest(self) -> "MovieAnalyzer":
+        """
+        Returns a new analyzer with this one's options on the live version of
+        the shared store (loading and publishing the data if none matches it).
+        Derived indexes and memoized results are not carried over.
+        """
+        analyzer = copy.copy(self)
+        for name in _LAZY_INDEXES:
+            analyzer.__dict__.pop("_" + name, None)
+        analyzer._index_lock = threading.RLock()
+        analyzer._loader = None
+        analyzer.query_cache = QueryCache(max_bytes=self.query_cache.max_bytes)
+        analyzer.shared_store = True
+        analyzer.shared_version = None
+        analyzer._load_data()
+        return analyzer
+
+    @staticmethod
+    def _build_facets(movies_df: pd.DataFrame) -> dict:
+        """Parses the Freebase tuple columns of movies_df once into integer-coded facets."""
+        with timed("load.facets"):
+            return {col: Facet.from_series(movies_df.get(col)) for col in FACET_COLUMNS}
+
+    def _movie_facets(self, movies_df: pd.DataFrame) -> dict:
+        """
+        The facets of freshly parsed movies; with skip_unused_columns the raw
+        JSON columns they were built from are then dropped from movies_df.
+        """
+        facets = self._build_facets(movies_df)
+        if self.skip_unused_columns:
+            movies_df.drop(columns=UNUSED_COLUMNS["movies"], errors="ignore", inplace=True)
+        return facets
+
+    def wait_until_loaded(self) -> None:
+        """Blocks until a background archive load (extract=False) has finished."""
+        if self._loader is not None:
+            self._loader.join()
+
+    def _parse_data(self) -> None:
+        """
+        Parses the extracted files concurrently, each one split into
+        line-aligned shards that share a pool of parse_workers threads.
+        """
+        paths = {name: os.path.join(self.extracted_folder, filename)
+                 for name, filename in DATASET_FILES.items()}
+        wanted = [name for name in DATASET_FILES
+                  if name in self.datasets and os.path.exists(paths[name])]
+        with ThreadPoolExecutor(self.parse_workers, thread_name_prefix="MovieAnalyzer-shard") as shards, \
+                ThreadPoolExecutor(len(DATASET_FILES), thread_name_prefix="MovieAnalyzer-file") as files:
+            self._shard_pool = shards
+            try:
+                futures = {name: files.submit(self._read_dataset, name, paths[name])
+                           for name in wanted}
+                for name in DATASET_FILES:
+                    frame = futures[name].result() if name in futures else self._empty_frame(name)
+                    setattr(self, f"{name}_df", frame)
+            finally:
+                self._shard_pool = None
+
+    def _stream_archive(self, sources: dict) -> None:
+        """
+        Parses the requested members straight out of the tarball in a
+        background thread. Every frame is published through a Future as soon
+        as its member is parsed, so queries on it can run while the rest of
+        the archive is still being decompressed.
+        """
+        futures = {name: Future() for name in DATASET_FILES}
+        for name, future in futures.items():
+            setattr(self, f"{name}_df", future)
+        facets = self.facets = Future()
+        wanted = {DATASET_FILES[name]: name for name in self.datasets}
+
+        def run() -> None:
+            try:
+                for filename, stream in iter_members(self.data_filepath, wanted):
+                    name = wanted[filename]
+                    frame = self._read_dataset(name, stream)
+                    if name == "movies":
+                        # Before the frame is published, which may drop columns.
+                        movie_facets = self._movie_facets(frame)
+                    futures[name].set_result(frame)
+                    if name == "movies":
+                        facets.set_result(movie_facets)
+            except Exception as e:
+                for future in list(futures.values()) + [facets]:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for name, future in futures.items():
+                if not future.done():
+                    future.set_result(self._empty_frame(name))
+            if not facets.done():
+                facets.set_result(self._build_facets(self.movies_df))
+            self._save_cache(sources)
+
+        self._loader = threading.Thread(target=run, name="MovieAnalyzer-archive", daemon=True)
+        self._loader.start()
+
+    @staticmethod
+    def _empty_frame(name: str) -> pd.DataFrame:
+        if name == "summaries":
+            return pd.DataFrame(columns=["movie_id", "summary"])
+        return pd.DataFrame()
+
+    def _read_dataset(self, name: str, source) -> pd.DataFrame:
+        """Parses one raw corpus file, given as a path or a binary stream."""
+        if name == "actors" and self.out_of_core:
+            with timed("load.aggregate.actors"):
+                self.actor_aggregates = self._aggregate_actors(source)
+            return self._empty_frame(name)
+        with timed(f"load.parse.{name}"):
+            df = self._parse_dataset(name, source)
+        if self.compact:
+            with timed(f"load.compact.{name}"):
+                compact_frame(name, df)
+        return df
+
+    def _read_actors(self, source, columns: Optional[List[str]] = None, **kwargs):
+        """read_csv of character.metadata.tsv; extra kwargs (e.g. chunksize) are passed on."""
+        skipped = UNUSED_COLUMNS.get("actors", []) if self.skip_unused_columns else []
+        # For actors, the sample data has 13 columns.
+        return pd.read_csv(
+            source,
+            sep="\t",
+            header=None,
+            names=[
+                "movie_id",
+                "persona_id",
+                "movie_date",
+                "character_name",
+                "actor_birthdate",
+                "gender",
+                "height",
+                "col8",
+                "actor_name",
+                "age",
+                "map_id",
+                "col11",
+                "actor_id"
+            ],
+            usecols=lambda col: col not in skipped and (columns is None or col in columns),
+            dtype=ACTOR_DTYPES,
+            encoding="utf-8",
+            na_values=["\\N"],
+            **kwargs
+        )
+
+    def _prepare_actors(self, actors_df: pd.DataFrame) -> pd.DataFrame:
+        # Convert height to numeric (in meters)
+        actors_df["height"] = pd.to_numeric(actors_df["height"], errors="coerce")
+        if self.compact and "height" in FLOAT32_COLUMNS["actors"]:
+            actors_df["height"] = actors_df["height"].astype(np.float32)
+        # Fill missing gender values.
+        actors_df["gender"] = actors_df["gender"].fillna("Unknown")
+        if "movie_date" in actors_df.columns:
+            _add_date_columns(actors_df, "movie_date", "movie")
+        _add_date_columns(actors_df, "actor_birthdate", "birth")
+        return actors_df
+
+    def _actor_chunks(self, source, columns: Optional[List[str]] = None):
+        """Parsed chunks of the character table, sized from memory_budget."""
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                sample = f.read(1 << 16)
         else:
-            self.actors_df = pd.DataFrame()
-
-        # ADDED: Load Plot Summaries if present (plot_summaries.txt)
-        plot_summaries_path = os.path.join(self.extracted_folder, "plot_summaries.txt")
-        if os.path.exists(plot_summaries_path):
-            # This file has format: movie_id \t summary
-            self.summaries_df = pd.read_csv(
-                plot_summaries_path,
-                sep="\t",
-                header=None,
-                names=["movie_id", "summary"],
-                encoding="utf-8",
-                quoting=3,  # to handle any quotation issues
-                on_bad_lines="skip"
-            )
+            sample = source.peek(1 << 16)
+        rows = chunk_rows(average_line_bytes(sample), self.memory_budget)
+        with self._read_actors(source, columns, chunksize=rows) as reader:
+            for chunk in reader:
+                yield self._prepare_actors(chunk)
+
+    def _aggregate_actors(self, source) -> ActorAggregates:
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                sample = f.read(1 << 16)
+            size = os.path.getsize(source)
         else:
-            self.summaries_df = pd.DataFrame(columns=["movie_id", "summary"])
+            sample = source.peek(1 << 16)
+            # An archive member's size is unknown up front; the whole archive
+            # inflated at a typical 4x ratio is a safe upper bound.
+            size = os.path.getsize(self.data_filepath) * 4
+        partitions = spill_partitions(size, average_line_bytes(sample), self.memory_budget)
+        aggregates = ActorAggregates(new_spill_dir(self.cache_dir), partitions)
+        for chunk in self._actor_chunks(source, AGGREGATE_COLUMNS):
+            aggregates.update(chunk)
+        aggregates.finish()
+        return aggregates
 
-    @validate_call
+    @staticmethod
+    def _read_movies(source, **kwargs) -> pd.DataFrame:
+        # For movies, we use column names based on your sample:
+        # movie_id, freebase_id, title, release_date, imdb_id, runtime, languages, countries, genres
+        return pd.read_csv(
+            source,
+            sep="\t",
+            header=None,
+            names=["movie_id", "freebase_id", "title", "release_date",
+                   "imdb_id", "runtime", "languages", "countries", "genres"],
+            dtype=MOVIE_DTYPES,
+            encoding="utf-8",
+            na_values=["\\N"],
+            **kwargs
+        )
+
+    @staticmethod
+    def _read_summaries(source, **kwargs) -> pd.DataFrame:
+        # ADDED: Plot Summaries (plot_summaries.txt)
+        # This file has format: movie_id \t summary
+        return pd.read_csv(
+            source,
+            sep="\t",
+            header=None,
+            names=["movie_id", "summary"],
+            dtype={"summary": str},
+            encoding="utf-8",
+            quoting=3,  # to handle any quotation issues
+            on_bad_lines="skip",
+            **kwargs
+        )
+
+    def _read_raw(self, name: str, source) -> pd.DataFrame:
+        """
+        read_csv of one file; extracted files are parsed in shards while
+        _parse_data runs. With compact, text is kept as pyarrow strings from
+        the start (see read_arrow_strings).
+        """
+        read = {"movies": self._read_movies, "actors": self._read_actors,
+                "summaries": self._read_summaries}[name]
+        if self.compact:
+            read = functools.partial(read_arrow_strings, read)
+        if isinstance(source, str) and self._shard_pool is not None:
+            return read_sharded(source, read, self._shard_pool, self.parse_workers)
+        return read(source)
+
+    def _parse_dataset(self, name: str, source) -> pd.DataFrame:
+        df = self._read_raw(name, source)
+        if name == "movies":
+            _add_date_columns(df, "release_date", "release")
+        elif name == "actors":
+            self._prepare_actors(df)
+        return df
+
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Returns the resident bytes of every column of the loaded frames, plus
+        the facets and the derived indexes built so far, as a DataFrame with
+        columns ["frame", "column", "dtype", "bytes"].
+        """
+        parts = [frame_memory(name, getattr(self, f"{name}_df")) for name in DATASET_FILES]
+        indexes = [("facets", col, "int32", facet.nbytes()) for col, facet in self.facets.items()]
+        for name in _LAZY_INDEXES:
+            index = self.__dict__.get("_" + name)
+            if index is not None:
+                indexes.append(("indexes", name, type(index).__name__, index.nbytes()))
+        if self.actor_aggregates is not None:
+            indexes.append(("indexes", "actor_aggregates", "ActorAggregates",
+                            self.actor_aggregates.nbytes()))
+        indexes.append(("indexes", "query_cache", "QueryCache", self.query_cache.nbytes()))
+        parts.append(pd.DataFrame(indexes, columns=["frame", "column", "dtype", "bytes"]))
+        return pd.concat(parts, ignore_index=True)
+
+    @_query()
     def movie_type(self, N: int = 10) -> pd.DataFrame:
         """
         Returns a DataFrame listing the top-N most common movie genres.
-        The method processes the 'genres' field (a JSON-like dictionary string)
-        by:
-          - Parsing the string as JSON.
-          - Extracting the genre names (dictionary values).
-          - Returning ["Unknown"] if the field is empty.
-        """
-        if self.movies_df.empty or "genres" not in self.movies_df.columns:
-            raise Exception("Movie data not loaded or 'genres' column missing.")
-
-        def extract_genres(genre_str: str) -> list:
-            if not genre_str or genre_str.strip() in ("", "{}"):
-                return ["Unknown"]
-            try:
-                d = json.loads(genre_str)
-                if not d:
-                    return ["Unknown"]
-                return list(d.values())
-            except Exception:
-                return ["Unknown"]
-
-        df = self.movies_df.copy()
-        df["genres"] = df["genres"].fillna("").apply(extract_genres)
-        df = df.explode("genres")
-
-        counts = df["genres"].value_counts().reset_index()
+        Genres come from the 'genres' facet parsed once at load; movies
+        without any genre are counted as "Unknown".
+        """
+        if self.movies_df.empty:
+            raise Exception("Movie data not loaded.")
+
+        genres = self.facets["genres"]
+        counts = genres.value_counts()
+        unknown = int(genres.empty_rows().sum())
+        if unknown:
+            counts["Unknown"] = counts.get("Unknown", 0) + unknown
+            counts = counts.sort_values(ascending=False, kind="stable")
+
+        counts = counts.reset_index()
         counts.columns = ["Movie_Type", "Count"]
         return counts.head(N)
 
+    @_query()
     def actor_count(self) -> pd.DataFrame:
         """
         Returns a DataFrame histogram of unique actor counts per movie.
         Uses the actor's name for uniqueness.
         """
-        if self.actors_df.empty:
-            raise Exception("Actor data not loaded.")
+        self._require_actors()
+        if self.out_of_core:
+            return self.actor_aggregates.actor_count()
         actor_counts = self.actors_df.groupby("movie_id")["actor_name"].nunique()
         hist = actor_counts.value_counts().reset_index()
         hist.columns = ["Number_of_Actors", "Movie_Count"]
-        return hist.sort_values("Number_of_Actors")
+        return hist.sort_values("Number_of_Actors", ignore_index=True)
 
-    @validate_call
+    def _require_actors(self) -> None:
+        if self.out_of_core:
+            self.actors_df  # waits for a background archive load
+            if self.actor_aggregates is None:
+                raise Exception("Actor data not loaded.")
+        elif self.actors_df.empty:
+            raise Exception("Actor data not loaded.")
+
+    @_query()
     def actor_distributions(
         self,
         gender: str,
@@ -182,110 +788,530 @@ class MovieAnalyzer:
         showing the height distribution.
         Otherwise, returns just the filtered DataFrame.
         """
-        if self.actors_df.empty:
-            raise Exception("Actor data not loaded.")
+        self._require_actors()
 
         # Check height range (in meters)
         if not (1.0 <= min_height < max_height <= 2.5):
             raise Exception("Height values are unrealistic. Please check (expected in meters).")
 
-        df = self.actors_df.copy()
-        # Fill missing gender values.
-        df["gender"] = df["gender"].fillna("Unknown")
-
-        if gender != "All":
-            df = df[df["gender"] == gender]
+        if self.out_of_core:
+            df = self._stream_actor_rows(gender, min_height, max_height)
+            if plot:
+                return df, self._height_figure(gender, max_height, min_height)
+            return df
 
-        df = df.dropna(subset=["height"])
-        df = df[(df["height"] >= min_height) & (df["height"] <= max_height)]
+        # Binary-search the sorted heights of the chosen gender ("All" covers
+        # every actor; missing genders were filled with "Unknown" at load).
+        df = self.actors_df.iloc[self.height_index.rows(gender, min_height, max_height)]
 
         if plot:
-            if df.empty:
-                fig, ax = plt.subplots(figsize=(8, 4))
-                ax.text(0.5, 0.5, "No Data", horizontalalignment="center",
-                        verticalalignment="center", transform=ax.transAxes)
-                ax.set_title("Actor Height Distribution")
-                ax.set_xlabel("Height (m)")
-                ax.set_ylabel("Frequency")
-                return df, fig
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            ax.hist(df["height"], bins=20, edgecolor="black")
-            ax.set_title("Actor Height Distribution")
-            ax.set_xlabel("Height (m)")
-            ax.set_ylabel("Frequency")
-            return df, fig
+            return df, self._height_figure(gender, max_height, min_height)
 
         return df
 
-    @validate_call
+    @_lazy_index
+    def height_index(self) -> HeightIndex:
+        """Sorted per-gender heights over actors_df (see src/heights.py)."""
+        return HeightIndex(self.actors_df)
+
+    @_query()
+    def height_histogram(
+        self,
+        gender: str,
+        max_height: float,
+        min_height: float,
+        bins: int = 20,
+    ) -> pd.DataFrame:
+        """
+        Returns the height histogram of actor_distributions as a DataFrame with
+        columns ["Bin_Start", "Bin_End", "Count"], without materializing the
+        filtered actors. Bins are equal-width between the smallest and largest
+        selected height, as in matplotlib's hist.
+        """
+        self._require_actors()
+        if not (1.0 <= min_height < max_height <= 2.5):
+            raise Exception("Height values are unrealistic. Please check (expected in meters).")
+        counts, edges = self._height_histogram(gender, min_height, max_height, bins)
+        return pd.DataFrame({"Bin_Start": edges[:-1], "Bin_End": edges[1:], "Count": counts})
+
+    def _height_histogram(self, gender: str, min_height: float, max_height: float,
+                          bins: int = 20):
+        if self.out_of_core:
+            return self.actor_aggregates.height_histogram(gender, min_height, max_height, bins)
+        return self.height_index.histogram(gender, min_height, max_height, bins)
+
+    def _stream_actor_rows(self, gender: str, min_height: float, max_height: float) -> pd.DataFrame:
+        """actor_distributions for out_of_core: one chunked pass collecting the matching rows."""
+        def matching(source):
+            for chunk in self._actor_chunks(source):
+                height = chunk["height"]
+                lo, hi = height.dtype.type(min_height), height.dtype.type(max_height)
+                mask = (height >= lo) & (height <= hi)
+                if gender != "All":
+                    mask &= chunk["gender"] == gender
+                yield chunk[mask]
+
+        if self.extract:
+            parts = list(matching(os.path.join(self.extracted_folder, DATASET_FILES["actors"])))
+        else:
+            parts = []
+            for _, stream in iter_members(self.data_filepath, [DATASET_FILES["actors"]]):
+                parts = list(matching(stream))
+        if not parts:
+            return self._empty_frame("actors")
+        return pd.concat(parts)
+
+    def _height_figure(self, gender: str, max_height: float, min_height: float):
+        fig, ax = plt.subplots(figsize=(8, 4))
+        counts, edges = self._height_histogram(gender, min_height, max_height)
+        if counts.sum() == 0:
+            ax.text(0.5, 0.5, "No Data", horizontalalignment="center",
+                    verticalalignment="center", transform=ax.transAxes)
+        else:
+            ax.hist(edges[:-1], bins=edges, weights=counts, edgecolor="black")
+        ax.set_title("Actor Height Distribution")
+        ax.set_xlabel("Height (m)")
+        ax.set_ylabel("Frequency")
+        return fig
+
+    @_query()
     def releases(self, genre: Optional[str] = None) -> pd.DataFrame:
         """
         Returns a DataFrame with columns ["Year", "Count"] representing
         how many movies were released per year.
         If 'genre' is None or the string "None", it does not filter.
         Otherwise, it filters for movies containing that genre.
+        Every movie with a known release year counts, whatever the precision
+        of its release_date.
         """
         if self.movies_df.empty:
             raise Exception("Movie data not loaded.")
 
-        df = self.movies_df.copy()
-        # Convert 'release_date' to datetime; drop invalid or missing
-        df["release_date"] = pd.to_datetime(df["release_date"], errors="coerce")
-        df.dropna(subset=["release_date"], inplace=True)
-
-        # Extract year
-        df["Year"] = df["release_date"].dt.year
+        where = None if genre is None or genre == "None" else Genre(genre)
+        return self.filter_index.count_by_year(where)
 
-        # Handle the case where genre is None or the literal string "None"
-        if genre is None or genre == "None":
-            # No filtering: group *all* movies by year
-            result = df.groupby("Year").size().reset_index(name="Count")
-            return result.sort_values("Year")
-        else:
-            # Filter by the given genre
-            def extract_genres(genre_str: str) -> list:
-                if not genre_str or genre_str.strip() in ("", "{}"):
-                    return []
-                try:
-                    d = json.loads(genre_str)
-                    return list(d.values())
-                except:
-                    return []
-
-            df["parsed_genres"] = df["genres"].fillna("").apply(extract_genres)
-            df = df[df["parsed_genres"].apply(lambda g_list: genre in g_list)]
-            result = df.groupby("Year").size().reset_index(name="Count")
-            return result.sort_values("Year")
-
-    @validate_call
+    @_query()
     def ages(self, mode: str = "Y") -> pd.DataFrame:
         """
         Counts how many births happened per chosen interval: 'Y' for Year or 'M' for Month.
         Default is 'Y'. If the user selects something else, we default to 'Y'.
+        Births are counted by the year (or month) columns derived at load, so
+        year-only birthdates are included in 'Y' and skipped in 'M'.
         """
-        if self.actors_df.empty:
-            raise Exception("Actor data not loaded.")
-
-        df = self.actors_df.copy()
-        df["birthdate"] = pd.to_datetime(df["actor_birthdate"], errors="coerce")
-        df.dropna(subset=["birthdate"], inplace=True)
+        self._require_actors()
+        if self.out_of_core:
+            return self.actor_aggregates.ages("M" if mode == "M" else "Y")
 
+        precision = self.actors_df["birth_precision"]
         if mode == "M":
-            df["Birth_Month"] = df["birthdate"].dt.month
-            result = df.groupby("Birth_Month").size().reset_index(name="Count")
-            return result
+            months = self.actors_df["birth_month"][precision >= PRECISION_MONTH]
+            result = months.value_counts().sort_index()
+            return pd.DataFrame({"Birth_Month": result.index.astype(int), "Count": result.values})
         else:
             # Default to Year if "M" is not selected
-            df["Birth_Year"] = df["birthdate"].dt.year
-            result = df.groupby("Birth_Year").size().reset_index(name="Count")
-            return result
+            years = self.actors_df["birth_year"][precision > PRECISION_NONE]
+            result = years.value_counts().sort_index()
+            return pd.DataFrame({"Birth_Year": result.index.astype(int), "Count": result.values})
+
+    # --------------------------------------------------------------------
+    # Multi-facet movie filters (see src/filters.py)
+    # --------------------------------------------------------------------
+    @_lazy_index
+    def filter_index(self) -> FilterIndex:
+        """Packed per-value and per-year bitmaps over movies_df."""
+        if self.movies_df.empty:
+            return FilterIndex(self.facets, np.zeros(0, dtype=np.int32))
+        release_years = np.where(self.movies_df["release_precision"] > PRECISION_NONE,
+                                 self.movies_df["release_year"], -1)
+        return FilterIndex(self.facets, release_years.astype(np.int32))
+
+    @_query(config={"arbitrary_types_allowed": True})
+    def filter_movies(self, where: Union[Filter, dict, None] = None) -> pd.DataFrame:
+        """
+        Returns the rows of movies_df matching a filter expression, e.g.
+        (Genre("Drama") | Genre("Comedy")) & Country("France") & Years(1990, 1999),
+        or its dict form {"and": [{"or": [{"genre": "Drama"}, ...]}, ...]}.
+        None matches every movie.
+        """
+        if self.movies_df.empty:
+            raise Exception("Movie data not loaded.")
+        return self.movies_df[self.filter_index.mask(from_dict(where))]
+
+    @_query(config={"arbitrary_types_allowed": True})
+    def count_movies(self, where: Union[Filter, dict, None] = None) -> int:
+        """Returns how many movies match a filter expression (see filter_movies)."""
+        if self.movies_df.empty:
+            raise Exception("Movie data not loaded.")
+        return self.filter_index.count(from_dict(where))
+
+    @_query(config={"arbitrary_types_allowed": True})
+    def releases_where(self, where: Union[Filter, dict, None] = None) -> pd.DataFrame:
+        """
+        Returns a ["Year", "Count"] DataFrame of matching movies per release year
+        (see filter_movies). Movies without a known release year are left out.
+        """
+        if self.movies_df.empty:
+            raise Exception("Movie data not loaded.")
+        return self.filter_index.count_by_year(from_dict(where))
+
+    # --------------------------------------------------------------------
+    # Full-text search over plot summaries (see src/search.py)
+    # --------------------------------------------------------------------
+    @_lazy_index
+    def search_index(self) -> SearchIndex:
+        """
+        BM25 inverted index over summaries_df, saved under <cache_dir>/search
+        and reopened memory-mapped while the source files are unchanged.
+        """
+        index_dir = os.path.join(self.cache_dir, "search")
+        sources = fingerprint(self._sources(), content_hash=self.verify_cache_hash)
+        if self.use_cache:
+            index = load_index(index_dir, sources)
+            if index is not None and index.n_docs == len(self.summaries_df):
+                return index
+        index = SearchIndex.build(self.summaries_df["summary"])
+        if self.use_cache and "summaries" in self.datasets:
+            save_index(index, index_dir, sources)
+        return index
+
+    def _summary_movie_rows(self) -> np.ndarray:
+        """movies_df row of every summaries_df row, or -1 (see MovieIndex.summary_rows)."""
+        rows = np.full(len(self.summaries_df), -1, dtype=np.int64)
+        summary_rows = self.movie_index.summary_rows
+        has_summary = np.flatnonzero(summary_rows >= 0)
+        rows[summary_rows[has_summary]] = has_summary
+        return rows
+
+    @_query(config={"arbitrary_types_allowed": True})
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        where: Union[Filter, dict, None] = None,
+        require_all: bool = True
+    ) -> pd.DataFrame:
+        """
+        Returns the k plot summaries that best match query, ranked by BM25, as
+        a ["movie_id", "title", "score"] DataFrame. With require_all (the
+        default) a summary must contain every query word. where restricts
+        the results to movies matching a filter expression (see filter_movies).
+        """
+        if self.summaries_df.empty:
+            raise Exception("Summary data not loaded.")
+        if k < 1:
+            raise Exception("k must be at least 1.")
+        allowed = None
+        if where is not None:
+            if self.movies_df.empty:
+                raise Exception("Movie data not loaded.")
+            movie_mask = self.filter_index.mask(from_dict(where))
+            movie_rows = self._summary_movie_rows()
+            allowed = movie_rows >= 0
+            allowed[allowed] = movie_mask[movie_rows[allowed]]
+        docs, scores = self.search_index.search(query, k, allowed, require_all)
+
+        titles = [None] * len(docs)
+        if not self.movies_df.empty and len(docs):
+            movie_rows = self._summary_movie_rows()[docs]
+            title_col = self.movies_df["title"]
+            titles = [str(title_col.iloc[row]) if row >= 0 else None for row in movie_rows]
+        return pd.DataFrame({
+            "movie_id": self.summaries_df["movie_id"].to_numpy()[docs],
+            "title": titles,
+            "score": scores.astype(np.float64),
+        })
+
+    # --------------------------------------------------------------------
+    # Similar movies by plot summary (see src/similarity.py)
+    # --------------------------------------------------------------------
+    @_lazy_index
+    def similarity_index(self) -> SimilarityIndex:
+        """TF-IDF vectors of the summaries, saved under <cache_dir>/similarity."""
+        index_dir = os.path.join(self.cache_dir, "similarity")
+        sources = fingerprint(self._sources(), content_hash=self.verify_cache_hash)
+        search = self.search_index
+        if self.use_cache:
+            index = load_similarity(index_dir, search, sources)
+            if index is not None:
+                return index
+        index = SimilarityIndex.build(search)
+        if self.use_cache and "summaries" in self.datasets:
+            save_similarity(index, index_dir, sources)
+        return index
+
+    @_query()
+    def similar_movies_batch(self, movie_ids: List[int], k: int = 10) -> pd.DataFrame:
+        """
+        Returns the k movies whose plot summaries are most similar (TF-IDF
+        cosine) to each given movie's, as a DataFrame with columns
+        ["query_movie_id", "rank", "movie_id", "title", "similarity", "genres_list"].
+        Movies without a summary raise an exception.
+        """
+        if self.summaries_df.empty or self.movies_df.empty:
+            raise Exception("Movie or summary data not loaded.")
+        if k < 1:
+            raise Exception("k must be at least 1.")
+        docs = []
+        for movie_id in movie_ids:
+            row = self.movie_index.row_of(movie_id)
+            if row < 0:
+                raise Exception(f"Unknown movie_id: {movie_id}")
+            if self.movie_index.summary_rows[row] < 0:
+                raise Exception(f"Movie {movie_id} has no plot summary.")
+            docs.append(self.movie_index.summary_rows[row])
+        neighbours, similarities = self.similarity_index.similar(np.array(docs, dtype=np.int64), k)
+
+        found = neighbours >= 0
+        query_ids = np.repeat(np.asarray(movie_ids, dtype=np.int64), k).reshape(-1, k)[found]
+        ranks = np.tile(np.arange(1, k + 1), (len(docs), 1))[found]
+        neighbour_docs = neighbours[found]
+        movie_rows = self._summary_movie_rows()[neighbour_docs]
+        title_col = self.movies_df["title"]
+        genres = self.facets["genres"]
+        return pd.DataFrame({
+            "query_movie_id": query_ids,
+            "rank": ranks,
+            "movie_id": self.summaries_df["movie_id"].to_numpy()[neighbour_docs],
+            "title": [str(title_col.iloc[row]) if row >= 0 else None for row in movie_rows],
+            "similarity": similarities[found].astype(np.float64),
+            "genres_list": [genres.row_values(row) if row >= 0 else [] for row in movie_rows],
+        })
+
+    @_query()
+    def similar_movies(self, movie_id: int, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the k movies with the most similar plot summaries to movie_id's,
+        as ["movie_id", "title", "similarity", "genres_list"] (see similar_movies_batch).
+        """
+        result = self.similar_movies_batch([movie_id], k)
+        return result.drop(columns=["query_movie_id", "rank"])
+
+    # --------------------------------------------------------------------
+    # Character clusters joined through the map ID (see src/clusters.py)
+    # --------------------------------------------------------------------
+    @_lazy_index
+    def map_id_index(self) -> MapIdIndex:
+        """Hash index from the Freebase character/actor map ID to actors_df row."""
+        if self.actors_df.empty or "map_id" not in self.actors_df.columns:
+            raise Exception("Actor data not loaded.")
+        return MapIdIndex(self.actors_df["map_id"])
+
+    def _read_clusters(self) -> dict:
+        """{kind: parsed cluster file}; empty frames for files the corpus lacks."""
+        readers = {"trope": read_tropes, "name": read_names}
+        clusters = {"trope": pd.DataFrame(columns=TROPE_COLUMNS),
+                    "name": pd.DataFrame(columns=NAME_COLUMNS)}
+        if self.extract:
+            for kind, filename in CLUSTER_FILES.items():
+                path = os.path.join(self.extracted_folder, filename)
+                if os.path.exists(path):
+                    clusters[kind] = readers[kind](path)
+        else:
+            wanted = {filename: kind for kind, filename in CLUSTER_FILES.items()}
+            for filename, stream in iter_members(self.data_filepath, wanted):
+                clusters[wanted[filename]] = readers[wanted[filename]](stream)
+        return clusters
+
+    @_lazy_index
+    def cluster_index(self) -> ClusterIndex:
+        """The tvtropes and name clusters with the actors_df row of every entry."""
+        clusters = self._read_clusters()
+        return ClusterIndex(self.map_id_index, clusters["trope"], clusters["name"])
+
+    @_query()
+    def tropes(self) -> pd.DataFrame:
+        """Returns the tvtropes character types as ["Trope", "Count"], most common first."""
+        counts = self.cluster_index.counts("trope").reset_index()
+        counts.columns = ["Trope", "Count"]
+        return counts
+
+    @_query()
+    def trope_characters(self, trope: str) -> pd.DataFrame:
+        """
+        Returns every character of a tvtropes character type with its actor's
+        data, as a DataFrame with columns ["character_name", "actor_name",
+        "movie_title", "movie_id", "gender", "height", "age", "birth_year"].
+        The names come from the cluster file; the other columns are NaN for
+        characters missing from the character table.
+        """
+        index = self.cluster_index
+        entries = index.entries("trope", trope)
+        rows = index.tropes_rows[entries]
+        found = rows >= 0
+        actors = self.actors_df.iloc[rows[found]]
+        birth_years = actors["birth_year"].where(actors["birth_precision"] > PRECISION_NONE)
+        matched = pd.DataFrame({
+            "movie_id": actors["movie_id"].to_numpy(),
+            "gender": actors["gender"].to_numpy(dtype=object, na_value=np.nan),
+            "height": actors["height"].to_numpy(),
+            "age": actors["age"].to_numpy(),
+            "birth_year": birth_years.to_numpy(),
+        }, index=np.flatnonzero(found)).reindex(range(len(rows)))
+        clusters = index.tropes.iloc[entries]
+        result = pd.DataFrame({
+            "character_name": clusters["character_name"].to_numpy(),
+            "actor_name": clusters["actor_name"].to_numpy(),
+            "movie_title": clusters["movie_title"].to_numpy(),
+        })
+        result[matched.columns] = matched
+        result["movie_id"] = result["movie_id"].astype("Int64")
+        result["birth_year"] = result["birth_year"].astype("Int64")
+        return result
+
+    @_query()
+    def movies_sharing_character(self, name: str) -> pd.DataFrame:
+        """
+        Returns the movies with a character of the given name (one of the
+        names of name.clusters.txt), as a DataFrame with columns ["movie_id",
+        "title", "release_year", "character_name", "actor_name"]. Characters
+        missing from the character table are left out.
+        """
+        index = self.cluster_index
+        rows = index.names_rows[index.entries("name", name)]
+        actors = self.actors_df.iloc[rows[rows >= 0]]
+        movie_ids = actors["movie_id"].to_numpy(dtype=np.int64)
+        titles = [None] * len(movie_ids)
+        years = np.full(len(movie_ids), np.nan)
+        if not self.movies_df.empty:
+            movie_rows = self.movie_index.rows_of(movie_ids)
+            known = movie_rows >= 0
+            title_col = self.movies_df["title"]
+            titles = [str(title_col.iloc[row]) if row >= 0 else None for row in movie_rows]
+            release = self.movies_df.iloc[movie_rows[known]]
+            years[known] = np.where(release["release_precision"] > PRECISION_NONE,
+                                    release["release_year"], np.nan)
+        return pd.DataFrame({
+            "movie_id": movie_ids,
+            "title": titles,
+            "release_year": pd.array(years, dtype="Float64").astype("Int64"),
+            "character_name": actors["character_name"].to_numpy(dtype=object, na_value=np.nan),
+            "actor_name": actors["actor_name"].to_numpy(dtype=object, na_value=np.nan),
+        })
+
+    # --------------------------------------------------------------------
+    # Actor co-star graph (see src/costars.py)
+    # --------------------------------------------------------------------
+    @_lazy_index
+    def costar_graph(self) -> CostarGraph:
+        """
+        Actor x movie incidence and co-star adjacency over actors_df, saved
+        under <cache_dir>/costars and reopened memory-mapped while the source
+        files are unchanged.
+        """
+        if self.actors_df.empty or "actor_id" not in self.actors_df.columns:
+            raise Exception("Actor data not loaded.")
+        graph_dir = os.path.join(self.cache_dir, "costars")
+        sources = fingerprint(self._sources(), content_hash=self.verify_cache_hash)
+        if self.use_cache:
+            graph = load_graph(graph_dir, sources, len(self.actors_df))
+            if graph is not None:
+                return graph
+        graph = CostarGraph.build(self.actors_df["actor_id"], self.actors_df["actor_name"],
+                                  self.actors_df["movie_id"])
+        if self.use_cache and "actors" in self.datasets:
+            save_graph(graph, graph_dir, sources, len(self.actors_df))
+        return graph
+
+    def _movie_titles(self, movie_ids: np.ndarray) -> list:
+        """Title of every movie ID (None where movies_df lacks it)."""
+        if self.movies_df.empty:
+            return [None] * len(movie_ids)
+        title_col = self.movies_df["title"]
+        return [str(title_col.iloc[row]) if row >= 0 else None
+                for row in self.movie_index.rows_of(movie_ids)]
+
+    @_query()
+    def filmography(self, actor: str) -> pd.DataFrame:
+        """
+        Returns an actor's movies (given by Freebase actor ID or name) as a
+        DataFrame with columns ["movie_id", "title", "movie_date", "character_name"],
+        ordered by movie ID.
+        """
+        graph = self.costar_graph
+        movies, rows = graph.movies(graph.actor_code(actor))
+        movie_ids = graph.movie_ids[movies]
+        actors = self.actors_df.iloc[rows]
+        return pd.DataFrame({
+            "movie_id": movie_ids,
+            "title": self._movie_titles(movie_ids),
+            "movie_date": actors["movie_date"].to_numpy(dtype=object, na_value=np.nan),
+            "character_name": actors["character_name"].to_numpy(dtype=object, na_value=np.nan),
+        })
+
+    @_query()
+    def top_costars(self, actor: str, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the k actors who share the most movies with actor, as a DataFrame
+        with columns ["actor_id", "actor_name", "shared_movies"].
+        """
+        if k < 1:
+            raise Exception("k must be at least 1.")
+        graph = self.costar_graph
+        costars, weights = graph.top_costars(graph.actor_code(actor), k)
+        return pd.DataFrame({
+            "actor_id": [graph.actor_ids[a] for a in costars],
+            "actor_name": [graph.actor_names[a] for a in costars],
+            "shared_movies": weights.astype(np.int64),
+        })
+
+    @_query()
+    def degrees_of_separation(self, actor_a: str, actor_b: str,
+                              max_depth: Optional[int] = None) -> pd.DataFrame:
+        """
+        Returns a shortest chain of co-stars from actor_a to actor_b as a
+        DataFrame with columns ["actor_id", "actor_name", "movie_id", "title"],
+        where each row's movie links the actor to the previous one (None on
+        the first row). The degrees of separation are len(result) - 1; the
+        result is empty if the actors are not connected within max_depth steps.
+        """
+        graph = self.costar_graph
+        path = graph.shortest_path(graph.actor_code(actor_a), graph.actor_code(actor_b), max_depth)
+        movies = [graph.movie_ids[graph.shared_movie(a, b)] for a, b in zip(path, path[1:])]
+        titles = self._movie_titles(np.array(movies, dtype=np.int64))
+        return pd.DataFrame({
+            "actor_id": [graph.actor_ids[a] for a in path],
+            "actor_name": [graph.actor_names[a] for a in path],
+            "movie_id": pd.array([None] + movies if path else [], dtype="Int64"),
+            "title": [None] + titles if path else [],
+        })
+
+    @_query()
+    def costar_components(self) -> pd.DataFrame:
+        """
+        Returns a histogram of the connected components of the co-star graph,
+        as a DataFrame with columns ["Component_Size", "Components"] (sizes in
+        actors, ascending). Actors without co-stars form components of size 1.
+        """
+        sizes = pd.Series(self.costar_graph.component_sizes()).value_counts().sort_index()
+        return pd.DataFrame({"Component_Size": sizes.index.astype(np.int64),
+                             "Components": sizes.to_numpy(dtype=np.int64)})
 
     # --------------------------------------------------------------------
     # ADDED: Helper to get a random movie, its summary, and its genres
     # --------------------------------------------------------------------
-    @validate_call
-    def get_random_movie_info(self) -> dict:
+    @_lazy_index
+    def movie_index(self) -> MovieIndex:
+        """movie_id -> (movies_df row, summary row, genre codes), plus sampling pools."""
+        return MovieIndex(self.movies_df["movie_id"].to_numpy(),
+                          self.summaries_df["movie_id"].to_numpy(), self.facets["genres"])
+
+    def _movie_info(self, row: int) -> dict:
+        summary_row = self.movie_index.summary_rows[row]
+        summary = self.summaries_df["summary"].iloc[summary_row] if summary_row >= 0 else None
+        return {
+            "movie_id": self.movies_df["movie_id"].iloc[row],
+            "title": str(self.movies_df["title"].iloc[row]),
+            "summary": str(summary) if not pd.isna(summary) else "",
+            "genres_list": self.facets["genres"].row_values(row)
+        }
+
+    @_query(memoize=False)
+    def get_random_movie_info(
+        self,
+        genre: Optional[str] = None,
+        with_summary: bool = False,
+        seed: Optional[int] = None
+    ) -> dict:
         """
         Returns a dictionary containing:
             {
@@ -295,32 +1321,29 @@ class MovieAnalyzer:
               'movie_id': ...
             }
         If no summary is found for a chosen movie, returns an empty summary.
+        The draw can be restricted to movies of a genre and/or movies that have
+        a summary; seed makes it reproducible.
         """
         if self.movies_df.empty:
             raise Exception("No movies data available.")
+        row = self.movie_index.sample(np.random.default_rng(seed), 1, genre, with_summary)[0]
+        return self._movie_info(row)
 
-        # Merge with summaries to ensure we can get the summary
-        merged_df = pd.merge(self.movies_df, self.summaries_df, on="movie_id", how="left")
-
-        # Convert genres from JSON to list
-        def parse_genres(genre_str):
-            if pd.isna(genre_str) or genre_str.strip() in ("", "{}"):
-                return []
-            try:
-                d = json.loads(genre_str)
-                return list(d.values())
-            except:
-                return []
-
-        merged_df["genres_list"] = merged_df["genres"].apply(parse_genres)
-        if merged_df.empty:
-            raise Exception("Merged movies & summaries is empty or invalid.")
-
-        random_row = merged_df.sample(n=1).iloc[0]
-
-        return {
-            "movie_id": random_row["movie_id"],
-            "title": str(random_row["title"]),
-            "summary": str(random_row["summary"]) if not pd.isna(random_row["summary"]) else "",
-            "genres_list": random_row["genres_list"]
-        }
+    @_query(memoize=False)
+    def sample_movies(
+        self,
+        k: int,
+        seed: Optional[int] = None,
+        genre: Optional[str] = None,
+        with_summary: bool = False
+    ) -> List[dict]:
+        """
+        Returns k distinct random movies, in the format of get_random_movie_info,
+        e.g. as a reproducible evaluation set when seed is given.
+        """
+        if self.movies_df.empty:
+            raise Exception("No movies data available.")
+        if k < 0:
+            raise Exception("k must be non-negative.")
+        rows = self.movie_index.sample(np.random.default_rng(seed), k, genre, with_summary)
+        return [self._movie_info(row) for row in rows]
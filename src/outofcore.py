@@ -0,0 +1,194 @@
+"""
+outofcore.py
+
+Streaming aggregates over the character table, for MovieAnalyzer's
+out-of-core mode (out_of_core=True).
+
+Instead of holding actors_df, the loader reads character.metadata.tsv in
+chunks sized from a memory budget and folds every chunk into an
+ActorAggregates: birth year/month counts and per-gender height value counts
+are small mergeable tables, and the distinct (movie, actor) pairs behind
+actor_count are spilled to disk in hash partitions by movie ID, so each
+movie's pairs end up in one partition that fits the budget on its own.
+Aggregates built from separate parts of the file can be combined with merge().
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from src.dates import PRECISION_MONTH, PRECISION_NONE
+from src.heights import sorted_histogram
+
+# Columns the aggregates read from each chunk.
+AGGREGATE_COLUMNS = ["movie_id", "actor_birthdate", "gender", "height", "actor_name"]
+
+# Bytes a parsed row takes in memory per raw byte, with string columns as
+# Python objects plus the derived date columns (measured on the CMU data).
+MEMORY_PER_RAW_BYTE = 12
+# Bytes one spilled (movie_id, actor_name) pair takes when its partition is read back.
+MEMORY_PER_PAIR = 120
+MIN_CHUNK_ROWS = 1000
+
+
+def chunk_rows(avg_line_bytes: float, memory_budget: int) -> int:
+    """Rows per chunk so that a parsed chunk stays within a quarter of the budget."""
+    per_row = max(1.0, avg_line_bytes) * MEMORY_PER_RAW_BYTE
+    return max(MIN_CHUNK_ROWS, int(memory_budget / 4 / per_row))
+
+
+def average_line_bytes(sample: bytes) -> float:
+    """Mean line length of the start of a file (the whole sample if it has no newline)."""
+    lines = sample.count(b"\n")
+    return len(sample) / lines if lines else float(len(sample) or 1)
+
+
+class ActorAggregates:
+    """
+    Mergeable partial aggregates over character rows.
+
+    - birth_years / birth_months: value counts of birth_year (precision >
+      PRECISION_NONE) and birth_month (precision >= PRECISION_MONTH).
+    - heights[gender]: count per distinct height, gender "All" included.
+    - The distinct (movie_id, actor_name) pairs, spilled into `partitions`
+      Feather files under spill_dir (movie_id % partitions). Aggregates
+      merged in hand over their spill files and directories, which finish()
+      removes with this one's.
+    """
+
+    def __init__(self, spill_dir: str, partitions: int = 1):
+        self.spill_dir = spill_dir
+        self.partitions = max(1, partitions)
+        os.makedirs(spill_dir, exist_ok=True)
+        self._spill_dirs = [spill_dir]
+        self.n_rows = 0
+        self.birth_years = pd.Series(dtype=np.int64)
+        self.birth_months = pd.Series(dtype=np.int64)
+        self.heights: Dict[str, pd.Series] = {}
+        self._spilled: List[List[str]] = [[] for _ in range(self.partitions)]
+        self._actor_counts: Optional[pd.Series] = None
+
+    @staticmethod
+    def _add(total: pd.Series, counts: pd.Series) -> pd.Series:
+        if total.empty:
+            return counts.astype(np.int64)
+        return total.add(counts, fill_value=0).astype(np.int64)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Folds one parsed chunk (with the derived birth_* columns) into the aggregates."""
+        self.n_rows += len(chunk)
+        precision = chunk["birth_precision"]
+        self.birth_years = self._add(self.birth_years,
+                                     chunk["birth_year"][precision > PRECISION_NONE].value_counts())
+        self.birth_months = self._add(self.birth_months,
+                                      chunk["birth_month"][precision >= PRECISION_MONTH].value_counts())
+
+        heights = chunk["height"]
+        known = heights.notna()
+        self.heights["All"] = self._add(self.heights.get("All", pd.Series(dtype=np.int64)),
+                                        heights[known].value_counts())
+        for gender, counts in heights[known].groupby(chunk["gender"][known].astype(str),
+                                                     observed=True):
+            self.heights[gender] = self._add(self.heights.get(gender, pd.Series(dtype=np.int64)),
+                                             counts.value_counts())
+
+        pairs = chunk[["movie_id", "actor_name"]].dropna(subset=["movie_id"]).drop_duplicates()
+        pairs = pairs.astype({"movie_id": np.int64, "actor_name": object})
+        partition = pairs["movie_id"].to_numpy() % self.partitions
+        for p in np.unique(partition):
+            path = os.path.join(self.spill_dir, f"pairs-{p}-{len(self._spilled[p])}-{id(self)}.feather")
+            table = pa.Table.from_pandas(pairs[partition == p], preserve_index=False)
+            feather.write_feather(table, path, compression="uncompressed")
+            self._spilled[p].append(path)
+
+    def merge(self, other: "ActorAggregates") -> "ActorAggregates":
+        """Adds other's rows to these aggregates (both must use the same partitioning)."""
+        if other.partitions != self.partitions:
+            raise Exception("Cannot merge aggregates with different partitioning.")
+        self.n_rows += other.n_rows
+        self.birth_years = self._add(self.birth_years, other.birth_years)
+        self.birth_months = self._add(self.birth_months, other.birth_months)
+        for gender, counts in other.heights.items():
+            self.heights[gender] = self._add(self.heights.get(gender, pd.Series(dtype=np.int64)),
+                                             counts)
+        for p in range(self.partitions):
+            self._spilled[p].extend(other._spilled[p])
+        self._spill_dirs.extend(other._spill_dirs)
+        other._spilled = [[] for _ in range(other.partitions)]
+        other._spill_dirs = []
+        return self
+
+    def finish(self) -> None:
+        """
+        Reduces the spilled pairs, one partition at a time, to the number of
+        movies per distinct actor count, then deletes the spill directories
+        (including those of merged aggregates).
+        """
+        totals = pd.Series(dtype=np.int64)
+        for paths in self._spilled:
+            if not paths:
+                continue
+            pairs = pd.concat([feather.read_feather(path) for path in paths], ignore_index=True)
+            per_movie = pairs.groupby("movie_id")["actor_name"].nunique()
+            totals = self._add(totals, per_movie.value_counts())
+            del pairs, per_movie
+        self._actor_counts = totals
+        self._spilled = [[] for _ in range(self.partitions)]
+        for spill_dir in self._spill_dirs:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        self._spill_dirs = []
+        self.birth_years = self.birth_years.sort_index()
+        self.birth_months = self.birth_months.sort_index()
+        self.heights = {gender: counts.sort_index() for gender, counts in self.heights.items()}
+
+    def actor_count(self) -> pd.DataFrame:
+        if self._actor_counts is None:
+            raise Exception("Aggregates are not finished.")
+        counts = self._actor_counts.sort_index()
+        return pd.DataFrame({"Number_of_Actors": counts.index.astype(np.int64),
+                             "Movie_Count": counts.to_numpy(dtype=np.int64)})
+
+    def ages(self, mode: str = "Y") -> pd.DataFrame:
+        if mode == "M":
+            return pd.DataFrame({"Birth_Month": self.birth_months.index.astype(int),
+                                 "Count": self.birth_months.to_numpy()})
+        return pd.DataFrame({"Birth_Year": self.birth_years.index.astype(int),
+                             "Count": self.birth_years.to_numpy()})
+
+    def _height_slice(self, gender: str, min_height: float,
+                      max_height: float) -> Tuple[np.ndarray, np.ndarray]:
+        counts = self.heights.get(gender, pd.Series(dtype=np.float64))
+        values = counts.index.to_numpy()
+        # Compare in the heights' own dtype, as HeightIndex does.
+        lo = np.searchsorted(values, values.dtype.type(min_height), side="left")
+        hi = np.searchsorted(values, values.dtype.type(max_height), side="right")
+        return values[lo:hi], counts.to_numpy()[lo:hi]
+
+    def height_histogram(self, gender: str, min_height: float, max_height: float,
+                         bins: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        values, counts = self._height_slice(gender, min_height, max_height)
+        return sorted_histogram(values, counts, min_height, max_height, bins)
+
+    def nbytes(self) -> int:
+        tables = [self.birth_years, self.birth_months] + list(self.heights.values())
+        if self._actor_counts is not None:
+            tables.append(self._actor_counts)
+        return int(sum(t.memory_usage(index=True) for t in tables))
+
+
+def spill_partitions(input_bytes: int, avg_line_bytes: float, memory_budget: int) -> int:
+    """Partitions needed so one partition's pairs fit in half of the budget."""
+    pairs = input_bytes / max(1.0, avg_line_bytes)
+    return max(1, int(np.ceil(pairs * MEMORY_PER_PAIR / (memory_budget / 2))))
+
+
+def new_spill_dir(parent: Optional[str] = None) -> str:
+    if parent is not None:
+        os.makedirs(parent, exist_ok=True)
+    return tempfile.mkdtemp(prefix="actor-pairs-", dir=parent)
@@ -0,0 +1,96 @@
+"""
+sampling.py
+
+Constant-time random movie draws. A MovieIndex maps every movie to its
+movies_df row, the row of its plot summary in summaries_df and its genre codes,
+and keeps the candidate rows of each restriction (movies with a summary, movies
+of a genre, or both) as arrays, so drawing a movie is one random position.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.facets import Facet
+
+
+class MovieIndex:
+    """
+    - movie_ids[row] is the movie ID of movies_df row `row`.
+    - summary_rows[row] is the summaries_df row of its summary, or -1 if it has none
+      (the first one wins when a movie has several).
+    - genres is the "genres" Facet, whose CSR slice of a row gives its genre codes.
+    """
+
+    def __init__(self, movie_ids: np.ndarray, summary_ids: np.ndarray, genres: Facet):
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.genres = genres
+        self._order = np.argsort(self.movie_ids, kind="stable")
+        self._sorted_ids = self.movie_ids[self._order]
+
+        summary_ids = np.asarray(summary_ids, dtype=np.int64)
+        summary_order = np.argsort(summary_ids, kind="stable")
+        sorted_summary_ids = summary_ids[summary_order]
+        pos = np.searchsorted(sorted_summary_ids, self.movie_ids)
+        found = pos < len(sorted_summary_ids)
+        found[found] = sorted_summary_ids[pos[found]] == self.movie_ids[found]
+        self.summary_rows = np.full(len(self.movie_ids), -1, dtype=np.int64)
+        self.summary_rows[found] = summary_order[pos[found]]
+
+        self._pools: Dict[Tuple[Optional[str], bool], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.movie_ids)
+
+    def row_of(self, movie_id: int) -> int:
+        """movies_df row of a movie ID, or -1 if it is unknown."""
+        pos = np.searchsorted(self._sorted_ids, movie_id)
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == movie_id:
+            return int(self._order[pos])
+        return -1
+
+    def rows_of(self, movie_ids: np.ndarray) -> np.ndarray:
+        """Vectorized row_of."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        if not len(self._sorted_ids):
+            return np.full(len(movie_ids), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted_ids, movie_ids), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[pos] == movie_ids, self._order[pos], -1)
+
+    def lookup(self, movie_id: int) -> Tuple[int, int, np.ndarray]:
+        """Returns (movies_df row, summaries_df row or -1, genre codes) of a movie ID."""
+        row = self.row_of(movie_id)
+        if row < 0:
+            raise Exception(f"Unknown movie_id: {movie_id}")
+        genres = self.genres
+        return row, int(self.summary_rows[row]), genres.codes[genres.indptr[row]:genres.indptr[row + 1]]
+
+    def pool(self, genre: Optional[str] = None, with_summary: bool = False) -> np.ndarray:
+        """Sorted movies_df rows eligible for a draw, built once per restriction."""
+        key = (genre, with_summary)
+        rows = self._pools.get(key)
+        if rows is None:
+            if genre is None:
+                rows = np.arange(len(self.movie_ids))
+            else:
+                code = self.genres.code_of.get(genre)
+                rows = (np.empty(0, dtype=np.int64) if code is None
+                        else np.unique(self.genres.rows[self.genres.codes == code]).astype(np.int64))
+            if with_summary:
+                rows = rows[self.summary_rows[rows] >= 0]
+            self._pools[key] = rows
+        return rows
+
+    def sample(self, rng: np.random.Generator, k: int = 1, genre: Optional[str] = None,
+               with_summary: bool = False) -> np.ndarray:
+        """Draws k distinct eligible movies_df rows."""
+        rows = self.pool(genre, with_summary)
+        if k > len(rows):
+            raise Exception(f"Cannot draw {k} distinct movies from {len(rows)} candidates.")
+        if k == 1:
+            return rows[rng.integers(len(rows), size=1)]
+        return rows[rng.choice(len(rows), size=k, replace=False)]
+
+    def nbytes(self) -> int:
+        return (self.movie_ids.nbytes + self._order.nbytes + self._sorted_ids.nbytes
+                + self.summary_rows.nbytes + sum(rows.nbytes for rows in self._pools.values()))
@@ -0,0 +1,181 @@
+"""
+search.py
+
+BM25 full-text search over the plot summaries.
+
+SearchIndex is an inverted index in CSR form: the postings of term t are
+docs[offsets[t]:offsets[t + 1]] (summaries_df rows, ascending) with their
+term frequencies in tfs. It is built block by block with vectorized pandas
+string operations, and saved as .npy files plus a vocabulary file and a
+manifest next to the frame cache (see save_arrays in src/cache.py). A saved
+index is opened with memory-mapped postings, so startup reads only the
+vocabulary and a query touches only the postings of its terms.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_arrays, save_arrays
+
+# Bump whenever tokenizing or the file layout changes, so old indexes are rebuilt.
+SEARCH_SCHEMA_VERSION = 1
+
+ARRAYS = ["offsets", "docs", "tfs", "doc_lengths"]
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+STOPWORDS = frozenset("""
+a an and are as at be but by for from had has have he her hers him his i in into is it
+its of on or she so than that the their them then there they this to was were which
+who whom will with
+""".split())
+
+# BM25 parameters (the usual defaults).
+K1 = 1.2
+B = 0.75
+
+BLOCK_DOCS = 2000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of text, without stopwords."""
+    return [t for t in re.findall(TOKEN_PATTERN, text.lower()) if t not in STOPWORDS]
+
+
+def query_terms(query: str) -> List[str]:
+    """The distinct tokens of a query, in order."""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def snippet(text: str, query: str, width: int = 200) -> str:
+    """About width characters of text around the first occurrence of a query term."""
+    terms = query_terms(query)
+    found = re.search(r"\b(" + "|".join(map(re.escape, terms)) + r")\b", text,
+                      flags=re.IGNORECASE) if terms else None
+    if found is None or len(text) <= width:
+        return text[:width] + ("..." if len(text) > width else "")
+    start = max(0, min(found.start() - width // 3, len(text) - width))
+    return (("..." if start > 0 else "") + text[start:start + width]
+            + ("..." if start + width < len(text) else ""))
+
+
+def _block_postings(texts: pd.Series, first_doc: int,
+                    vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(term ids, docs, tfs, doc lengths) of one block of texts; new terms are added to vocab."""
+    tokens = texts.fillna("").astype(str).str.lower().str.findall(TOKEN_PATTERN)
+    flat = tokens.explode().dropna()
+    flat = flat[~flat.isin(STOPWORDS)]
+    local_docs = flat.index.to_numpy(dtype=np.int64)
+    doc_lengths = np.bincount(local_docs, minlength=len(texts)).astype(np.int32)
+
+    codes, uniques = pd.factorize(flat.to_numpy())
+    term_ids = np.empty(len(uniques), dtype=np.int32)
+    for i, term in enumerate(uniques):
+        term_ids[i] = vocab.setdefault(term, len(vocab))
+
+    # One entry per distinct (doc, term), ordered by doc.
+    keys, tfs = np.unique(local_docs * len(uniques) + codes, return_counts=True)
+    docs = (keys // max(1, len(uniques))).astype(np.int32) + first_doc
+    terms = term_ids[keys % max(1, len(uniques))]
+    return terms, docs, np.minimum(tfs, np.iinfo(np.uint16).max).astype(np.uint16), doc_lengths
+
+
+class SearchIndex:
+    """
+    - terms[t] is the term with ID t, and vocab maps it back.
+    - offsets (int64, len(terms) + 1) delimits each term's postings in
+      docs (int32, ascending per term) and tfs (uint16).
+    - doc_lengths[d] is the number of indexed tokens of doc d.
+    """
+
+    def __init__(self, terms: List[str], offsets: np.ndarray, docs: np.ndarray,
+                 tfs: np.ndarray, doc_lengths: np.ndarray):
+        self.terms = terms
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.n_docs = len(doc_lengths)
+        self.avgdl = float(doc_lengths.mean()) if self.n_docs else 0.0
+        # The document-length part of the BM25 denominator, per doc.
+        self._norms = (K1 * (1 - B + B * doc_lengths / max(self.avgdl, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts: pd.Series, block_docs: int = BLOCK_DOCS) -> "SearchIndex":
+        texts = texts.reset_index(drop=True)
+        vocab: Dict[str, int] = {}
+        parts = [_block_postings(texts.iloc[start:start + block_docs].reset_index(drop=True),
+                                 start, vocab)
+                 for start in range(0, len(texts), block_docs)]
+        if parts:
+            terms, docs, tfs, doc_lengths = (np.concatenate(arrays) for arrays in zip(*parts))
+        else:
+            terms, docs = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+            tfs, doc_lengths = np.zeros(0, dtype=np.uint16), np.zeros(0, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+        return cls(list(vocab), offsets, docs[order], tfs[order], doc_lengths)
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(docs, tfs) of a term; empty if it never occurs."""
+        t = self.vocab.get(term)
+        if t is None:
+            return self.docs[:0], self.tfs[:0]
+        return self.docs[self.offsets[t]:self.offsets[t + 1]], self.tfs[self.offsets[t]:self.offsets[t + 1]]
+
+    def idf(self, df: int) -> float:
+        return float(np.log(1 + (self.n_docs - df + 0.5) / (df + 0.5)))
+
+    def search(self, query: str, k: int = 10, allowed: Optional[np.ndarray] = None,
+               require_all: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (docs, scores) of the k best BM25 matches of query, best
+        first (ties by doc). With require_all only docs containing every
+        query term match; allowed is an optional boolean mask over docs.
+        """
+        terms = query_terms(query)
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        hits = np.zeros(self.n_docs, dtype=np.int16)
+        for term in terms:
+            docs, tfs = self.postings(term)
+            tf = tfs.astype(np.float32)
+            scores[docs] += self.idf(len(docs)) * tf * (K1 + 1) / (tf + self._norms[docs])
+            hits[docs] += 1
+        if not terms:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        match = hits == len(terms) if require_all else hits > 0
+        if allowed is not None:
+            match &= allowed
+        candidates = np.flatnonzero(match)
+        if len(candidates) > k:
+            candidates = np.sort(candidates[np.argpartition(-scores[candidates], k - 1)[:k]])
+        order = np.lexsort((candidates, -scores[candidates]))
+        best = candidates[order]
+        return best, scores[best]
+
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.docs.nbytes + self.tfs.nbytes
+                   + self.doc_lengths.nbytes + self._norms.nbytes)
+
+
+def load_index(index_dir: str, sources: dict) -> Optional[SearchIndex]:
+    """
+    Opens a saved index with memory-mapped arrays if its manifest matches the
+    schema version and the source fingerprint, otherwise returns None.
+    """
+    saved = load_arrays(index_dir, {"schema_version": SEARCH_SCHEMA_VERSION, "sources": sources})
+    if saved is None:
+        return None
+    arrays, texts, _ = saved
+    return SearchIndex(texts["terms"].split("\n") if texts["terms"] else [], **arrays)
+
+
+def save_index(index: SearchIndex, index_dir: str, sources: dict) -> None:
+    save_arrays(index_dir, {name: getattr(index, name) for name in ARRAYS},
+                {"schema_version": SEARCH_SCHEMA_VERSION, "sources": sources,
+                 "n_docs": index.n_docs, "n_terms": len(index.terms)},
+                texts={"terms": "\n".join(index.terms)})
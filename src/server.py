@@ -0,0 +1,329 @@
+"""
+server.py
+
+Headless JSON-over-HTTP access to a shared MovieAnalyzer.
+
+The dataset is loaded once per process. An asyncio server parses requests on
+the event loop and runs the queries on a pool of worker threads, which share
+the analyzer read-only (as the Streamlit sessions do; see src/shared.py), so
+a slow query never blocks other connections. Identical requests that arrive
+while one is in flight are coalesced: they wait for the same result instead
+of running the query again. Results are serialized to JSON on the worker,
+once per coalesced group, and the serialized responses of deterministic
+requests are kept in a byte-bounded LRU (see src/memo.py), since encoding a
+large frame costs far more than the memoized query behind it.
+
+With --processes N, N server processes accept connections on the same port
+(SO_REUSEPORT, so POSIX only) and attach to one copy of the frames in the
+shared store (see src/sharedstore.py) instead of loading one each; every
+server moves to a newly published version within a second. --shared-store
+does the same for a single process, e.g. next to the Streamlit app.
+
+    python -m src.server --port 8000 --workers 4
+    python -m src.server --port 8000 --processes 4 --workers 2
+
+    GET /movie_type?N=10
+    GET /actor_count
+    GET /actor_distributions?gender=F&min_height=1.6&max_height=1.9
+    GET /releases?genre=Drama
+    GET /ages?mode=M
+    GET /random_movie?genre=Comedy&with_summary=true&seed=1
+    GET /health, /stats (request counters) and /metrics (Prometheus text)
+
+Query parameters are validated by the methods themselves; a value they
+reject returns 400 with {"error": message}, and any other failure 500.
+Successful responses are {"result": ...}, with frames as lists of records. The load-test script is
+benchmarks/load_test.py.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from src.memo import QueryCache
+from src.metrics import registry
+
+# path -> (MovieAnalyzer method, accepted query parameters)
+ENDPOINTS: Dict[str, Tuple[str, List[str]]] = {
+    "/movie_type": ("movie_type", ["N"]),
+    "/actor_count": ("actor_count", []),
+    "/actor_distributions": ("actor_distributions", ["gender", "max_height", "min_height"]),
+    "/releases": ("releases", ["genre"]),
+    "/ages": ("ages", ["mode"]),
+    "/random_movie": ("get_random_movie_info", ["genre", "with_summary", "seed"]),
+}
+
+# Draws without a seed must not share a result.
+UNSEEDED = {"/random_movie"}
+
+MAX_HEADER_BYTES = 16 * 1024
+
+# How often a server on the shared store looks for a newer version.
+VERSION_CHECK_SECONDS = 1.0
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__}.")
+
+
+def to_json(result) -> bytes:
+    """{"result": result} as JSON, with frames as lists of records."""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        body = result.to_json(orient="records")
+    else:
+        body = json.dumps(result, default=_default)
+    return b'{"result":' + body.encode("utf-8") + b"}"
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+class QueryServer:
+    """
+    Serves ENDPOINTS of one analyzer. workers threads run the queries
+    (default: one per core); coalesce=False runs every request on its own.
+    Up to response_cache_bytes of serialized responses are reused (0 disables it).
+    """
+
+    def __init__(self, analyzer, workers: Optional[int] = None, coalesce: bool = True,
+                 response_cache_bytes: int = 64 * 2**20):
+        self.analyzer = analyzer
+        self.workers = workers or os.cpu_count() or 1
+        self.coalesce = coalesce
+        self.responses = QueryCache(max_bytes=response_cache_bytes)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="QueryServer")
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self._version_checked = self.started
+
+    @staticmethod
+    def _run(analyzer, method: str, params: dict) -> Tuple[int, bytes]:
+        """Runs one query on a worker thread."""
+        try:
+            return 200, to_json(getattr(analyzer, method)(**params))
+        except ValidationError as e:
+            return 400, _error(str(e))
+        except Exception as e:
+            # The methods reject bad arguments with plain Exceptions; any
+            # other type is a fault of the server, not of the request.
+            if type(e) is Exception:
+                return 400, _error(str(e) or type(e).__name__)
+            return 500, _error(f"{type(e).__name__}: {e}")
+
+    async def query(self, path: str, params: Dict[str, str]) -> Tuple[int, bytes]:
+        """Status and JSON body of a request for one of ENDPOINTS."""
+        method, accepted = ENDPOINTS[path]
+        unknown = set(params) - set(accepted)
+        if unknown:
+            return 400, _error(f"Unknown parameters: {sorted(unknown)}")
+        loop = asyncio.get_running_loop()
+        # The version is part of the key, so a query that finishes after the
+        # server moved to a newer one cannot store or share a stale response.
+        analyzer = self.analyzer
+        if path in UNSEEDED and "seed" not in params:
+            return await loop.run_in_executor(self._pool, self._run, analyzer, method, params)
+        key = (path, analyzer.shared_version) + tuple(sorted(params.items()))
+        found, body = self.responses.get(key)
+        if found:
+            return 200, body
+        pending = self._in_flight.get(key) if self.coalesce else None
+        if pending is not None:
+            self.coalesced += 1
+            # shield: one waiter's cancellation must not cancel the others'.
+            return await asyncio.shield(pending)
+        future = asyncio.ensure_future(
+            loop.run_in_executor(self._pool, self._run, analyzer, method, params))
+        if self.coalesce:
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        status, body = await asyncio.shield(future)
+        if status == 200:
+            self.responses.put(key, body)
+        return status, body
+
+    async def follow_shared_store(self) -> None:
+        """
+        Moves to the live version of the shared store if a newer one has been
+        published. Queries already running finish on the analyzer they started on.
+        """
+        now = time.monotonic()
+        if (self.analyzer.shared_version is None
+                or now - self._version_checked < VERSION_CHECK_SECONDS):
+            return
+        self._version_checked = now
+        if self.analyzer.shared_outdated():
+            loop = asyncio.get_running_loop()
+            self.analyzer = await loop.run_in_executor(self._pool, self.analyzer.attach_latest)
+            self.responses.clear()
+
+    def stats(self) -> dict:
+        cache = self.responses.stats()
+        return {"requests": self.requests, "coalesced": self.coalesced, "errors": self.errors,
+                "cached": cache["hits"], "in_flight": len(self._in_flight), "workers": self.workers,
+                "uptime_seconds": time.monotonic() - self.started, "pid": os.getpid(),
+                "shared_version": self.analyzer.shared_version}
+
+    async def respond(self, method: str, target: str) -> Tuple[int, str, bytes]:
+        """(status, content type, body) of one request."""
+        url = urlsplit(target)
+        if method != "GET":
+            return 405, "application/json", _error("Only GET is supported.")
+        if url.path == "/health":
+            return 200, "application/json", b'{"status":"ok"}'
+        if url.path == "/stats":
+            return 200, "application/json", json.dumps(self.stats()).encode("utf-8")
+        if url.path == "/metrics":
+            return 200, "text/plain; version=0.0.4", registry.to_prometheus().encode("utf-8")
+        if url.path not in ENDPOINTS:
+            return 404, "application/json", _error(f"Unknown endpoint: {url.path}")
+        await self.follow_shared_store()
+        start = time.perf_counter()
+        status, body = await self.query(url.path, dict(parse_qsl(url.query)))
+        registry.record(f"http{url.path.replace('/', '.')}", time.perf_counter() - start,
+                        error=status != 200)
+        return status, "application/json", body
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """Serves HTTP/1.1 requests on one connection (kept alive unless asked not to)."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                # Request bodies are not used, but must be consumed.
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                try:
+                    status, content_type, body = await self.respond(method, target)
+                except Exception as e:
+                    status, content_type, body = 500, "application/json", _error(str(e))
+                if status >= 400:
+                    self.errors += 1
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + body)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000,
+                    reuse_port: bool = False) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port,
+                                          limit=MAX_HEADER_BYTES, reuse_port=reuse_port or None)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(server: QueryServer, host: str, port: int, reuse_port: bool = False) -> None:
+    listener = await server.start(host, port, reuse_port=reuse_port)
+    address = listener.sockets[0].getsockname()
+    print(f"Serving on http://{address[0]}:{address[1]} with {server.workers} workers "
+          f"(process {os.getpid()})")
+    async with listener:
+        await listener.serve_forever()
+
+
+def _run_server(analyzer, args: argparse.Namespace) -> None:
+    server = QueryServer(analyzer, workers=args.workers, coalesce=not args.no_coalesce,
+                         response_cache_bytes=int(args.response_cache_mb * 2**20))
+    try:
+        asyncio.run(serve(server, args.host, args.port, reuse_port=args.processes > 1))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def _server_process(args: argparse.Namespace) -> None:
+    """One of the --processes servers after the first: attaches to the published frames."""
+    from src.movie_analyzer import MovieAnalyzer
+
+    _run_server(MovieAnalyzer(download_dir=args.download_dir, shared_store=True), args)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.movie_analyzer import MovieAnalyzer
+
+    parser = argparse.ArgumentParser(description="JSON HTTP API over MovieAnalyzer queries.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="query threads (default: one per core)")
+    parser.add_argument("--no-coalesce", action="store_true",
+                        help="run identical concurrent requests separately")
+    parser.add_argument("--response-cache-mb", type=float, default=64,
+                        help="serialized responses kept for reuse (0 disables)")
+    parser.add_argument("--download-dir", default=None)
+    parser.add_argument("--processes", type=int, default=1,
+                        help="server processes on the port, sharing one copy of the data")
+    parser.add_argument("--shared-store", action="store_true",
+                        help="attach to the shared store (implied by --processes > 1)")
+    args = parser.parse_args(argv)
+
+    print("Loading data...")
+    # The first process loads and publishes (unless a matching version
+    # exists); the others only attach once it has.
+    analyzer = MovieAnalyzer(download_dir=args.download_dir,
+                             shared_store=args.shared_store or args.processes > 1 or None)
+    analyzer.wait_until_loaded()
+    # Exit through the finally below on terminate() too, so the other processes are stopped.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    others = [multiprocessing.Process(target=_server_process, args=(args,), daemon=True)
+              for _ in range(args.processes - 1)]
+    for process in others:
+        process.start()
+    try:
+        _run_server(analyzer, args)
+    finally:
+        for process in others:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+shards.py
+
+Parallel parsing of the extracted corpus files.
+
+A file is cut into byte ranges that start and end on line boundaries, each
+range is parsed on its own by a worker thread, and the partial frames are
+concatenated in file order. None of the corpus files has records spanning
+lines, so the shards hold exactly the rows of a single read_csv; the frame
+is also the same as long as the parser fixes the dtype of every column that
+inference could read differently from shard to shard (see MOVIE_DTYPES and
+ACTOR_DTYPES in src/movie_analyzer.py).
+pandas' C parser tokenizes with the GIL released, so threads give real
+parallelism without pickling frames back from worker processes.
+"""
+
+import io
+import os
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+# Files below this size per shard are not worth splitting further.
+MIN_SHARD_BYTES = 4 * 2**20
+
+
+def parse_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def line_shards(path: str, n_shards: int,
+                min_bytes: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Splits a file into at most n_shards (start, end) byte ranges of about
+    equal size (and at least min_bytes each), every one ending just after
+    a newline or at the end of the file. min_bytes defaults to MIN_SHARD_BYTES.
+    """
+    min_bytes = MIN_SHARD_BYTES if min_bytes is None else min_bytes
+    size = os.path.getsize(path)
+    n_shards = max(1, min(n_shards, size // max(1, min_bytes)))
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_shards):
+            target = max(bounds[-1], size * i // n_shards)
+            f.seek(target)
+            # Move the cut past the end of the line it falls in.
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def read_range(path: str, start: int, end: int) -> io.BytesIO:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return io.BytesIO(f.read(end - start))
+
+
+def read_sharded(path: str, parse: Callable[[object], pd.DataFrame], pool: Executor,
+                 n_shards: int, min_bytes: Optional[int] = None) -> pd.DataFrame:
+    """
+    Parses path with parse(source) over line-aligned shards on pool and
+    concatenates the parts in order. A file too small to split is parsed
+    directly from its path.
+    """
+    shards = line_shards(path, n_shards, min_bytes)
+    if len(shards) <= 1:
+        return parse(path)
+    futures = [pool.submit(lambda s, e: parse(read_range(path, s, e)), start, end)
+               for start, end in shards]
+    return pd.concat([future.result() for future in futures], ignore_index=True)
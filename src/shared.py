@@ -0,0 +1,61 @@
+"""
+shared.py
+
+Process-wide MovieAnalyzer shared by every Streamlit page, session and rerun.
+Streamlit re-executes page scripts on every widget change, but imported modules
+stay in memory, so keeping the analyzer here means the corpus is parsed once
+per process instead of once per interaction.
+
+The shared analyzer must be treated as read-only: query methods never mutate
+the loaded frames, and callers should not either.
+
+With $MOVIE_ANALYZER_SHARED_STORE=1 the frames are attached from the host's
+shared store (see src/sharedstore.py), so several Streamlit processes hold a
+single copy, and a newly published version is picked up on the next call.
+"""
+
+import threading
+from typing import Optional
+
+from src.movie_analyzer import MovieAnalyzer
+
+_lock = threading.Lock()
+_analyzer: Optional[MovieAnalyzer] = None
+
+
+def get_analyzer() -> MovieAnalyzer:
+    """
+    Returns the process-wide MovieAnalyzer, loading it on first use (or
+    attaching to a newer version of the shared store once one is published).
+    Concurrent first calls block on a lock so the data is only loaded once.
+    """
+    global _analyzer
+    analyzer = _analyzer
+    if analyzer is not None and not analyzer.shared_outdated():
+        return analyzer
+    with _lock:
+        if _analyzer is None:
+            _analyzer = MovieAnalyzer()
+        elif _analyzer.shared_outdated():
+            _analyzer = _analyzer.attach_latest()
+        return _analyzer
+
+
+def reload_analyzer() -> MovieAnalyzer:
+    """
+    Loads a fresh MovieAnalyzer and swaps it in once it is ready.
+    Sessions holding the previous instance keep using it until their next rerun.
+    """
+    global _analyzer
+    with _lock:
+        _analyzer = MovieAnalyzer()
+        return _analyzer
+
+
+def invalidate_analyzer() -> None:
+    """
+    Drops the shared MovieAnalyzer; the next get_analyzer() call reloads it.
+    """
+    global _analyzer
+    with _lock:
+        _analyzer = None
@@ -0,0 +1,263 @@
+"""
+sharedstore.py
+
+One copy of the parsed frames per host, shared by every worker process.
+
+A loader process publishes the frames into a versioned directory of
+uncompressed Arrow IPC files, and the other processes memory-map them
+read-only instead of parsing (or reading the Feather cache) themselves.
+Numeric columns, categorical codes and categories, and pyarrow-backed
+strings are wrapped around the mapped buffers without a copy, so their pages
+are held once in the OS page cache however many processes attach, and an
+attached frame costs a process little more than its page tables. Plain
+object columns (compact=False) are stored as strings but rebuilt as Python
+objects by every process.
+
+    <store_dir>/v<N>/manifest.json     columns, dtypes and what the frames were built from
+    <store_dir>/v<N>/<frame>.arrow     one record batch with every column of a frame
+    <store_dir>/v<N>/<frame>.<i>.arrow the categories of its i-th column, if categorical
+    <store_dir>/CURRENT                the live version number
+
+A version is complete before CURRENT is replaced (atomically, with
+os.replace), so an attacher sees the old or the new version, never half of
+one. Publishing removes all but the new and the previous version; a process
+that still has a removed version mapped keeps reading it (on POSIX the
+files live until they are unmapped).
+
+Frames built differently (other dtypes or datasets) are published to
+separate stores, named by store_name(), so that processes with different
+options do not keep replacing each other's live version.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import ipc
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, publishers are not serialized.
+    fcntl = None
+
+MANIFEST_FILENAME = "manifest.json"
+CURRENT_FILENAME = "CURRENT"
+
+
+@contextmanager
+def store_lock(store_dir: str, name: str):
+    """Exclusive advisory lock on <store_dir>/<name>.lock, held for the with block."""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, f"{name}.lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def store_name(config: dict) -> str:
+    """Directory name of the store for frames built with config (JSON-serializable)."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def current_version(store_dir: str) -> Optional[int]:
+    """The live version of the store, or None if nothing has been published."""
+    try:
+        with open(os.path.join(store_dir, CURRENT_FILENAME), encoding="utf-8") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _versions(store_dir: str) -> list:
+    found = []
+    for entry in os.listdir(store_dir):
+        if entry.startswith("v") and entry[1:].isdigit():
+            found.append(int(entry[1:]))
+    return sorted(found)
+
+
+def _write_table(path: str, table: pa.Table) -> None:
+    with pa.OSFile(path + ".tmp", "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(path + ".tmp", path)
+
+
+def _read_table(path: str) -> pa.Table:
+    return ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _combined(array) -> pa.Array:
+    """The one chunk of array as it is (combine_chunks copies even a single chunk)."""
+    if not isinstance(array, pa.ChunkedArray):
+        return array
+    return array.chunk(0) if array.num_chunks == 1 else array.combine_chunks()
+
+
+def _fast_categorical(codes: np.ndarray, categories: pd.Index) -> Optional[pd.Categorical]:
+    """
+    The Categorical of codes and categories built by pandas' private fast
+    paths (tested against the pinned pandas), or None if this version does
+    not build it as expected.
+    """
+    fastpath = getattr(pd.CategoricalDtype, "_from_fastpath", None)
+    if fastpath is None:
+        return None
+    try:
+        values = super(pd.Categorical, pd.Categorical)._simple_new(
+            codes, fastpath(categories, ordered=False))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if (not isinstance(values, pd.Categorical) or values.dtype.categories is not categories
+            or not np.shares_memory(values.codes, codes)):
+        return None
+    return values
+
+
+def _categorical(codes: np.ndarray, categories: pd.Index) -> pd.Categorical:
+    """
+    Wraps codes and categories written from a valid Categorical. The public
+    constructor checks that the categories are unique again, which builds
+    (and keeps) a hash table of all of them in every process, so the private
+    fast paths are used where they work; otherwise attaching costs that memory
+    but still works.
+    """
+    values = _fast_categorical(codes, categories)
+    if values is None:
+        values = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories),
+                                           validate=False)
+    return values
+
+
+def _column_array(series: pd.Series) -> Tuple[str, pa.Array]:
+    """(kind, Arrow array) of one column, laid out so that it can be mapped back without a copy."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category", pa.array(series.cat.codes.to_numpy())
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow":
+        return "string", _combined(pa.array(series.array))
+    if isinstance(dtype, np.dtype) and dtype.kind == "b":
+        # Arrow packs booleans into bits; bytes map back as they are.
+        return "bool", pa.array(series.to_numpy().view(np.uint8))
+    if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+        # From NumPy, NaN stays a value instead of becoming a null.
+        return "numeric", pa.array(series.to_numpy())
+    return "object", pa.Array.from_pandas(series.astype(object))
+
+
+def _write_frame(directory: str, name: str, df: pd.DataFrame) -> dict:
+    columns, arrays = [], []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        kind, array = _column_array(series)
+        if kind == "category":
+            categories = pa.Array.from_pandas(series.cat.categories.to_series(index=None))
+            _write_table(os.path.join(directory, f"{name}.{i}.arrow"),
+                         pa.table({"value": categories}))
+        columns.append({"name": str(col), "kind": kind, "dtype": str(series.dtype)})
+        arrays.append(array)
+    _write_table(os.path.join(directory, f"{name}.arrow"),
+                 pa.Table.from_arrays(arrays, names=[f"c{i}" for i in range(len(arrays))]))
+    return {"rows": len(df), "columns": columns}
+
+
+def _strings(array: pa.Array) -> pd.arrays.ArrowStringArray:
+    if array.type == pa.string():
+        array = array.cast(pa.large_string())
+    return pd.arrays.ArrowStringArray(pa.chunked_array([array], type=pa.large_string()))
+
+
+def _read_frame(directory: str, name: str, entry: dict) -> pd.DataFrame:
+    table = _read_table(os.path.join(directory, f"{name}.arrow"))
+    columns = {}
+    for i, column in enumerate(entry["columns"]):
+        array = _combined(table.column(i))
+        kind = column["kind"]
+        if kind == "category":
+            categories = _combined(
+                _read_table(os.path.join(directory, f"{name}.{i}.arrow")).column(0))
+            if pa.types.is_string(categories.type) or pa.types.is_large_string(categories.type):
+                categories = pd.Index(_strings(categories))
+            else:
+                categories = pd.Index(categories.to_pandas())
+            values = _categorical(array.to_numpy(zero_copy_only=True), categories)
+        elif kind == "string":
+            values = _strings(array)
+        elif kind == "bool":
+            values = array.to_numpy(zero_copy_only=True).view(np.bool_)
+        elif kind == "numeric":
+            values = array.to_numpy(zero_copy_only=True)
+        else:
+            # With the NaN that read_csv uses, as in the Feather cache.
+            values = array.to_pandas()
+            if column["dtype"] == "object":
+                values = values.to_numpy(dtype=object, na_value=np.nan)
+            else:
+                values = values.astype(column["dtype"]).array
+        columns[column["name"]] = values
+    if not columns:
+        return pd.DataFrame(index=pd.RangeIndex(entry["rows"]))
+    # Without columns=, which would reindex (and copy) every column.
+    return pd.DataFrame(columns, copy=False)
+
+
+def publish(store_dir: str, frames: Dict[str, pd.DataFrame], manifest: dict) -> int:
+    """
+    Writes the frames as a new version, with manifest (e.g. a schema version
+    and a source fingerprint) for attach to check, makes it the live version
+    and removes the versions before the previous one. Returns the new version.
+    """
+    with store_lock(store_dir, "publish"):
+        versions = _versions(store_dir)
+        version = (versions[-1] if versions else 0) + 1
+        directory = os.path.join(store_dir, f"v{version}")
+        os.makedirs(directory)
+        entries = {name: _write_frame(directory, name, df.reset_index(drop=True))
+                   for name, df in frames.items()}
+        manifest = dict(manifest, version=version, frames=entries)
+        with open(os.path.join(directory, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        current = os.path.join(store_dir, CURRENT_FILENAME)
+        with open(current + ".tmp", "w", encoding="utf-8") as f:
+            f.write(str(version))
+        os.replace(current + ".tmp", current)
+
+        for old in versions[:-1]:
+            shutil.rmtree(os.path.join(store_dir, f"v{old}"), ignore_errors=True)
+    return version
+
+
+def attach(store_dir: str, expected: dict) -> Optional[Tuple[int, Dict[str, pd.DataFrame]]]:
+    """
+    Memory-maps the live version read-only if every key of expected matches
+    its manifest. Returns (version, frames), or None if nothing is published
+    or the live version is stale.
+    """
+    # A version removed between reading CURRENT and opening its files is
+    # followed by a newer CURRENT, so the read is retried once.
+    for _ in range(2):
+        version = current_version(store_dir)
+        if version is None:
+            return None
+        directory = os.path.join(store_dir, f"v{version}")
+        try:
+            with open(os.path.join(directory, MANIFEST_FILENAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if any(manifest.get(key) != value for key, value in expected.items()):
+                return None
+            frames = {name: _read_frame(directory, name, entry)
+                      for name, entry in manifest["frames"].items()}
+        except (OSError, ValueError, KeyError):
+            continue
+        return version, frames
+    return None
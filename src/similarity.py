@@ -0,0 +1,153 @@
+"""
+similarity.py
+
+"More like this" over the plot summaries with TF-IDF vectors.
+
+Every summary becomes an L2-normalized sparse TF-IDF vector, with weights
+(1 + log tf) * idf over the terms of the BM25 SearchIndex (see src/search.py).
+The matrix is kept twice: by doc (each summary's terms and weights) and by
+term (the SearchIndex postings with a weight per posting), so the cosine
+similarities of a block of query summaries against all summaries are one
+sparse product, computed by expanding the queries' postings and summing them
+with np.bincount. Blocks are sized so the expanded postings stay bounded.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.cache import load_arrays, save_arrays
+from src.search import SearchIndex
+
+# Bump whenever the weighting or the file layout changes.
+SIMILARITY_SCHEMA_VERSION = 1
+
+ARRAYS = ["term_weights", "doc_offsets", "doc_terms", "doc_weights"]
+
+# Expanded (query, posting) pairs per block of queries.
+BLOCK_PAIRS = 1 << 22
+
+
+def expand_rows(offsets: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """For CSR rows, returns (index into rows, position in the CSR data) of every entry."""
+    starts = np.asarray(offsets[rows], dtype=np.int64)
+    counts = np.asarray(offsets[rows + 1], dtype=np.int64) - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    firsts = np.cumsum(counts) - counts
+    positions = np.arange(counts.sum(), dtype=np.int64) + np.repeat(starts - firsts, counts)
+    return owners, positions
+
+
+class SimilarityIndex:
+    """
+    - search: the SearchIndex whose offsets/docs give the term-major layout,
+      with term_weights[i] the weight of posting i.
+    - doc_offsets (int64) delimits each doc's doc_terms (int32, ascending)
+      and doc_weights (float32).
+    """
+
+    def __init__(self, search: SearchIndex, term_weights: np.ndarray, doc_offsets: np.ndarray,
+                 doc_terms: np.ndarray, doc_weights: np.ndarray):
+        self.search = search
+        self.term_weights = term_weights
+        self.doc_offsets = doc_offsets
+        self.doc_terms = doc_terms
+        self.doc_weights = doc_weights
+        self.n_docs = search.n_docs
+
+    @classmethod
+    def build(cls, search: SearchIndex) -> "SimilarityIndex":
+        df = np.diff(search.offsets)
+        idf = (np.log((1 + search.n_docs) / (1 + df)) + 1).astype(np.float32)
+        term_ids = np.repeat(np.arange(len(df), dtype=np.int32), df)
+        weights = (1 + np.log(search.tfs.astype(np.float32))) * idf[term_ids]
+        norms = np.sqrt(np.bincount(search.docs, weights.astype(np.float64) ** 2,
+                                    minlength=search.n_docs))
+        weights /= np.where(norms > 0, norms, 1)[search.docs].astype(np.float32)
+
+        # The same entries ordered by doc; a stable sort keeps terms ascending.
+        order = np.argsort(search.docs, kind="stable")
+        doc_offsets = np.zeros(search.n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(search.docs, minlength=search.n_docs), out=doc_offsets[1:])
+        return cls(search, weights, doc_offsets, term_ids[order], weights[order])
+
+    def vector(self, doc: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(term IDs, weights) of a doc's vector."""
+        start, end = self.doc_offsets[doc], self.doc_offsets[doc + 1]
+        return self.doc_terms[start:end], self.doc_weights[start:end]
+
+    def _block_scores(self, docs: np.ndarray) -> np.ndarray:
+        """Cosine similarities (len(docs) x n_docs) of the given docs to every doc."""
+        owners, entries = expand_rows(self.doc_offsets, docs)
+        terms = self.doc_terms[entries]
+        query_weights = self.doc_weights[entries]
+        pair_owners, postings = expand_rows(self.search.offsets, terms)
+        flat = owners[pair_owners] * self.n_docs + self.search.docs[postings]
+        values = query_weights[pair_owners] * self.term_weights[postings]
+        scores = np.bincount(flat, values, minlength=len(docs) * self.n_docs)
+        return scores.reshape(len(docs), self.n_docs)
+
+    def _blocks(self, docs: np.ndarray, block_pairs: int):
+        """Splits docs into consecutive blocks of about block_pairs expanded postings."""
+        df = np.diff(self.search.offsets)
+        cumulative = np.concatenate([[0], np.cumsum(df[self.doc_terms])])
+        costs = cumulative[self.doc_offsets[docs + 1]] - cumulative[self.doc_offsets[docs]]
+        # The dense score block is bounded too.
+        max_rows = max(1, block_pairs // max(1, self.n_docs))
+        start = 0
+        while start < len(docs):
+            end, total = start, 0
+            while end < len(docs) and end - start < max_rows and (end == start or
+                                                                   total + costs[end] <= block_pairs):
+                total += costs[end]
+                end += 1
+            yield start, end
+            start = end
+
+    def similar(self, docs: np.ndarray, k: int = 10,
+                block_pairs: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (neighbours, similarities), both len(docs) x k: each doc's k
+        most similar other docs, best first (ties by doc). Rows with fewer
+        than k docs of positive similarity are padded with -1 and 0.
+        """
+        docs = np.asarray(docs, dtype=np.int64)
+        neighbours = np.full((len(docs), k), -1, dtype=np.int64)
+        similarities = np.zeros((len(docs), k), dtype=np.float32)
+        for start, end in self._blocks(docs, block_pairs or BLOCK_PAIRS):
+            scores = self._block_scores(docs[start:end])
+            rows = np.arange(end - start)
+            scores[rows, docs[start:end]] = 0
+            # The k-th best score of each row; everything tied with it is a
+            # candidate, so ties are broken by doc rather than by partitioning.
+            if k < self.n_docs:
+                kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1]
+            else:
+                kth = np.zeros(end - start)
+            for row in rows:
+                candidates = np.flatnonzero((scores[row] >= kth[row]) & (scores[row] > 0))
+                order = np.lexsort((candidates, -scores[row, candidates]))
+                best = candidates[order][:k]
+                neighbours[start + row, :len(best)] = best
+                similarities[start + row, :len(best)] = scores[row, best]
+        return neighbours, similarities
+
+    def nbytes(self) -> int:
+        return int(self.term_weights.nbytes + self.doc_offsets.nbytes + self.doc_terms.nbytes
+                   + self.doc_weights.nbytes)
+
+
+def load_similarity(index_dir: str, search: SearchIndex, sources: dict) -> Optional[SimilarityIndex]:
+    """Opens saved TF-IDF vectors, memory-mapped, if they were built from the same sources."""
+    saved = load_arrays(index_dir, {"schema_version": SIMILARITY_SCHEMA_VERSION,
+                                    "sources": sources, "n_docs": search.n_docs,
+                                    "n_postings": len(search.docs)})
+    if saved is None:
+        return None
+    return SimilarityIndex(search, **saved[0])
+
+
+def save_similarity(index: SimilarityIndex, index_dir: str, sources: dict) -> None:
+    save_arrays(index_dir, {name: getattr(index, name) for name in ARRAYS},
+                {"schema_version": SIMILARITY_SCHEMA_VERSION, "sources": sources,
+                 "n_docs": index.n_docs, "n_postings": len(index.search.docs)})
@@ -0,0 +1,370 @@
+"""
+synthetic.py
+
+Deterministic synthetic MovieSummaries corpus for scale testing without the
+network. generate_corpus() writes the same files as the CMU archive
+(movie.metadata.tsv, character.metadata.tsv, plot_summaries.txt,
+name.clusters.txt and tvtropes.clusters.txt) into <out_dir>/MovieSummaries,
+and optionally packs them into <out_dir>/MovieSummaries.tar.gz, so
+MovieAnalyzer(download_dir=out_dir) loads it like the real corpus.
+
+The data follows the CMU schema and shape: Freebase ID:name tuple JSON,
+release dates and birthdates at day, month or year precision, missing values
+written either empty or as \\N, skewed (power-law) genre, language, country
+and actor popularity, ~5.5 characters per movie and summaries for about half
+of the movies. The same seed always produces byte-identical files, and movies
+are generated in fixed-size chunks so tens of millions of rows fit in memory.
+
+    python -m src.synthetic --scale 10 --out /tmp/synthetic --tar
+"""
+
+import argparse
+import csv
+import json
+import os
+import tarfile
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CMU_MOVIES = 81_741
+CHUNK_MOVIES = 50_000
+
+GENRES = [
+    "Drama", "Comedy", "Romance Film", "Black-and-white", "Action", "Thriller",
+    "Short Film", "World cinema", "Crime Fiction", "Indie", "Documentary", "Horror",
+    "Silent film", "Adventure", "Family Film", "Action/Adventure", "Comedy film",
+    "Musical", "Animation", "Romantic drama", "Mystery", "Science Fiction", "Fantasy",
+    "Romantic comedy", "War film", "Japanese Movies", "Western", "Crime Thriller",
+    "Period piece", "Comedy-drama", "Film adaptation", "Chinese Movies", "Biography",
+    "Psychological thriller", "Bollywood", "Sports", "Music", "Teen", "Erotic thriller",
+    "Slasher", "Family Drama", "Costume drama", "Coming of age", "Political drama",
+    "LGBT", "Historical fiction", "Anime", "Parody", "Superhero movie", "Film noir",
+]
+LANGUAGES = [
+    "English Language", "Hindi Language", "Spanish Language", "French Language",
+    "Silent film", "Italian Language", "Japanese Language", "German Language",
+    "Tamil Language", "Malayalam Language", "Mandarin Chinese", "Telugu language",
+    "Russian Language", "Cantonese", "Korean Language", "Portuguese Language",
+    "Swedish Language", "Danish Language", "Polish Language", "Dutch Language",
+    "Turkish Language", "Arabic Language", "Greek Language", "Czech Language",
+]
+COUNTRIES = [
+    "United States of America", "India", "United Kingdom", "France", "Italy", "Japan",
+    "Canada", "Germany", "Argentina", "Hong Kong", "Spain", "Australia", "South Korea",
+    "Mexico", "West Germany", "Sweden", "Denmark", "Soviet Union", "China", "Netherlands",
+    "Brazil", "Poland", "Philippines", "Turkey", "Norway", "Finland", "Ireland", "Egypt",
+]
+FIRST_NAMES = {
+    "M": ["John", "James", "Robert", "Michael", "William", "David", "Richard", "Thomas",
+          "Charles", "Joseph", "Paul", "George", "Peter", "Frank", "Jack", "Harry", "Henry",
+          "Walter", "Raj", "Kenji", "Luis", "Pierre", "Hans", "Ivan", "Marco", "Ahmed"],
+    "F": ["Mary", "Patricia", "Linda", "Barbara", "Elizabeth", "Jennifer", "Susan",
+          "Margaret", "Dorothy", "Helen", "Anna", "Grace", "Alice", "Ruth", "Emma", "Julia",
+          "Priya", "Yuki", "Maria", "Sophie", "Ingrid", "Olga", "Giulia", "Fatima"],
+}
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Miller", "Davis", "Wilson", "Moore",
+    "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", "Thompson",
+    "Garcia", "Clark", "Lewis", "Walker", "Hall", "Young", "King", "Wright", "Scott",
+    "Kapoor", "Khan", "Tanaka", "Suzuki", "Rossi", "Dubois", "Schmidt", "Ivanov", "Silva",
+    "Lopez", "Nielsen", "Kowalski", "Chen", "Wong", "Park", "Kim", "Murphy", "O'Brien",
+]
+TITLE_WORDS = [
+    "Night", "Love", "Last", "City", "Dark", "Man", "Girl", "Blood", "House", "Dream",
+    "Return", "Secret", "Lost", "Wild", "Golden", "Black", "Red", "Sea", "Road", "Star",
+    "King", "Death", "Summer", "Heart", "War", "Fire", "Shadow", "River", "Little", "Big",
+]
+SUMMARY_WORDS = (
+    "the a an his her their young old man woman family friend town city police "
+    "detective love war father mother son daughter brother sister money secret past "
+    "night day house school village army ship train island murder killer revenge "
+    "finds meets returns discovers learns decides tries escapes falls marries kills "
+    "saves leaves follows helps becomes loses wins plans hides fights travels goes "
+    "after before while when but and with from into against during about of to in "
+    "new small rich poor dangerous mysterious local famous beautiful strange lonely"
+).split()
+TROPES = [
+    "absent_minded_professor", "adventurer_archaeologist", "arrogant_kungfu_guy",
+    "big_man_on_campus", "bounty_hunter", "brainless_beauty", "broken_bird",
+    "bromantic_foil", "chanteuse", "charmer", "chief_knight", "classy_cat_burglar",
+    "coward", "crazy_jealous_guy", "dean_bitterman", "dirty_cop", "dumb_muscle",
+    "eccentric_mentor", "egomaniac_hunter", "evil_prince", "father_to_his_men",
+    "fastest_gun_in_the_west", "final_girl", "gentleman_thief", "grumpy_old_man",
+    "hardboiled_detective", "heartbroken_badass", "hitman_with_a_heart", "jerk_jock",
+    "junkie_prophet", "klutz", "loveable_rogue", "mad_scientist", "master_swordsman",
+]
+
+# The explicit null the parsers accept (na_values). A missing value is written
+# as this token with probability null_token_ratio (see _with_nulls), and
+# otherwise as an empty field, like most gaps in the CMU files.
+NULL_TOKEN = "\\N"
+
+
+_ID_DIGITS = np.array([ord(c) for c in "0123456789bcdfghjklmnpqrstvwxyz_"], dtype=np.uint32)
+
+
+def _freebase_ids(prefix: int, numbers: np.ndarray) -> np.ndarray:
+    """
+    Freebase-style IDs ("/m/0" + 8 base-32 digits), unique per (prefix, number)
+    for 1 <= prefix < 16 and numbers < 2**36, built as a code-point matrix.
+    """
+    values = np.asarray(numbers, dtype=np.int64) + (prefix << 36)
+    chars = np.empty((len(values), 12), dtype=np.uint32)
+    chars[:, :4] = [ord(c) for c in "/m/0"]
+    for position in range(11, 3, -1):
+        chars[:, position] = _ID_DIGITS[values & 31]
+        values = values >> 5
+    return chars.view("<U12").ravel()
+
+
+def _first_name(gender: str, code: int) -> str:
+    names = FIRST_NAMES.get(gender, FIRST_NAMES["M"])
+    return names[code % len(names)]
+
+
+def _zipf_weights(n: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _format_dates(year: np.ndarray, month: np.ndarray, day: np.ndarray,
+                  precision: np.ndarray) -> List[Optional[str]]:
+    out: List[Optional[str]] = []
+    for y, m, d, p in zip(year.tolist(), month.tolist(), day.tolist(), precision.tolist()):
+        if p == 3:
+            out.append(f"{y:04d}-{m:02d}-{d:02d}")
+        elif p == 2:
+            out.append(f"{y:04d}-{m:02d}")
+        elif p == 1:
+            out.append(f"{y:04d}")
+        else:
+            out.append(None)
+    return out
+
+
+def _random_dates(rng: np.random.Generator, years: np.ndarray,
+                  shares=(0.15, 0.35, 0.05, 0.45)) -> tuple:
+    """(year, month, day, precision) with precision drawn from shares (none, year, month, day)."""
+    n = len(years)
+    precision = rng.choice(4, size=n, p=shares).astype(np.int8)
+    month = rng.integers(1, 13, size=n)
+    day = rng.integers(1, 29, size=n)
+    return years, month, day, precision
+
+
+def _tuples(rng: np.random.Generator, vocab: List[str], ids: List[str], weights: np.ndarray,
+            counts: np.ndarray) -> List[str]:
+    """Freebase ID:name tuple JSON objects with counts[i] distinct skewed values each."""
+    picks = rng.choice(len(vocab), size=(len(counts), int(counts.max(initial=0))), p=weights)
+    out = []
+    for row, count in zip(picks.tolist(), counts.tolist()):
+        chosen = dict.fromkeys(row[:count])  # distinct, in draw order
+        out.append(json.dumps({ids[code]: vocab[code] for code in chosen}))
+    return out
+
+
+def _with_nulls(rng: np.random.Generator, values: List[Optional[str]],
+                null_token_ratio: float) -> List[str]:
+    tokens = rng.random(len(values)) < null_token_ratio
+    return [(NULL_TOKEN if token else "") if value is None else value
+            for value, token in zip(values, tokens.tolist())]
+
+
+def _write_tsv(f, columns: Dict[str, list]) -> None:
+    pd.DataFrame(columns).to_csv(f, sep="\t", header=False, index=False,
+                                 quoting=csv.QUOTE_NONE, lineterminator="\n")
+
+
+class _Actors:
+    """The actor pool: attributes of every actor, drawn once from the seed."""
+
+    def __init__(self, seed: int, n: int):
+        rng = np.random.default_rng([seed, 1])
+        self.n = n
+        self.gender = rng.choice(np.array(["M", "F", ""]), size=n, p=[0.6, 0.3, 0.1])
+        self.first = rng.integers(0, 1 << 16, size=n)
+        self.last = rng.integers(0, len(LAST_NAMES), size=n)
+        height = np.where(self.gender == "F", rng.normal(1.65, 0.07, n), rng.normal(1.79, 0.08, n))
+        self.height = np.where(rng.random(n) < 0.35, np.round(height, 3), np.nan)
+        years = 1850 + rng.beta(4.0, 1.6, size=n) * 125 + rng.normal(0, 8, size=n)
+        self.birth = _random_dates(rng, np.clip(years, 1850, 2005).astype(np.int64),
+                                   shares=(0.25, 0.05, 0.02, 0.68))
+        self.ethnicity = np.where(rng.random(n) < 0.25, rng.integers(0, 400, size=n), -1)
+
+    def names(self, actors: np.ndarray) -> List[str]:
+        out = []
+        for gender, first, last in zip(self.gender[actors].tolist(), self.first[actors].tolist(),
+                                       self.last[actors].tolist()):
+            out.append(f"{_first_name(gender, first)} {LAST_NAMES[last]}")
+        return out
+
+    def pick(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        # u**3 puts most picks on a small set of prolific actors.
+        return np.minimum((rng.random(size) ** 3 * self.n).astype(np.int64), self.n - 1)
+
+
+def generate_corpus(
+    out_dir: str,
+    n_movies: int = CMU_MOVIES,
+    seed: int = 0,
+    tar: bool = False,
+    null_token_ratio: float = 0.1,
+    summary_words: int = 95,
+) -> str:
+    """
+    Writes a synthetic corpus of n_movies movies into <out_dir>/MovieSummaries
+    (and <out_dir>/MovieSummaries.tar.gz if tar) and returns the folder path.
+    """
+    folder = os.path.join(out_dir, "MovieSummaries")
+    os.makedirs(folder, exist_ok=True)
+    actors = _Actors(seed, max(1, int(n_movies * 1.65)))
+    vocabularies = []
+    for k, vocab in enumerate((LANGUAGES, COUNTRIES, GENRES)):
+        vocabularies.append((vocab, _freebase_ids(10 + k, np.arange(len(vocab))).tolist(),
+                             _zipf_weights(len(vocab))))
+    languages, countries, genres = vocabularies
+    # Sampled character rows for the cluster files: (name, map ID, movie ID, title, actor).
+    sampled: List[tuple] = []
+
+    with open(os.path.join(folder, "movie.metadata.tsv"), "w", encoding="utf-8") as movies_f, \
+            open(os.path.join(folder, "character.metadata.tsv"), "w",
+                 encoding="utf-8") as chars_f, \
+            open(os.path.join(folder, "plot_summaries.txt"), "w", encoding="utf-8") as plots_f:
+        for chunk, start in enumerate(range(0, n_movies, CHUNK_MOVIES)):
+            rng = np.random.default_rng([seed, 2, chunk])
+            n = min(CHUNK_MOVIES, n_movies - start)
+            index = np.arange(start, start + n, dtype=np.int64)
+            movie_ids = 330 + index * 7 + rng.integers(0, 7, size=n)
+
+            # Movies: more releases in recent decades.
+            years = (1888 + rng.beta(4.0, 1.6, size=n) * 125).astype(np.int64)
+            release = _random_dates(rng, years, shares=(0.08, 0.42, 0.02, 0.48))
+            release_dates = _format_dates(*release)
+            words = rng.integers(0, len(TITLE_WORDS), size=(n, 3))
+            titles = [f"The {TITLE_WORDS[a]} {TITLE_WORDS[b]}" if c % 3 else
+                      f"{TITLE_WORDS[a]} of the {TITLE_WORDS[b]}" for a, b, c in words.tolist()]
+            revenue = np.where(rng.random(n) < 0.1,
+                               np.exp(rng.normal(16, 2, size=n)).astype(np.int64), -1)
+            runtime = np.where(rng.random(n) < 0.75, np.clip(rng.normal(95, 25, n), 5, 600), np.nan)
+            tuple_columns = []
+            for (vocab, ids, weights), p_empty, max_count in zip(
+                    vocabularies, (0.17, 0.1, 0.03), (2, 2, 5)):
+                counts = np.where(rng.random(n) < p_empty, 0, rng.integers(1, max_count + 1, n))
+                tuple_columns.append(_tuples(rng, vocab, ids, weights, counts))
+            _write_tsv(movies_f, {
+                "movie_id": movie_ids,
+                "freebase_id": _freebase_ids(1, index),
+                "title": titles,
+                "release_date": _with_nulls(rng, release_dates, null_token_ratio),
+                "revenue": _with_nulls(rng, [str(r) if r >= 0 else None for r in revenue.tolist()],
+                                       null_token_ratio),
+                "runtime": _with_nulls(rng, [None if np.isnan(r) else f"{r:.1f}"
+                                             for r in runtime.tolist()], null_token_ratio),
+                "languages": tuple_columns[0],
+                "countries": tuple_columns[1],
+                "genres": tuple_columns[2],
+            })
+
+            # Characters: a skewed number per movie, drawn from the actor pool.
+            per_movie = np.minimum(rng.geometric(0.155, size=n) - 1, 60)
+            movie_of = np.repeat(np.arange(n), per_movie)
+            m = len(movie_of)
+            row_numbers = (start * 64 + np.arange(m)).astype(np.int64)
+            cast = actors.pick(rng, m)
+            birth = tuple(part[cast] for part in actors.birth)
+            ages = release[0][movie_of] - birth[0]
+            ages = np.where((birth[3] > 0) & (release[3][movie_of] > 0) & (ages >= 0) & (ages < 100)
+                            & (rng.random(m) < 0.95), ages, -1)
+            names_known = rng.random(m) < 0.43
+            character_names = [
+                _first_name(gender, code) if known else None
+                for known, gender, code in zip(names_known.tolist(), actors.gender[cast].tolist(),
+                                               rng.integers(0, 1 << 16, size=m).tolist())
+            ]
+            map_ids = _freebase_ids(2, row_numbers)
+            character_ids = _freebase_ids(3, row_numbers)
+            actor_names = actors.names(cast)
+            ethnicity = actors.ethnicity[cast]
+            _write_tsv(chars_f, {
+                "movie_id": movie_ids[movie_of],
+                "freebase_id": _freebase_ids(1, index[movie_of]),
+                "movie_date": _with_nulls(rng, [release_dates[i] for i in movie_of.tolist()],
+                                          null_token_ratio),
+                "character_name": _with_nulls(rng, character_names, null_token_ratio),
+                "birthdate": _with_nulls(rng, _format_dates(*birth), null_token_ratio),
+                "gender": _with_nulls(rng, [g or None for g in actors.gender[cast].tolist()],
+                                      null_token_ratio),
+                "height": _with_nulls(rng, [None if np.isnan(h) else f"{h:g}"
+                                            for h in actors.height[cast].tolist()],
+                                      null_token_ratio),
+                "ethnicity": _with_nulls(rng, [None if e < 0 else i for e, i in zip(
+                    ethnicity.tolist(), _freebase_ids(4, np.maximum(ethnicity, 0)).tolist())],
+                    null_token_ratio),
+                "actor_name": actor_names,
+                "age": _with_nulls(rng, [str(a) if a >= 0 else None for a in ages.tolist()],
+                                   null_token_ratio),
+                "map_id": map_ids,
+                "character_id": _with_nulls(rng, [c if known else None for c, known in zip(
+                    character_ids.tolist(), names_known.tolist())], null_token_ratio),
+                "actor_id": _freebase_ids(5, cast),
+            })
+            for i in np.flatnonzero(names_known & (rng.random(m) < 0.01)).tolist():
+                sampled.append((character_names[i], str(map_ids[i]), int(movie_ids[movie_of[i]]),
+                                titles[movie_of[i]], actor_names[i]))
+
+            # Plot summaries for about half of the movies, of varying length.
+            has_summary = np.flatnonzero(rng.random(n) < 0.52)
+            lengths = np.maximum(5, rng.lognormal(np.log(summary_words), 0.6,
+                                                  size=len(has_summary))).astype(np.int64)
+            word_codes = rng.integers(0, len(SUMMARY_WORDS), size=int(lengths.sum()))
+            bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+            summaries = []
+            for k in range(len(has_summary)):
+                text = " ".join(SUMMARY_WORDS[w] for w in word_codes[bounds[k]:bounds[k + 1]])
+                summaries.append(text[0].upper() + text[1:] + ".")
+            _write_tsv(plots_f, {"movie_id": movie_ids[has_summary], "summary": summaries})
+
+    _write_clusters(folder, sampled, np.random.default_rng([seed, 3]))
+    if tar:
+        with tarfile.open(os.path.join(out_dir, "MovieSummaries.tar.gz"), "w:gz") as archive:
+            archive.add(folder, arcname="MovieSummaries")
+    return folder
+
+
+def _write_clusters(folder: str, sampled: List[tuple], rng: np.random.Generator) -> None:
+    """name.clusters.txt (names used in 2+ movies) and tvtropes.clusters.txt, keyed by map ID."""
+    by_name: Dict[str, List[tuple]] = {}
+    for row in sampled:
+        by_name.setdefault(row[0], []).append(row)
+    with open(os.path.join(folder, "name.clusters.txt"), "w", encoding="utf-8") as f:
+        for name, rows in by_name.items():
+            if len({row[2] for row in rows}) >= 2:
+                f.writelines(f"{name}\t{row[1]}\n" for row in rows)
+    tropes = rng.integers(0, len(TROPES), size=len(sampled)).tolist()
+    order = sorted(range(len(sampled)), key=lambda i: (tropes[i], i))
+    with open(os.path.join(folder, "tvtropes.clusters.txt"), "w", encoding="utf-8") as f:
+        for i in order:
+            name, map_id, _, title, actor = sampled[i]
+            f.write(f"{TROPES[tropes[i]]}\t" + json.dumps(
+                {"char": name, "movie": title, "id": map_id, "actor": actor}) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic MovieSummaries corpus.")
+    parser.add_argument("--out", required=True, help="download directory to write into")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--movies", type=int, default=None)
+    size.add_argument("--scale", type=float, default=1.0,
+                      help="size as a multiple of the CMU corpus (81,741 movies)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tar", action="store_true", help="also write MovieSummaries.tar.gz")
+    args = parser.parse_args(argv)
+    n_movies = args.movies if args.movies is not None else round(args.scale * CMU_MOVIES)
+    folder = generate_corpus(args.out, n_movies, seed=args.seed, tar=args.tar)
+    print(f"Wrote {n_movies:,} movies to {folder}")
+
+
+if __name__ == "__main__":
+    main()
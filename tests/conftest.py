@@ -0,0 +1,173 @@
+import json
+import os
+import tarfile
+
+import pytest
+
+MOVIES = [
+    # movie_id, freebase_id, title, release_date, revenue, runtime, languages, countries, genres
+    (975900, "/m/03vyhn", "Ghosts of Mars", "2001-08-24", "14010832", "98.0",
+     {"/m/02h40lc": "English Language"}, {"/m/09c7w0": "United States of America"},
+     {"/m/01jfsb": "Thriller", "/m/06n90": "Science Fiction", "/m/03npn": "Horror"}),
+    (3196793, "/m/08yl5d", "Getting Away with Murder", "2000-02-16", "", "95.0",
+     {"/m/02h40lc": "English Language"}, {"/m/09c7w0": "United States of America"},
+     {"/m/02n4kr": "Mystery", "/m/07s9rl0": "Drama"}),
+    (28463795, "/m/0crgdbh", "Brun bitter", "1988", "", "83.0",
+     {"/m/05f_3": "Norwegian Language"}, {"/m/05b4w": "Norway"},
+     {"/m/0lsxr": "Crime Fiction", "/m/07s9rl0": "Drama"}),
+    (9363483, "/m/0285_cd", "White Of The Eye", "1987", "", "110.0",
+     {"/m/02h40lc": "English Language"}, {"/m/07ssc": "United Kingdom"},
+     {"/m/01jfsb": "Thriller", "/m/0glj9q": "Erotic thriller"}),
+    (261236, "/m/01mrr1", "A Woman in Flames", "1983", "", "106.0",
+     {"/m/04306rv": "German Language"}, {"/m/0345h": "Germany"},
+     {"/m/07s9rl0": "Drama"}),
+    (13696889, "/m/03cfc81", "The Gangsters", "1913-05-29", "", "35.0",
+     {"/m/06ppq": "Silent film", "/m/02h40lc": "English Language"},
+     {"/m/09c7w0": "United States of America"},
+     {"/m/02hmvc": "Short Film", "/m/06ppq": "Silent film", "/m/01z4y": "Comedy"}),
+    (18998739, "/m/04jcqvw", "The Sorcerer's Apprentice", "2002", "", "86.0",
+     {"/m/02h40lc": "English Language"}, {"/m/0hzlz": "South Africa"},
+     {"/m/0hqxf": "Family Film", "/m/01hmnh": "Fantasy", "/m/02l7c8": "Romance Film"}),
+    (10408933, "/m/02qc0j7", "Alexander's Ragtime Band", "1938-08-16", "3600000", "106.0",
+     {"/m/02h40lc": "English Language"}, {"/m/09c7w0": "United States of America"},
+     {"/m/04t36": "Musical", "/m/01z4y": "Comedy", "/m/04p5fxn": "Black-and-white"}),
+    (6631279, "/m/0gffwj", "Little city", "1997-04-04", "", "93.0",
+     {"/m/02h40lc": "English Language"}, {"/m/09c7w0": "United States of America"},
+     {"/m/06cvj": "Romantic comedy", "/m/02l7c8": "Romance Film", "/m/01z4y": "Comedy",
+      "/m/07s9rl0": "Drama"}),
+    (171005, "/m/016ywb", "Henry V", "1989-11-08", "10161099", "137.0",
+     {"/m/02h40lc": "English Language"}, {"/m/07ssc": "United Kingdom"},
+     {}),
+]
+
+CHARACTERS = [
+    # movie_id, movie fb id, movie_date, character, birthdate, gender, height,
+    # ethnicity, actor, age, char/actor map id, character id, actor id
+    (975900, "/m/03vyhn", "2001-08-24", "Akooshay", "1958-08-26", "F", "1.62", "",
+     "Wanda De Jesus", "42", "/m/0bgchxw", "/m/0bgcj3x", "/m/03wcfv7"),
+    (975900, "/m/03vyhn", "2001-08-24", "Lieutenant Melanie Ballard", "1974-08-15", "F",
+     "1.78", "/m/044038p", "Natasha Henstridge", "27", "/m/0jys3m", "/m/0bgchn4",
+     "/m/0346l4"),
+    (975900, "/m/03vyhn", "2001-08-24", "Desolation Williams", "1969-06-15", "M", "1.727",
+     "/m/0x67", "Ice Cube", "32", "/m/0jys3g", "/m/0bgchn_", "/m/01vw26l"),
+    (975900, "/m/03vyhn", "2001-08-24", "Sgt Jericho Butler", "1967-09-12", "M", "1.75", "",
+     "Jason Statham", "33", "/m/02vchl6", "/m/0bgchnq", "/m/034hyc"),
+    (975900, "/m/03vyhn", "2001-08-24", "Bashira Kincaid", "1977-09-25", "F", "1.65", "",
+     "Clea DuVall", "23", "/m/02vbb3r", "/m/0bgchp9", "/m/01y9xg"),
+    (3196793, "/m/08yl5d", "2000-02-16", "", "1950-07", "M", "", "",
+     "Dan Aykroyd", "49", "/m/0k1x6c", "", "/m/012_53"),
+    (3196793, "/m/08yl5d", "2000-02-16", "", "1941-04", "F", "1.6", "",
+     "Lily Tomlin", "58", "/m/0k1x6h", "", "/m/0152wh"),
+    (28463795, "/m/0crgdbh", "1988", "Kim", "1954", "M", "1.8", "",
+     "Kjersti Holmen", "", "/m/0gw3bm2", "/m/0gw3bm6", "/m/09r_wb"),
+    (9363483, "/m/0285_cd", "1987", "Joan White", "1957-06-16", "F", "1.75", "",
+     "Cathy Moriarty", "30", "/m/0jy9q0", "/m/0jy9q5", "/m/02j_sp"),
+    (9363483, "/m/0285_cd", "1987", "Paul White", "1952-11-08", "M", "1.83", "",
+     "David Keith", "34", "/m/0jy9qc", "/m/0jy9qh", "/m/0342h2"),
+    (261236, "/m/01mrr1", "1983", "Eva", "1955-01-27", "F", "", "",
+     "Gudrun Landgrebe", "28", "/m/02tb0c5", "/m/0h2wp9c", "/m/0b_71r"),
+    (13696889, "/m/03cfc81", "1913-05-29", "", "1893-05-31", "M", "", "",
+     "Fred Mace", "20", "/m/02vchl3", "", "/m/0bw2s1"),
+    (18998739, "/m/04jcqvw", "2002", "Morgana", "1960-02-22", "F", "1.68", "",
+     "Kelly Le Brock", "41", "/m/0k3w9c", "/m/0k3wcx", "/m/05d3ww"),
+    (18998739, "/m/04jcqvw", "2002", "Merlin", "1940-05-03", "M", "1.8", "",
+     "Robert Davi", "", "/m/0k3wbn", "/m/0k3wbs", "/m/025m5g"),
+    (10408933, "/m/02qc0j7", "1938-08-16", "Stella Kirby", "1912-12-24", "F", "1.55", "",
+     "Ethel Merman", "25", "/m/0k6fkc", "/m/0k6fkg", "/m/02y_3c"),
+    (10408933, "/m/02qc0j7", "1938-08-16", "Roger Grant", "1907-06-23", "M", "1.88", "",
+     "Tyrone Power", "31", "/m/0k6fk4", "/m/0k6fk8", "/m/0346l4"),
+    (6631279, "/m/0gffwj", "1997-04-04", "Adam", "1970-07-19", "M", "1.8", "",
+     "Jon Bon Jovi", "26", "/m/0k4gwd", "/m/0k4gwh", "/m/03wcfv7"),
+    (6631279, "/m/0gffwj", "1997-04-04", "Nina", "", "F", "2.3", "",
+     "Josie Bissett", "", "/m/0k4gw_", "/m/0k4gx3", "/m/03wcfv8"),
+    (171005, "/m/016ywb", "1989-11-08", "Henry V", "1960-12-10", "M", "1.77", "",
+     "Kenneth Branagh", "28", "/m/0k3w9h", "/m/0k3w9l", "/m/01y9xg"),
+    (171005, "/m/016ywb", "1989-11-08", "Fluellen", "1934-01-30", "", "", "",
+     "Ian Holm", "55", "/m/0k3w9p", "/m/0k3w9t", "/m/01vw26l"),
+]
+
+SUMMARIES = [
+    (975900, "Set in the second half of the 22nd century, the film depicts Mars as "
+             "a planet colonized by humans. A police unit must escort a prisoner by train."),
+    (3196793, "The film is about a man who suspects his elderly neighbour is a "
+              "Nazi war criminal and plans a murder."),
+    (9363483, "A series of murders of rich young women throughout Arizona bring in "
+              "detective Charles Mendoza. The killer leaves a distinctive calling card."),
+    (261236, "Eva, an upper class housewife, becomes frustrated and leaves her "
+             "husband to start a new life as a high class prostitute."),
+    (18998739, "Every hundred years, the evil Morgana returns to claim Fort Roderick, "
+               "and a young apprentice must stop her with the help of Merlin."),
+    (171005, "The young King Henry V leads his army into France, and after a heist "
+             "of supplies the battle of Agincourt decides the war. A train of carts follows."),
+]
+
+TROPES = [
+    # trope, {char, movie, id (char/actor map id), actor}
+    ("badass", {"char": "Desolation Williams", "movie": "Ghosts of Mars", "id": "/m/0jys3g",
+                "actor": "Ice Cube"}),
+    ("badass", {"char": "Sgt Jericho Butler", "movie": "Ghosts of Mars", "id": "/m/02vchl6",
+                "actor": "Jason Statham"}),
+    ("badass", {"char": "Henry V", "movie": "Henry V", "id": "/m/0k3w9h",
+                "actor": "Kenneth Branagh"}),
+    ("absent_minded_professor", {"char": "Merlin", "movie": "The Sorcerer's Apprentice",
+                                 "id": "/m/0k3wbn", "actor": "Robert Davi"}),
+    # Not in the character table.
+    ("absent_minded_professor", {"char": "Professor Keenbean", "movie": "Richie Rich",
+                                 "id": "/m/0zzzz1", "actor": "Michael McShane"}),
+]
+
+NAME_CLUSTERS = [
+    # name, char/actor map id
+    ("White", "/m/0jy9q0"),
+    ("White", "/m/0jy9qc"),
+    ("Kim", "/m/0gw3bm2"),
+    ("Kim", "/m/0zzzz2"),
+]
+
+
+def _tsv_line(values):
+    cells = []
+    for value in values:
+        if isinstance(value, dict):
+            cells.append(json.dumps(value))
+        else:
+            cells.append(str(value))
+    return "\t".join(cells) + "\n"
+
+
+def _replicate(rows, copies):
+    """Repeats rows with distinct movie IDs, to build larger corpora."""
+    for copy in range(copies):
+        for row in rows:
+            yield (row[0] + copy * 100_000_000,) + tuple(row[1:])
+
+
+def write_corpus(download_dir, copies=1):
+    """
+    Writes a tiny schema-faithful MovieSummaries corpus (folder and tarball)
+    into download_dir and returns the path of the extracted folder.
+    copies > 1 repeats every row under fresh movie IDs.
+    """
+    folder = os.path.join(download_dir, "MovieSummaries")
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "movie.metadata.tsv"), "w", encoding="utf-8") as f:
+        f.writelines(_tsv_line(row) for row in _replicate(MOVIES, copies))
+    with open(os.path.join(folder, "character.metadata.tsv"), "w", encoding="utf-8") as f:
+        f.writelines(_tsv_line(row) for row in _replicate(CHARACTERS, copies))
+    with open(os.path.join(folder, "plot_summaries.txt"), "w", encoding="utf-8") as f:
+        f.writelines(_tsv_line(row) for row in _replicate(SUMMARIES, copies))
+    with open(os.path.join(folder, "tvtropes.clusters.txt"), "w", encoding="utf-8") as f:
+        f.writelines(_tsv_line(row) for row in TROPES)
+    with open(os.path.join(folder, "name.clusters.txt"), "w", encoding="utf-8") as f:
+        f.writelines(_tsv_line(row) for row in NAME_CLUSTERS)
+    with tarfile.open(os.path.join(download_dir, "MovieSummaries.tar.gz"), "w:gz") as tar:
+        tar.add(folder, arcname="MovieSummaries")
+    return folder
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    """A download directory holding the tiny corpus, so no network is needed."""
+    download_dir = str(tmp_path / "downloads")
+    write_corpus(download_dir)
+    return download_dir
@@ -0,0 +1,26 @@
+import os
+import shutil
+
+import pandas as pd
+
+from src.movie_analyzer import MovieAnalyzer
+
+
+def test_archive_mode_matches_extracted_files(corpus_dir):
+    extracted = MovieAnalyzer(download_dir=corpus_dir, use_cache=False)
+    shutil.rmtree(os.path.join(corpus_dir, "MovieSummaries"))
+
+    streamed = MovieAnalyzer(download_dir=corpus_dir, use_cache=False, extract=False)
+    streamed.wait_until_loaded()
+    assert not os.path.exists(os.path.join(corpus_dir, "MovieSummaries"))
+    pd.testing.assert_frame_equal(streamed.movies_df, extracted.movies_df)
+    pd.testing.assert_frame_equal(streamed.actors_df, extracted.actors_df)
+    pd.testing.assert_frame_equal(streamed.summaries_df, extracted.summaries_df)
+
+
+def test_archive_mode_skips_unrequested_members(corpus_dir):
+    analyzer = MovieAnalyzer(download_dir=corpus_dir, extract=False, datasets=["movies"])
+    assert len(analyzer.movies_df) > 0
+    assert analyzer.actors_df.empty
+    assert analyzer.summaries_df.empty
+    assert analyzer.movie_type(N=3)["Count"].sum() > 0
@@ -0,0 +1,27 @@
+from benchmarks.bench_queries import QUERIES, compare, main, run
+
+
+def test_run_covers_loading_and_every_query(tmp_path):
+    results = run([0.001], str(tmp_path), repeat=1, log=lambda line: None)
+    names = {key.split("/", 1)[1] for key in results}
+    assert names == {"load_parse", "load_cache"} | set(QUERIES)
+    for entry in results.values():
+        assert entry["seconds"] > 0 and entry["rows"] > 0 and entry["peak_bytes"] >= 0
+
+
+def test_compare_flags_results_beyond_threshold_and_missing_from_baseline():
+    baseline = {"1x/q": {"seconds": 1.0, "peak_bytes": 100}}
+    assert compare({"1x/q": {"seconds": 1.4, "peak_bytes": 140}}, baseline, 1.5) == []
+    regressions = compare({"1x/q": {"seconds": 2.0, "peak_bytes": 100},
+                           "1x/new": {"seconds": 9.0, "peak_bytes": 9}}, baseline, 1.5)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("1x/q seconds")
+    assert regressions[1] == "1x/new: missing from the baseline"
+
+
+def test_main_saves_baseline_then_passes_against_it(tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    args = ["--scales", "0.001", "--repeat", "1", "--root", str(tmp_path / "corpora"),
+            "--baseline", baseline]
+    assert main(args + ["--save-baseline"]) == 0
+    assert main(args + ["--threshold", "1000"]) == 0
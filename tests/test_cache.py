@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+import pytest
+
+import src.cache as cache
+from src.movie_analyzer import MovieAnalyzer
+
+
+def _fail_parse(self):
+    raise AssertionError("raw files were parsed despite a valid cache")
+
+
+def test_cache_is_reused_and_matches_parse(corpus_dir, monkeypatch):
+    parsed = MovieAnalyzer(download_dir=corpus_dir)
+    assert os.path.exists(os.path.join(corpus_dir, "cache", cache.MANIFEST_FILENAME))
+
+    monkeypatch.setattr(MovieAnalyzer, "_parse_data", _fail_parse)
+    cached = MovieAnalyzer(download_dir=corpus_dir)
+    pd.testing.assert_frame_equal(cached.movies_df, parsed.movies_df)
+    pd.testing.assert_frame_equal(cached.actors_df, parsed.actors_df)
+    pd.testing.assert_frame_equal(cached.summaries_df, parsed.summaries_df)
+
+
+@pytest.mark.parametrize("change", ["source", "schema"])
+def test_cache_invalidation(corpus_dir, monkeypatch, change):
+    MovieAnalyzer(download_dir=corpus_dir)
+    if change == "source":
+        with open(os.path.join(corpus_dir, "MovieSummaries", "plot_summaries.txt"), "a") as f:
+            f.write("1\tA late addition.\n")
+    else:
+        monkeypatch.setattr(cache, "CACHE_SCHEMA_VERSION", cache.CACHE_SCHEMA_VERSION + 1)
+
+    calls = []
+    original = MovieAnalyzer._parse_data
+    monkeypatch.setattr(MovieAnalyzer, "_parse_data", lambda self: calls.append(1) or original(self))
+    MovieAnalyzer(download_dir=corpus_dir)
+    assert calls == [1]
@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama import Client
+
+from src.classifier import (ResultCache, ThinkFilter, classify_movies, parse_reply, stream_reply,
+                            strip_thinking)
+
+MOVIES = [
+    {"movie_id": 1, "title": "A", "summary": "A detective hunts a killer.",
+     "genres_list": ["Thriller", "Crime Fiction"]},
+    {"movie_id": 2, "title": "B", "summary": "Two friends fall in love.",
+     "genres_list": ["Romance Film"]},
+    {"movie_id": 3, "title": "C", "summary": "Robots invade Mars.",
+     "genres_list": ["Science Fiction", "Action"]},
+    {"movie_id": 4, "title": "D", "summary": "FAIL ONCE. A haunted house.",
+     "genres_list": ["Horror"]},
+]
+
+
+def fake_reply(prompt):
+    """Answers 'Thriller' for detectives, otherwise echoes the database genres."""
+    database = prompt.rsplit("Database Genres:", 1)[1].strip()
+    genres = "Thriller" if "detective" in prompt else database
+    verdict = "YES" if genres == database else "NO"
+    return (f"<think>The summary says {prompt[-40:]!r}.</think>\n"
+            f"I've identified the genres: {genres}\nDo they match the database? {verdict}")
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """Minimal Ollama /api/chat endpoint that tracks concurrency and calls."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = "FAIL ONCE" in prompt and prompt not in server.failed
+            server.failed.add(prompt)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if body.get("stream"):
+            self._stream(body["model"], fake_reply(prompt) + server.trailer)
+            return
+        if fail:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps({"model": body["model"], "created_at": "2024-01-01T00:00:00Z",
+                              "message": {"role": "assistant", "content": fake_reply(prompt)},
+                              "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except BrokenPipeError:  # the client timed out
+            pass
+
+
+    def _stream(self, model, reply):
+        """Sends the reply as NDJSON chunks of 3 characters, counting the chunks sent."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i in range(0, len(reply), 3):
+                line = json.dumps({"model": model, "created_at": "2024-01-01T00:00:00Z",
+                                   "message": {"role": "assistant", "content": reply[i:i + 3]},
+                                   "done": False}).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                with self.server.lock:
+                    self.server.chunks_sent += 1
+                time.sleep(self.server.chunk_delay)
+            done = json.dumps({"model": model, "created_at": "2024-01-01T00:00:00Z",
+                               "message": {"role": "assistant", "content": ""},
+                               "done": True}).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(done), done))
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.lock:
+                self.server.disconnected = True
+
+
+@pytest.fixture
+def chat_server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    httpd.lock = threading.Lock()
+    httpd.calls = httpd.in_flight = httpd.max_in_flight = 0
+    httpd.failed = set()
+    httpd.delay = 0.05
+    httpd.trailer = ""
+    httpd.chunks_sent = 0
+    httpd.chunk_delay = 0.0
+    httpd.disconnected = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_parse_reply():
+    reply = strip_thinking("<think>hmm\nmaybe</think>\nI've identified the genres: Drama, Comedy\n"
+                           "Do they match the database? **NO**")
+    assert reply.startswith("I've identified")
+    assert parse_reply(reply) == (["Drama", "Comedy"], False)
+    assert parse_reply("no idea") == ([], None)
+    # Only the whole word counts as a verdict.
+    assert parse_reply("Do they match the database? Nothing to compare.") == ([], None)
+    assert parse_reply("Do they match the database? Yesterday's list, yes.") == ([], None)
+
+
+def test_batch_is_bounded_retried_cached_and_reported(chat_server, tmp_path):
+    host = f"http://127.0.0.1:{chat_server.server_port}"
+    path = str(tmp_path / "results.jsonl")
+    results, report = classify_movies(MOVIES, host=host, model="fake", concurrency=2,
+                                      backoff=0.01, cache=ResultCache(path))
+    assert chat_server.max_in_flight <= 2
+    assert chat_server.calls == len(MOVIES) + 1  # one retry
+    assert report["classified"] == 4 and report["failed"] == 0 and report["cached"] == 0
+    assert report["throughput"] > 0
+    assert report["match_rate"] == 0.75
+    by_id = results.set_index("movie_id")
+    assert by_id.loc[1, "predicted"] == ["Thriller"]
+    assert by_id.loc[1, "overlap"] == 0.5
+    assert by_id.loc[3, "verdict"]
+
+    # A rerun with the same model and prompt sends nothing.
+    calls = chat_server.calls
+    results, report = classify_movies(MOVIES, host=host, model="fake", cache=ResultCache(path))
+    assert chat_server.calls == calls
+    assert report["cached"] == 4 and len(results) == 4
+    # Another model is a different cache key.
+    classify_movies(MOVIES[:1], host=host, model="other", cache=ResultCache(path))
+    assert chat_server.calls == calls + 1
+
+
+def test_failures_are_reported_not_cached(chat_server, tmp_path):
+    host = f"http://127.0.0.1:{chat_server.server_port}"
+    cache = ResultCache(str(tmp_path / "results.jsonl"))
+    results, report = classify_movies(MOVIES[3:], host=host, model="fake", retries=0,
+                                      cache=cache)
+    assert report["failed"] == 1 and len(results) == 0
+    assert cache.results == {}
+
+
+def test_timeouts_count_as_failures(chat_server):
+    chat_server.delay = 1.0
+    host = f"http://127.0.0.1:{chat_server.server_port}"
+    _, report = classify_movies(MOVIES[:1], host=host, model="fake", timeout=0.2, retries=0)
+    assert report["failed"] == 1
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_think_filter_matches_strip_thinking(size):
+    reply = ("<think>\nLet me see... <thin or </th not yet.\n</think>\n\n"
+             "I've identified the genres: Drama <b>\n<think>again</think>Do they match? NO\n")
+    think = ThinkFilter()
+    chunks = [think.feed(reply[i:i + size]) for i in range(0, len(reply), size)]
+    streamed = "".join(chunks) + think.flush()
+    assert streamed.strip() == strip_thinking(reply)
+    assert "think" not in "".join(chunks)
+
+
+def test_stream_hides_thinking_and_stops_after_verdict(chat_server):
+    chat_server.trailer = "\n(END OF FORMAT)" + " padding" * 200
+    chat_server.chunk_delay = 0.002
+    client = Client(host=f"http://127.0.0.1:{chat_server.server_port}")
+    prompt = "Movie Summary:\nRobots.\n\nDatabase Genres:\nAction"
+    parts = list(stream_reply(client.chat, prompt, model="fake"))
+    text = "".join(parts)
+    assert len(parts) > 1
+    assert text.strip() == ("I've identified the genres: Action\nDo they match the database? YES")
+    # Generation was cut off well before the trailer was sent.
+    time.sleep(0.2)
+    assert chat_server.chunks_sent < len(fake_reply(prompt) + chat_server.trailer) // 3 / 2
+
+
+def test_stream_without_early_stop_returns_everything(chat_server):
+    chat_server.trailer = "\nThat is all."
+    client = Client(host=f"http://127.0.0.1:{chat_server.server_port}")
+    prompt = "Movie Summary:\nRobots.\n\nDatabase Genres:\nAction"
+    text = "".join(stream_reply(client.chat, prompt, model="fake", stop_at_verdict=False))
+    assert text.strip() == strip_thinking(fake_reply(prompt) + chat_server.trailer)
+
+
+@pytest.mark.parametrize("chunks, shown, sent", [
+    # Words starting with a verdict are no verdict: everything is streamed.
+    (["Do they match the database? ", "Yes", "terday's list.", "\nMore"], None, 4),
+    (["Do they match the database? ", "NO", "T really.", "\nMore"], None, 4),
+    # A verdict split across chunks stops the stream once a non-word follows it.
+    (["Do they match the database? ", "YE", "S", "\nMore", "\nAnd more"],
+     "Do they match the database? YES", 4),
+    (["Do they match the database? ", "NO"], "Do they match the database? NO", 2),
+])
+def test_stream_waits_for_the_whole_verdict_word(chunks, shown, sent):
+    received = []
+
+    def chat(model, messages, stream):
+        for chunk in chunks:
+            received.append(chunk)
+            yield {"message": {"content": chunk}}
+
+    text = "".join(stream_reply(chat, "prompt", model="fake"))
+    assert text.strip() == (shown or "".join(chunks))
+    assert len(received) == sent
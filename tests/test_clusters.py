@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.clusters import MapIdIndex
+from src.movie_analyzer import MovieAnalyzer
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def test_map_id_index_resolves_ids_to_first_rows():
+    index = MapIdIndex(pd.Series(["/m/a", None, "/m/b", "/m/a"], dtype="string[pyarrow]"))
+    assert index.rows(["/m/b", "/m/a", "/m/x"]).tolist() == [2, 0, -1]
+    assert index.row("/m/a") == 0
+
+
+def test_trope_characters_join_actor_data(analyzer):
+    assert analyzer.tropes().values.tolist() == [["badass", 3], ["absent_minded_professor", 2]]
+    badass = analyzer.trope_characters("badass")
+    assert badass["actor_name"].tolist() == ["Ice Cube", "Jason Statham", "Kenneth Branagh"]
+    assert badass["movie_id"].tolist() == [975900, 975900, 171005]
+    np.testing.assert_allclose(badass["height"], [1.727, 1.75, 1.77], rtol=1e-6)
+    assert badass["age"].tolist() == [32, 33, 28]
+    assert badass["birth_year"].tolist() == [1969, 1967, 1960]
+
+    # Characters missing from the character table keep their cluster data.
+    professors = analyzer.trope_characters("absent_minded_professor")
+    assert professors["character_name"].tolist() == ["Merlin", "Professor Keenbean"]
+    assert professors["movie_id"].isna().tolist() == [False, True]
+    with pytest.raises(Exception):
+        analyzer.trope_characters("no_such_trope")
+
+
+def test_movies_sharing_character(analyzer):
+    white = analyzer.movies_sharing_character("White")
+    assert white["movie_id"].tolist() == [9363483, 9363483]
+    assert white["title"].tolist() == ["White Of The Eye"] * 2
+    assert white["release_year"].tolist() == [1987, 1987]
+    assert white["character_name"].tolist() == ["Joan White", "Paul White"]
+    # The unknown map ID is left out.
+    assert analyzer.movies_sharing_character("Kim")["movie_id"].tolist() == [28463795]
+
+
+def test_clusters_from_archive_and_slim_frames(corpus_dir, analyzer):
+    streamed = MovieAnalyzer(download_dir=corpus_dir, extract=False, use_cache=False)
+    pd.testing.assert_frame_equal(streamed.trope_characters("badass"),
+                                  analyzer.trope_characters("badass"))
+    slim = MovieAnalyzer(download_dir=corpus_dir, skip_unused_columns=True, use_cache=False)
+    pd.testing.assert_frame_equal(slim.movies_sharing_character("White"),
+                                  analyzer.movies_sharing_character("White"))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from src.compact import UNUSED_COLUMNS
+from src.movie_analyzer import MovieAnalyzer
+from tests.conftest import write_corpus
+
+
+def test_compact_frames_are_smaller_with_same_answers(tmp_path):
+    download_dir = str(tmp_path / "downloads")
+    write_corpus(download_dir, copies=50)
+    wide = MovieAnalyzer(download_dir=download_dir, use_cache=False, compact=False)
+    slim = MovieAnalyzer(download_dir=download_dir, use_cache=False)
+
+    assert slim.actors_df["height"].dtype == np.float32
+    assert isinstance(slim.actors_df["gender"].dtype, pd.CategoricalDtype)
+    assert slim.memory_report()["bytes"].sum() < wide.memory_report()["bytes"].sum() / 2
+
+    pd.testing.assert_frame_equal(slim.releases("Drama"), wide.releases("Drama"),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(slim.ages("M"), wide.ages("M"), check_dtype=False)
+    assert (slim.actor_distributions("M", 1.8, 1.7)["actor_name"].astype(str).tolist()
+            == wide.actor_distributions("M", 1.8, 1.7)["actor_name"].tolist())
+
+
+def test_memory_report_lists_columns_and_built_indexes(corpus_dir):
+    analyzer = MovieAnalyzer(download_dir=corpus_dir, skip_unused_columns=True)
+    assert not set(UNUSED_COLUMNS["actors"]) & set(analyzer.actors_df.columns)
+    # The map and actor IDs the cluster and co-star joins read are kept.
+    assert {"map_id", "actor_id"} <= set(analyzer.actors_df.columns)
+
+    report = analyzer.memory_report()
+    assert list(report.columns) == ["frame", "column", "dtype", "bytes"]
+    assert "filter_index" not in set(report["column"])
+    analyzer.releases()
+    report = analyzer.memory_report()
+    assert {"movies", "actors", "summaries", "facets", "indexes"} <= set(report["frame"])
+    assert "filter_index" in set(report["column"])
+
+
+def test_skipped_movie_columns_are_dropped_after_the_facets(corpus_dir):
+    full = MovieAnalyzer(download_dir=corpus_dir, use_cache=False)
+    for extract in (True, False):
+        slim = MovieAnalyzer(download_dir=corpus_dir, use_cache=False, extract=extract,
+                             skip_unused_columns=True)
+        assert not set(UNUSED_COLUMNS["movies"]) & set(slim.movies_df.columns)
+        pd.testing.assert_frame_equal(slim.movie_type(5), full.movie_type(5))
+        assert slim.count_movies({"genre": "Drama"}) == full.count_movies({"genre": "Drama"})
+
+
+def test_text_is_parsed_into_pyarrow_strings_chunk_by_chunk(corpus_dir, monkeypatch):
+    whole = MovieAnalyzer(download_dir=corpus_dir, use_cache=False)
+    monkeypatch.setattr("src.compact.PARSE_CHUNK_ROWS", 4)
+    chunked = MovieAnalyzer(download_dir=corpus_dir, use_cache=False)
+    for name in ["movies", "actors", "summaries"]:
+        pd.testing.assert_frame_equal(getattr(chunked, f"{name}_df"), getattr(whole, f"{name}_df"))
+    assert chunked.summaries_df["summary"].dtype == "string[pyarrow]"
+
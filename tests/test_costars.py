@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.costars import CostarGraph
+from src.movie_analyzer import MovieAnalyzer
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def _graph(cast):
+    """A graph from {movie_id: [actor IDs]}."""
+    rows = [(movie, actor) for movie, actors in cast.items() for actor in actors]
+    movies, actors = zip(*rows)
+    return CostarGraph.build(pd.Series(actors), pd.Series(actors), pd.Series(movies), block_pairs=4)
+
+
+def test_adjacency_counts_shared_movies_across_blocks():
+    graph = _graph({1: ["a", "b", "c"], 2: ["a", "b"], 3: ["d", "e"], 4: ["f"]})
+    costars, weights = graph.costars(graph.actor_code("a"))
+    assert [graph.actor_ids[c] for c in costars] == ["b", "c"]
+    assert weights.tolist() == [2, 1]
+    # Symmetric, without self-loops.
+    dense = np.zeros((graph.n_actors, graph.n_actors), dtype=int)
+    for actor in range(graph.n_actors):
+        neighbours, shared = graph.costars(actor)
+        dense[actor, neighbours] = shared
+    assert (dense == dense.T).all() and not dense.diagonal().any()
+    assert sorted(graph.component_sizes().tolist()) == [1, 2, 3]
+
+
+def test_shortest_path_is_shortest():
+    # A chain a-b-c-d-e plus a shortcut b-e.
+    graph = _graph({1: ["a", "b"], 2: ["b", "c"], 3: ["c", "d"], 4: ["d", "e"], 5: ["b", "e"],
+                    6: ["x", "y"]})
+    code = graph.actor_code
+    path = [graph.actor_ids[a] for a in graph.shortest_path(code("a"), code("d"))]
+    assert path[0] == "a" and path[-1] == "d" and len(path) == 4
+    assert graph.shortest_path(code("a"), code("e"), max_depth=1) == []
+    assert len(graph.shortest_path(code("a"), code("e"), max_depth=2)) == 3
+    assert graph.shortest_path(code("a"), code("x")) == []
+
+
+def test_filmography_and_top_costars(analyzer):
+    # Ice Cube and Ian Holm share a Freebase actor ID in the fixture.
+    films = analyzer.filmography("/m/01vw26l")
+    assert films["title"].tolist() == ["Henry V", "Ghosts of Mars"]
+    assert films["character_name"].tolist() == ["Fluellen", "Desolation Williams"]
+    pd.testing.assert_frame_equal(analyzer.filmography("Ian Holm"), films)
+    top = analyzer.top_costars("Ice Cube", k=2)
+    assert top["actor_name"].tolist() == ["Clea DuVall", "Natasha Henstridge"]
+    assert top["shared_movies"].tolist() == [2, 1]
+    with pytest.raises(Exception):
+        analyzer.filmography("Nobody")
+
+
+def test_degrees_of_separation_and_components(analyzer):
+    chain = analyzer.degrees_of_separation("Josie Bissett", "Ethel Merman")
+    assert chain["actor_name"].tolist() == ["Josie Bissett", "Wanda De Jesus",
+                                            "Natasha Henstridge", "Ethel Merman"]
+    assert chain["title"].tolist() == [None, "Little city", "Ghosts of Mars",
+                                       "Alexander's Ragtime Band"]
+    assert analyzer.degrees_of_separation("Josie Bissett", "Kjersti Holmen").empty
+    components = analyzer.costar_components()
+    assert components.values.tolist() == [[1, 3], [2, 3], [7, 1]]
+
+
+def test_graph_is_reopened_from_disk(corpus_dir, analyzer):
+    built = analyzer.costar_graph
+    reopened = MovieAnalyzer(download_dir=corpus_dir).costar_graph
+    assert isinstance(reopened.adj_actors, np.memmap)
+    assert reopened.actor_ids == built.actor_ids and reopened.aliases == built.aliases
+    np.testing.assert_array_equal(reopened.adj_weights, built.adj_weights)
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from src.dates import PRECISION_DAY, PRECISION_MONTH, PRECISION_NONE, PRECISION_YEAR
+from src.dates import split_partial_dates
+from src.movie_analyzer import MovieAnalyzer
+
+
+def test_split_partial_dates_mixed_precision():
+    parts = split_partial_dates(pd.Series(
+        ["2001-08-24", "1988", "1950-07", None, "2010-13-01", "19a8", "2001-08-24T00"]
+    ))
+    assert parts["year"].tolist() == [2001, 1988, 1950, 0, 0, 0, 0]
+    assert parts["month"].tolist() == [8, 0, 7, 0, 0, 0, 0]
+    assert parts["precision"].tolist() == [PRECISION_DAY, PRECISION_YEAR, PRECISION_MONTH,
+                                           PRECISION_NONE, PRECISION_NONE, PRECISION_NONE,
+                                           PRECISION_NONE]
+
+
+def test_releases_and_ages_count_every_precision(corpus_dir):
+    analyzer = MovieAnalyzer(download_dir=corpus_dir)
+    releases = analyzer.releases()
+    # "1988", "1987", "1983" and "2002" are year-only release dates.
+    assert {1983, 1987, 1988, 2002} <= set(releases["Year"])
+    assert releases["Count"].sum() == len(analyzer.movies_df)
+
+    years = analyzer.ages("Y")
+    months = analyzer.ages("M")
+    assert years["Count"].sum() == 19  # one actor has no birthdate
+    assert months["Count"].sum() == 18  # and one only has a birth year
+    assert months["Birth_Month"].between(1, 12).all()
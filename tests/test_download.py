@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.download as download
+
+PAYLOAD = os.urandom(3 * download.CHUNK_SIZE + 12345)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with optional byte-range support and counts bytes sent."""
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, status, length, extra=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        if self.server.ranged:
+            self.send_header("Accept-Ranges", "bytes")
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers(200, len(PAYLOAD))
+
+    def do_GET(self):
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if self.server.ranged and match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(PAYLOAD) - 1
+            body = PAYLOAD[start:end + 1]
+            self._headers(206, len(body),
+                          {"Content-Range": f"bytes {start}-{end}/{len(PAYLOAD)}"})
+        else:
+            body = PAYLOAD
+            self._headers(200, len(body))
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+
+
+@pytest.fixture(params=[True, False], ids=["ranged", "plain"])
+def server(request):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    httpd.ranged = request.param
+    httpd.bytes_sent = 0
+    httpd.lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/MovieSummaries.tar.gz"
+
+
+def test_download_verifies_and_renames(server, tmp_path):
+    dest = str(tmp_path / "MovieSummaries.tar.gz")
+    sha = hashlib.sha256(PAYLOAD).hexdigest()
+    stats = download.download_file(_url(server), dest, sha256=sha, parts=4, progress=None)
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert stats["bytes"] == len(PAYLOAD)
+    assert stats["throughput"] > 0
+    assert os.listdir(tmp_path) == ["MovieSummaries.tar.gz"]
+
+
+def _write_part_state(dest, url, total, end):
+    with open(dest + ".parts.json", "w", encoding="utf-8") as f:
+        json.dump({"url": url, "total": total, "parts": [[0, end]]}, f)
+
+
+def test_download_resumes_partial_part(server, tmp_path):
+    dest = str(tmp_path / "MovieSummaries.tar.gz")
+    with open(dest + ".part0", "wb") as f:
+        f.write(PAYLOAD[:1000])
+    _write_part_state(dest, _url(server), len(PAYLOAD),
+                      len(PAYLOAD) - 1 if server.ranged else None)
+    download.download_file(_url(server), dest, parts=1, progress=None)
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+    expected = len(PAYLOAD) - 1000 if server.ranged else len(PAYLOAD)
+    assert server.bytes_sent == expected
+    assert os.listdir(tmp_path) == ["MovieSummaries.tar.gz"]
+
+
+def test_download_discards_parts_of_another_download(server, tmp_path):
+    dest = str(tmp_path / "MovieSummaries.tar.gz")
+    for i in range(3):
+        with open(f"{dest}.part{i}", "wb") as f:
+            f.write(b"x" * 1000)
+    # Same size as the parts a one-part download would resume, but a different file.
+    _write_part_state(dest, _url(server).replace(".tar.gz", ".old.tar.gz"), len(PAYLOAD),
+                      len(PAYLOAD) - 1 if server.ranged else None)
+    download.download_file(_url(server), dest, parts=1, progress=None)
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert server.bytes_sent == len(PAYLOAD)
+    assert os.listdir(tmp_path) == ["MovieSummaries.tar.gz"]
+
+
+def test_download_checksum_mismatch_leaves_no_file(server, tmp_path):
+    dest = str(tmp_path / "MovieSummaries.tar.gz")
+    with pytest.raises(Exception, match="integrity"):
+        download.download_file(_url(server), dest, sha256="0" * 64, progress=None)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from src.facets import Facet
+from src.movie_analyzer import MovieAnalyzer
+
+
+def test_facet_parses_once_into_codes():
+    series = pd.Series([
+        '{"/m/1": "Drama", "/m/2": "Comedy"}',
+        None,
+        "{}",
+        "not json",
+        '{"/m/2": "Comedy"}',
+    ])
+    facet = Facet.from_series(series)
+    assert facet.row_values(0) == ["Drama", "Comedy"]
+    assert facet.row_values(1) == facet.row_values(3) == []
+    assert facet.empty_rows().tolist() == [False, True, True, True, False]
+    assert facet.contains("Comedy").tolist() == [True, False, False, False, True]
+    assert not facet.contains("Horror").any()
+    assert facet.value_counts().to_dict() == {"Comedy": 2, "Drama": 1}
+    assert facet.codes.dtype == np.int32
+
+
+def test_movie_facets_survive_the_cache(corpus_dir):
+    parsed = MovieAnalyzer(download_dir=corpus_dir)
+    cached = MovieAnalyzer(download_dir=corpus_dir)
+    for col, facet in parsed.facets.items():
+        assert cached.facets[col].values.tolist() == facet.values.tolist()
+        assert np.array_equal(cached.facets[col].indptr, facet.indptr)
+    assert cached.facets["languages"].row_values(5) == ["Silent film", "English Language"]
@@ -0,0 +1,41 @@
+import pytest
+
+from src.filters import Country, Genre, Language, Years
+from src.movie_analyzer import MovieAnalyzer
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def _brute_force(analyzer, predicate):
+    return sorted(
+        movie_id
+        for row, movie_id in enumerate(analyzer.movies_df["movie_id"])
+        if predicate({col: set(facet.row_values(row)) for col, facet in analyzer.facets.items()},
+                     int(str(analyzer.movies_df["release_date"].iloc[row])[:4]))
+    )
+
+
+@pytest.mark.parametrize("where, predicate", [
+    (Genre("Drama"), lambda f, y: "Drama" in f["genres"]),
+    ((Genre("Drama") | Genre("Comedy")) & Country("United States of America"),
+     lambda f, y: bool(f["genres"] & {"Drama", "Comedy"})
+     and "United States of America" in f["countries"]),
+    (~Language("English Language") | Years(None, 1920),
+     lambda f, y: "English Language" not in f["languages"] or y <= 1920),
+    ({"and": [{"genre": "Comedy"}, {"years": [1930, 2000]}]},
+     lambda f, y: "Comedy" in f["genres"] and 1930 <= y <= 2000),
+    (Genre("No such genre"), lambda f, y: False),
+])
+def test_filters_match_brute_force(analyzer, where, predicate):
+    expected = _brute_force(analyzer, predicate)
+    assert sorted(analyzer.filter_movies(where)["movie_id"]) == expected
+    assert analyzer.count_movies(where) == len(expected)
+    assert analyzer.releases_where(where)["Count"].sum() == len(expected)
+
+
+def test_invalid_filter_spec_raises(analyzer):
+    with pytest.raises(Exception):
+        analyzer.count_movies({"director": "Nobody"})
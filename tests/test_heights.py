@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.movie_analyzer import MovieAnalyzer
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+@pytest.mark.parametrize("gender", ["All", "M", "F", "Unknown", "X"])
+@pytest.mark.parametrize("min_height, max_height", [(1.0, 2.5), (1.6, 1.8), (1.62, 1.75)])
+def test_height_index_matches_scan(analyzer, gender, min_height, max_height):
+    actors = analyzer.actors_df
+    mask = actors["height"].between(min_height, max_height)
+    if gender != "All":
+        mask &= actors["gender"] == gender
+    expected = actors[mask]
+
+    df = analyzer.actor_distributions(gender=gender, max_height=max_height,
+                                      min_height=min_height)
+    assert df.index.tolist() == expected.index.tolist()
+
+    hist = analyzer.height_histogram(gender=gender, max_height=max_height,
+                                     min_height=min_height)
+    if len(expected):
+        counts, edges = np.histogram(expected["height"], bins=20)
+        assert hist["Count"].tolist() == counts.tolist()
+        assert np.allclose(hist["Bin_Start"], edges[:-1])
+    else:
+        assert hist["Count"].sum() == 0
+
+
+def test_plot_returns_figure(analyzer):
+    df, fig = analyzer.actor_distributions(gender="F", max_height=1.8, min_height=1.5, plot=True)
+    assert len(df) == 7
+    assert fig.axes[0].get_title() == "Actor Height Distribution"
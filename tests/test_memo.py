@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.filters import Genre, Years
+from src.memo import SIZE_SAMPLE, QueryCache, make_key, result_nbytes
+from src.movie_analyzer import MovieAnalyzer
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def test_repeated_calls_hit_with_normalized_arguments(analyzer):
+    first = analyzer.movie_type(N=3)
+    assert analyzer.query_cache.stats()["misses"] == 1
+    # Positional, keyword and default arguments map to the same key.
+    pd.testing.assert_frame_equal(analyzer.movie_type(3), first)
+    analyzer.ages()
+    analyzer.ages("Y")
+    analyzer.releases_where(Genre("Drama") & Years(1980, 1990))
+    analyzer.releases_where(Genre("Drama") & Years(1980, 1990))
+    analyzer.releases_where({"genre": "Drama"})
+    analyzer.releases_where({"genre": "Drama"})
+    stats = analyzer.query_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (4, 4, 4)
+
+
+def test_results_are_read_only(analyzer):
+    result = analyzer.movie_type(N=3)
+    with pytest.raises(ValueError):
+        result.loc[0, "Count"] = 999
+    with pytest.raises(ValueError):
+        result["Count"] += 1
+    # New or replaced columns only change the caller's copy.
+    result["Count"] = 0
+    result["extra"] = 1
+    again = analyzer.movie_type(N=3)
+    assert list(again.columns) == ["Movie_Type", "Count"] and again["Count"].iloc[0] > 0
+
+    expected = analyzer.actor_distributions("All", 2.0, 1.5).copy()
+    for column in expected.columns:
+        actors = analyzer.actor_distributions("All", 2.0, 1.5)
+        try:
+            actors.loc[actors.index[0], column] = actors[column].iloc[-1]
+        except (ValueError, TypeError):
+            pass  # NumPy-backed columns refuse the write
+    pd.testing.assert_frame_equal(analyzer.actor_distributions("All", 2.0, 1.5), expected)
+
+
+def test_figures_and_errors_are_not_cached(analyzer):
+    _, fig = analyzer.actor_distributions("All", 2.0, 1.5, plot=True)
+    _, fig_again = analyzer.actor_distributions("All", 2.0, 1.5, plot=True)
+    assert fig is not fig_again
+    with pytest.raises(Exception):
+        analyzer.actor_distributions("All", 3.0, 1.5)
+    assert analyzer.query_cache.stats()["entries"] == 0
+
+
+def test_reload_invalidates(analyzer):
+    analyzer.movie_type(N=3)
+    analyzer._load_data()
+    assert len(analyzer.query_cache) == 0
+    analyzer.movie_type(N=3)
+    assert analyzer.query_cache.stats()["misses"] == 2
+
+
+def test_lru_is_bounded_by_entries_and_bytes():
+    cache = QueryCache(max_bytes=3000, max_entries=3)
+    for i in range(4):
+        cache.put(make_key("f", {"i": i}), np.zeros(10))
+    assert len(cache) == 3 and not cache.get(make_key("f", {"i": 0}))[0]
+    cache.get(make_key("f", {"i": 1}))  # now most recently used
+    cache.put(make_key("f", {"i": 4}), np.zeros(250))  # 2000 bytes
+    assert cache.get(make_key("f", {"i": 1}))[0] and not cache.get(make_key("f", {"i": 2}))[0]
+    assert cache.bytes <= 3000 and cache.stats()["evictions"] == 2
+    # Too large to cache at all: returned unchanged and writable.
+    big = cache.put(make_key("f", {"i": 5}), np.zeros(1000))
+    big[0] = 1
+    assert not cache.get(make_key("f", {"i": 5}))[0]
+    assert make_key("f", {"x": object()}) is None
+
+
+class Sized:
+    """An object whose size is counted when measured."""
+
+    measured = 0
+
+    def __sizeof__(self):
+        Sized.measured += 1
+        return 100
+
+
+def test_object_results_are_sized_from_a_sample():
+    n = 20 * SIZE_SAMPLE
+    frame = pd.DataFrame({"obj": [Sized() for _ in range(n)], "x": np.zeros(n)})
+    Sized.measured = 0
+    size = result_nbytes(frame)
+    assert Sized.measured <= SIZE_SAMPLE
+    assert size == pytest.approx(frame.memory_usage(index=True, deep=True).sum(), rel=0.01)
+
+
+def test_disabled_cache(corpus_dir):
+    analyzer = MovieAnalyzer(download_dir=corpus_dir, query_cache_bytes=0)
+    analyzer.movie_type(N=3)
+    analyzer.movie_type(N=3)
+    assert analyzer.query_cache.stats()["hits"] == 0
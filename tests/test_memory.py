@@ -0,0 +1,40 @@
+import tracemalloc
+
+import pytest
+
+from src.movie_analyzer import MovieAnalyzer
+from tests.conftest import write_corpus
+
+
+@pytest.fixture(scope="module")
+def large_analyzer(tmp_path_factory):
+    download_dir = str(tmp_path_factory.mktemp("large") / "downloads")
+    write_corpus(download_dir, copies=5000)
+    # Plain object columns make an accidental full copy expensive, hence easy to spot.
+    # No query cache, so the measured call runs the query body again.
+    return MovieAnalyzer(download_dir=download_dir, use_cache=False, compact=False,
+                         query_cache_bytes=0)
+
+
+@pytest.mark.parametrize("call", [
+    lambda a: a.movie_type(N=10),
+    lambda a: a.actor_count(),
+    lambda a: a.actor_distributions(gender="F", max_height=1.7, min_height=1.6),
+    lambda a: a.releases(genre="Drama"),
+    lambda a: a.ages("Y"),
+    lambda a: a.ages("M"),
+    lambda a: a.get_random_movie_info(),
+], ids=["movie_type", "actor_count", "actor_distributions", "releases", "ages_y", "ages_m",
+        "random_movie"])
+def test_queries_do_not_copy_frames(large_analyzer, call):
+    frame_bytes = min(large_analyzer.actors_df.memory_usage(deep=True).sum(),
+                      large_analyzer.movies_df.memory_usage(deep=True).sum())
+    call(large_analyzer)  # build lazy indexes outside the measurement
+    tracemalloc.start()
+    try:
+        call(large_analyzer)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # A full copy of either frame would cost at least frame_bytes.
+    assert peak < frame_bytes / 4
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from src.metrics import Registry, registry, timed
+from src.movie_analyzer import MovieAnalyzer
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry.reset()
+    yield
+    registry.enabled = True
+    registry.reset()
+
+
+def test_timed_records_counts_errors_and_percentiles():
+    for _ in range(10):
+        with timed("stage"):
+            pass
+    with pytest.raises(ValueError):
+        with timed("stage"):
+            raise ValueError("boom")
+    stats = registry.snapshot()["stage"]
+    assert (stats["count"], stats["errors"]) == (11, 1)
+    assert stats["min_seconds"] <= stats["p50_seconds"] <= stats["p99_seconds"] <= stats["max_seconds"]
+    assert stats["total_seconds"] == pytest.approx(stats["mean_seconds"] * 11)
+
+
+def test_queries_and_loading_are_timed(corpus_dir):
+    analyzer = MovieAnalyzer(download_dir=corpus_dir, query_cache_bytes=0)
+    analyzer.movie_type(N=3)
+    analyzer.movie_type(N=5)
+    with pytest.raises(Exception):
+        analyzer.movie_type(N="x")
+    snapshot = registry.snapshot()
+    assert snapshot["query.movie_type"]["count"] == 3
+    assert snapshot["query.movie_type"]["errors"] == 1
+    # Validation is only recorded for calls that got past it.
+    assert snapshot["validate_call.movie_type"]["count"] == 2
+    assert snapshot["validate_call.movie_type"]["max_seconds"] <= snapshot["query.movie_type"]["max_seconds"]
+    assert any(name.startswith("load.parse.") for name in snapshot)
+
+
+def test_export_formats(tmp_path):
+    with timed("query.x"):
+        pass
+    prometheus = registry.to_prometheus()
+    assert "# TYPE movie_analyzer_duration_seconds summary" in prometheus
+    assert 'movie_analyzer_duration_seconds_count{stage="query.x"} 1' in prometheus
+    assert 'movie_analyzer_duration_seconds{stage="query.x",quantile="0.99"}' in prometheus
+
+    registry.write(str(tmp_path / "m.json"))
+    registry.write(str(tmp_path / "m.prom"))
+    assert json.loads((tmp_path / "m.json").read_text())["query.x"]["count"] == 1
+    assert 'movie_analyzer_duration_seconds_count{stage="query.x"} 1' in (tmp_path / "m.prom").read_text()
+
+
+def test_disabled_registry_records_nothing():
+    registry.enabled = False
+    with timed("stage"):
+        pass
+    registry.record("other", 1.0)
+    assert registry.snapshot() == {}
+    assert Registry().snapshot() == {}
@@ -0,0 +1,90 @@
+import os
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.movie_analyzer import DATASET_FILES, MovieAnalyzer
+from src.outofcore import ActorAggregates
+from src.synthetic import generate_corpus
+
+BUDGET = 2 * 2**20
+
+
+def _objects(df):
+    # Missing values of pyarrow-backed categories come out as pd.NA, of object columns as NaN.
+    return df.astype(object).where(df.notna(), np.nan)
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    download_dir = str(tmp_path_factory.mktemp("ooc"))
+    generate_corpus(download_dir, 3000, seed=5, tar=True)
+    return download_dir
+
+
+@pytest.mark.parametrize("extract", [True, False])
+def test_out_of_core_matches_in_memory(corpus, extract):
+    full = MovieAnalyzer(download_dir=corpus, use_cache=False)
+    ooc = MovieAnalyzer(download_dir=corpus, out_of_core=True, memory_budget=BUDGET,
+                        extract=extract)
+    assert ooc.actors_df.empty
+    assert ooc.actor_aggregates.partitions > 1
+    assert ooc.actor_aggregates.n_rows == len(full.actors_df)
+    assert not os.path.exists(ooc.actor_aggregates.spill_dir)
+
+    pd.testing.assert_frame_equal(full.actor_count(), ooc.actor_count())
+    for mode in ["Y", "M"]:
+        pd.testing.assert_frame_equal(full.ages(mode), ooc.ages(mode))
+    for gender in ["All", "M", "F", "Unknown"]:
+        pd.testing.assert_frame_equal(full.height_histogram(gender, 2.0, 1.5),
+                                      ooc.height_histogram(gender, 2.0, 1.5))
+        expected = full.actor_distributions(gender, 1.8, 1.6)
+        actual = ooc.actor_distributions(gender, 1.8, 1.6)
+        pd.testing.assert_frame_equal(_objects(expected), _objects(actual[expected.columns]))
+
+
+def test_merged_aggregates_equal_single_pass(corpus, tmp_path):
+    analyzer = MovieAnalyzer(download_dir=corpus, use_cache=False)
+    source = os.path.join(analyzer.extracted_folder, DATASET_FILES["actors"])
+    chunks = list(analyzer._actor_chunks(source, None))
+    assert len(chunks) == 1
+    chunk = chunks[0]
+    half = len(chunk) // 2
+
+    single = ActorAggregates(str(tmp_path / "single"), partitions=3)
+    single.update(chunk)
+    merged = ActorAggregates(str(tmp_path / "a"), partitions=3)
+    other = ActorAggregates(str(tmp_path / "b"), partitions=3)
+    merged.update(chunk.iloc[:half])
+    other.update(chunk.iloc[half:])
+    merged.merge(other)
+    single.finish()
+    merged.finish()
+    # The merged-in aggregates' spill files go with the merged ones.
+    assert not os.path.exists(tmp_path / "a") and not os.path.exists(tmp_path / "b")
+
+    pd.testing.assert_frame_equal(single.actor_count(), merged.actor_count())
+    pd.testing.assert_frame_equal(single.ages("Y"), merged.ages("Y"))
+    for gender in single.heights:
+        pd.testing.assert_series_equal(single.heights[gender], merged.heights[gender])
+    with pytest.raises(Exception):
+        merged.merge(ActorAggregates(str(tmp_path / "c"), partitions=2))
+
+
+def test_peak_memory_stays_within_budget(tmp_path):
+    budget = 8 * 2**20
+    download_dir = str(tmp_path / "synthetic")
+    generate_corpus(download_dir, 8000, seed=6)
+
+    peaks = {}
+    for out_of_core in [False, True]:
+        tracemalloc.start()
+        analyzer = MovieAnalyzer(download_dir=download_dir, datasets=["actors"], use_cache=False,
+                                 out_of_core=out_of_core, memory_budget=budget)
+        analyzer.actor_count()
+        peaks[out_of_core] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del analyzer
+    assert peaks[True] < budget < peaks[False]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.facets import Facet
+from src.movie_analyzer import MovieAnalyzer
+from src.sampling import MovieIndex
+from tests.conftest import MOVIES, SUMMARIES
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def test_lookup_maps_ids_to_rows_summaries_and_genres(analyzer):
+    index = analyzer.movie_index
+    for row, movie in enumerate(MOVIES):
+        found_row, summary_row, codes = index.lookup(movie[0])
+        assert found_row == row
+        assert index.genres.values[codes].tolist() == list(movie[8].values())
+        if summary_row >= 0:
+            assert analyzer.summaries_df["movie_id"].iloc[summary_row] == movie[0]
+        else:
+            assert movie[0] not in {s[0] for s in SUMMARIES}
+    with pytest.raises(Exception):
+        index.lookup(1)
+
+
+def test_pools_respect_restrictions(analyzer):
+    index = analyzer.movie_index
+    with_summary = {s[0] for s in SUMMARIES}
+    assert set(index.movie_ids[index.pool(with_summary=True)]) == with_summary
+    dramas = {m[0] for m in MOVIES if "Drama" in m[8].values()}
+    assert set(index.movie_ids[index.pool("Drama")]) == dramas
+    assert set(index.movie_ids[index.pool("Drama", True)]) == dramas & with_summary
+    assert len(index.pool("No such genre")) == 0
+
+
+def test_random_movie_restricted_to_genre_with_summary(analyzer):
+    for seed in range(20):
+        info = analyzer.get_random_movie_info(genre="Thriller", with_summary=True, seed=seed)
+        assert "Thriller" in info["genres_list"]
+        assert info["summary"]
+    with pytest.raises(Exception):
+        analyzer.get_random_movie_info(genre="No such genre")
+
+
+def test_batch_sampler_is_distinct_and_seedable(analyzer):
+    batch = analyzer.sample_movies(6, seed=7, with_summary=True)
+    ids = [info["movie_id"] for info in batch]
+    assert len(set(ids)) == 6
+    assert set(ids) == {s[0] for s in SUMMARIES}
+    assert [info["movie_id"] for info in analyzer.sample_movies(4, seed=7)] == \
+        [info["movie_id"] for info in analyzer.sample_movies(4, seed=7)]
+    with pytest.raises(Exception):
+        analyzer.sample_movies(7, with_summary=True)
+
+
+def test_duplicate_summaries_keep_the_first():
+    index = MovieIndex(np.array([5, 3]), np.array([3, 9, 3, 5]), Facet([], [], [], 2))
+    assert index.summary_rows.tolist() == [3, 0]
@@ -0,0 +1,95 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.filters import Genre, Years
+from src.movie_analyzer import MovieAnalyzer
+from src.search import K1, B, SearchIndex, snippet, tokenize
+from tests.conftest import SUMMARIES
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def bm25(texts, query):
+    """Reference BM25 over tokenized texts."""
+    docs = [tokenize(text) for text in texts]
+    avgdl = sum(map(len, docs)) / len(docs)
+    scores = []
+    for doc in docs:
+        score = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            df = sum(term in d for d in docs)
+            tf = doc.count(term)
+            if tf:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(doc) / avgdl))
+        scores.append(score)
+    return np.array(scores)
+
+
+def test_search_requires_every_word_by_default(analyzer):
+    result = analyzer.search("Heist and a TRAIN")
+    assert result["title"].tolist() == ["Henry V"]
+    assert set(analyzer.search("train")["movie_id"]) == {975900, 171005}
+    either = analyzer.search("heist mars", require_all=False)
+    assert set(either["movie_id"]) == {975900, 171005}
+    assert analyzer.search("heist zeppelin").empty
+    assert analyzer.search("the of").empty
+
+
+def test_scores_match_reference_bm25(analyzer):
+    texts = [summary for _, summary in SUMMARIES]
+    for query in ["young war", "murder man", "train"]:
+        expected = bm25(texts, query)
+        result = analyzer.search(query, k=len(texts), require_all=False)
+        rows = [next(i for i, s in enumerate(SUMMARIES) if s[0] == m) for m in result["movie_id"]]
+        np.testing.assert_allclose(result["score"], expected[rows], rtol=1e-5)
+        assert result["score"].is_monotonic_decreasing
+        assert len(result) == (expected > 0).sum()
+
+
+def test_k_and_filters(analyzer):
+    assert len(analyzer.search("young", k=1)) == 1
+    assert analyzer.search("train", where=Genre("Drama")).empty
+    recent = analyzer.search("train", where=Years(2000, 2010))
+    assert recent["title"].tolist() == ["Ghosts of Mars"]
+    assert analyzer.search("train", where={"genre": "Thriller"})["movie_id"].tolist() == [975900]
+    with pytest.raises(Exception):
+        analyzer.search("train", k=0)
+
+
+def test_index_is_persisted_and_memory_mapped(corpus_dir, analyzer):
+    expected = analyzer.search("young", k=5)
+    reopened = MovieAnalyzer(download_dir=corpus_dir)
+    assert isinstance(reopened.search_index.docs, np.memmap)
+    pd.testing.assert_frame_equal(reopened.search("young", k=5), expected)
+
+    # Changed summaries invalidate the saved index.
+    path = os.path.join(corpus_dir, "MovieSummaries", "plot_summaries.txt")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("42\tA young heist crew robs a train.\n")
+    changed = MovieAnalyzer(download_dir=corpus_dir)
+    assert not isinstance(changed.search_index.docs, np.memmap)
+    assert 42 in changed.search("heist train")["movie_id"].tolist()
+
+
+def test_build_in_blocks_equals_single_block():
+    texts = pd.Series([summary for _, summary in SUMMARIES] * 3 + [None])
+    one = SearchIndex.build(texts)
+    blocks = SearchIndex.build(texts, block_docs=4)
+    assert one.terms == blocks.terms
+    for name in ["offsets", "docs", "tfs", "doc_lengths"]:
+        np.testing.assert_array_equal(getattr(one, name), getattr(blocks, name))
+
+
+def test_snippet_centers_on_first_match():
+    text = "word " * 100 + "the heist begins " + "word " * 100
+    result = snippet(text, "heist", width=60)
+    assert "heist" in result and result.startswith("...") and result.endswith("...")
+    assert snippet("short text", "heist") == "short text"
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+
+import pytest
+
+from benchmarks.load_test import fetch, run_load
+from src.movie_analyzer import MovieAnalyzer
+from src.server import QueryServer
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def _serve(server, scenario):
+    """Runs scenario(url) against server listening on a free port."""
+    async def main():
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return await scenario(f"http://127.0.0.1:{port}")
+        finally:
+            listener.close()
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_endpoints_return_query_results(analyzer):
+    async def scenario(url):
+        return [await fetch(url, path) for path in (
+            "/movie_type?N=2", "/ages?mode=M", "/random_movie?seed=3&with_summary=true",
+            "/actor_distributions?gender=M&min_height=1.7&max_height=1.8",
+            "/movie_type?N=abc", "/releases?plot=1", "/nope")]
+
+    results = _serve(QueryServer(analyzer, workers=2), scenario)
+    (s1, top), (s2, ages), (s3, movie), (s4, actors), (s5, bad), (s6, unknown), (s7, missing) = results
+    assert (s1, s2, s3, s4) == (200, 200, 200, 200)
+    assert top["result"] == analyzer.movie_type(N=2).to_dict(orient="records")
+    assert ages["result"] == analyzer.ages("M").to_dict(orient="records")
+    assert movie["result"]["title"] == analyzer.get_random_movie_info(with_summary=True, seed=3)["title"]
+    assert ([row["actor_name"] for row in actors["result"]]
+            == analyzer.actor_distributions("M", 1.8, 1.7)["actor_name"].tolist())
+    assert (s5, s6, s7) == (400, 400, 404)
+    assert "error" in bad and "plot" in unknown["error"]
+
+
+def test_internal_errors_return_500(analyzer):
+    def broken_movie_type(**kwargs):
+        raise KeyError("genres")
+
+    analyzer.movie_type = broken_movie_type
+
+    paths = ["/movie_type?N=3", "/actor_distributions?gender=M&min_height=1&max_height=50"]
+
+    async def scenario(url):
+        return [await fetch(url, path) for path in paths]
+
+    (s1, broken), (s2, bad) = _serve(QueryServer(analyzer, workers=2), scenario)
+    assert s1 == 500 and "KeyError" in broken["error"]
+    # The methods' own argument checks raise plain Exceptions: still the client's fault.
+    assert s2 == 400 and "unrealistic" in bad["error"]
+
+
+class VersionedAnalyzer:
+    """Answers movie_type with its shared_version, optionally once release is set."""
+
+    def __init__(self, version, release=None):
+        self.shared_version = version
+        self.release = release
+
+    def shared_outdated(self):
+        return False
+
+    def movie_type(self, N=10):
+        if self.release is not None:
+            self.release.wait(5)
+        return {"version": self.shared_version}
+
+
+def test_response_of_an_older_version_is_not_reused():
+    release = threading.Event()
+    server = QueryServer(VersionedAnalyzer(1, release), workers=2)
+
+    async def scenario(url):
+        pending = asyncio.ensure_future(fetch(url, "/movie_type?N=3"))
+        while not server._in_flight:
+            await asyncio.sleep(0.01)
+        # What follow_shared_store does, while the query on version 1 still runs.
+        server.analyzer = VersionedAnalyzer(2)
+        server.responses.clear()
+        release.set()
+        return await pending, await fetch(url, "/movie_type?N=3")
+
+    (_, first), (_, second) = _serve(server, scenario)
+    assert first["result"] == {"version": 1}
+    assert second["result"] == {"version": 2}
+
+
+def test_identical_in_flight_requests_are_coalesced(analyzer):
+    release = threading.Event()
+    calls = []
+    movie_type = analyzer.movie_type
+
+    def slow_movie_type(**kwargs):
+        calls.append(kwargs)
+        release.wait(5)
+        return movie_type(**kwargs)
+
+    analyzer.movie_type = slow_movie_type
+    server = QueryServer(analyzer, workers=4, response_cache_bytes=0)
+
+    async def scenario(url):
+        requests = [asyncio.ensure_future(fetch(url, "/movie_type?N=3")) for _ in range(5)]
+        requests.append(asyncio.ensure_future(fetch(url, "/movie_type?N=4")))
+        while server.requests < 6:
+            await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*requests)
+
+    results = _serve(server, scenario)
+    assert len(calls) == 2
+    assert server.coalesced == 4
+    assert all(body == results[0][1] for _, body in results[:5])
+    assert len(results[5][1]["result"]) == 4
+
+
+def test_load_test_reports_latency_and_throughput(analyzer):
+    paths = ["/movie_type?N=5", "/actor_count", "/random_movie"]
+
+    async def scenario(url):
+        return await run_load(url, paths, requests=60, concurrency=4)
+
+    report = _serve(QueryServer(analyzer, workers=2), scenario)
+    assert report["requests"] == 60 and report["errors"] == 0
+    assert report["throughput_rps"] > 0
+    assert report["latency"]["p50_ms"] <= report["latency"]["p99_ms"]
+    assert {path: entry["count"] for path, entry in report["endpoints"].items()} == \
+        {path: 20 for path in paths}
+    # Repeated deterministic requests are answered from the response cache.
+    assert report["cached"] + report["coalesced"] >= 30
+
+
+def test_server_follows_new_shared_version(corpus_dir, monkeypatch):
+    monkeypatch.setattr("src.server.VERSION_CHECK_SECONDS", 0.0)
+    server = QueryServer(MovieAnalyzer(download_dir=corpus_dir, shared_store=True), workers=2)
+
+    async def scenario(url):
+        first = await fetch(url, "/actor_count")
+        server.analyzer.publish_shared()
+        second = await fetch(url, "/actor_count")
+        _, stats = await fetch(url, "/stats")
+        return first, second, stats
+
+    first, second, stats = _serve(server, scenario)
+    assert first == second
+    assert stats["shared_version"] == server.analyzer.shared_version == 2
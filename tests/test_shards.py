@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from src.movie_analyzer import DATASET_FILES, MovieAnalyzer
+from src.shards import line_shards, read_range, read_sharded
+from src.synthetic import generate_corpus
+
+
+@pytest.fixture(scope="module")
+def folder(tmp_path_factory):
+    return generate_corpus(str(tmp_path_factory.mktemp("shards")), 3000, seed=3)
+
+
+def test_shards_cover_file_on_line_boundaries(folder):
+    path = os.path.join(folder, DATASET_FILES["actors"])
+    shards = line_shards(path, 7, min_bytes=1)
+    assert len(shards) == 7
+    assert shards[0][0] == 0 and shards[-1][1] == os.path.getsize(path)
+    assert all(end == start for (_, end), (start, _) in zip(shards, shards[1:]))
+    parts = [read_range(path, start, end).getvalue() for start, end in shards]
+    assert all(part.endswith(b"\n") for part in parts)
+    with open(path, "rb") as f:
+        assert b"".join(parts) == f.read()
+    # Small files are not split below min_bytes per shard.
+    assert len(line_shards(path, 7)) == 1
+
+
+def test_sharded_parse_equals_single_read(folder):
+    analyzer = MovieAnalyzer(download_dir=os.path.dirname(folder), datasets=["movies"],
+                             use_cache=False)
+    readers = {"movies": analyzer._read_movies, "actors": analyzer._read_actors,
+               "summaries": analyzer._read_summaries}
+    with ThreadPoolExecutor(4) as pool:
+        for name, read in readers.items():
+            path = os.path.join(folder, DATASET_FILES[name])
+            pd.testing.assert_frame_equal(read_sharded(path, read, pool, 5, min_bytes=1),
+                                          read(path))
+
+
+def test_parallel_load_equals_sequential_load(folder, monkeypatch):
+    download_dir = os.path.dirname(folder)
+    sequential = MovieAnalyzer(download_dir=download_dir, use_cache=False, parse_workers=1)
+    monkeypatch.setattr("src.shards.MIN_SHARD_BYTES", 1)
+    parallel = MovieAnalyzer(download_dir=download_dir, use_cache=False, parse_workers=4)
+    for name in DATASET_FILES:
+        pd.testing.assert_frame_equal(getattr(sequential, f"{name}_df"),
+                                      getattr(parallel, f"{name}_df"))
+
+
+def test_shard_of_bare_years_and_blanks_keeps_dates(tmp_path):
+    path = str(tmp_path / DATASET_FILES["movies"])
+    full = "\t".join(["1", "/m/a", "Early", "1987-05-02", "\\N", "90.0", "{}", "{}", "{}"])
+    rows = [full] + ["\t".join([str(i), "/m/b", "1984", "1988" if i % 2 else "", "\\N", "",
+                                "{}", "{}", "{}"]) for i in range(2, 40)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(rows) + "\n")
+
+    read = MovieAnalyzer._read_movies
+    with ThreadPoolExecutor(4) as pool:
+        sharded = read_sharded(path, read, pool, 4, min_bytes=1)
+    single = read(path)
+    pd.testing.assert_frame_equal(sharded, single)
+    assert sharded["release_date"].dropna().map(type).eq(str).all()
+    assert sharded["title"].eq("1984").sum() == 38
@@ -0,0 +1,45 @@
+import src.shared as shared
+
+
+class DummyAnalyzer:
+    instances = 0
+
+    def __init__(self):
+        DummyAnalyzer.instances += 1
+        self.outdated = False
+
+    def shared_outdated(self):
+        return self.outdated
+
+    def attach_latest(self):
+        return DummyAnalyzer()
+
+
+def test_shared_analyzer_loads_once_and_reloads(monkeypatch):
+    monkeypatch.setattr(shared, "MovieAnalyzer", DummyAnalyzer)
+    monkeypatch.setattr(shared, "_analyzer", None)
+    DummyAnalyzer.instances = 0
+
+    first = shared.get_analyzer()
+    assert shared.get_analyzer() is first
+    assert DummyAnalyzer.instances == 1
+
+    reloaded = shared.reload_analyzer()
+    assert reloaded is not first
+    assert shared.get_analyzer() is reloaded
+
+    shared.invalidate_analyzer()
+    assert shared.get_analyzer() is not reloaded
+    assert DummyAnalyzer.instances == 3
+
+
+def test_shared_analyzer_follows_new_shared_version(monkeypatch):
+    monkeypatch.setattr(shared, "MovieAnalyzer", DummyAnalyzer)
+    monkeypatch.setattr(shared, "_analyzer", None)
+
+    first = shared.get_analyzer()
+    assert shared.get_analyzer() is first
+    first.outdated = True
+    latest = shared.get_analyzer()
+    assert latest is not first
+    assert shared.get_analyzer() is latest
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.movie_analyzer import MovieAnalyzer
+from src.sharedstore import _categorical, _fast_categorical, attach, current_version, publish
+
+
+def test_publish_and_attach_round_trip(tmp_path):
+    store = str(tmp_path / "shared")
+    frame = pd.DataFrame({
+        "id": np.arange(4, dtype=np.int32),
+        "height": np.array([1.7, np.nan, 1.6, 1.8], dtype=np.float32),
+        "flag": [True, False, True, False],
+        "gender": pd.Series(["F", None, "M", "F"], dtype="string[pyarrow]").astype("category"),
+        "name": pd.array(["a", None, "c", "d"], dtype="string[pyarrow]"),
+        "raw": ["x", np.nan, "z", "w"],
+        "count": pd.array([1, None, 3, 4], dtype="Int64"),
+    })
+    frames = {"frame": frame, "empty": pd.DataFrame(),
+              "no_rows": pd.DataFrame(columns=["movie_id", "summary"])}
+    assert attach(store, {}) is None
+    assert publish(store, frames, {"key": 1}) == 1
+
+    version, attached = attach(store, {"key": 1})
+    assert version == 1
+    for name, df in frames.items():
+        pd.testing.assert_frame_equal(attached[name], df)
+    # Mapped read-only, not copied.
+    assert not attached["frame"]["id"].to_numpy().flags.writeable
+    assert not attached["frame"]["gender"].cat.codes.to_numpy().flags.writeable
+    assert attach(store, {"key": 2}) is None
+
+
+def test_categorical_fast_path_matches_public_constructor(monkeypatch):
+    categories = pd.Index(pd.array(["F", "M", "X"], dtype="string[pyarrow]"))
+    codes = np.array([0, -1, 2, 1], dtype=np.int8)
+    expected = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+    # Fails when the pinned pandas internals change; attaching then falls back
+    # to the public constructor and each process hashes the categories again.
+    fast = _fast_categorical(codes, categories)
+    assert fast is not None
+    pd.testing.assert_extension_array_equal(fast, expected)
+
+    def changed(*args, **kwargs):
+        raise TypeError("signature changed")
+
+    monkeypatch.setattr(pd.CategoricalDtype, "_from_fastpath", changed)
+    assert _fast_categorical(codes, categories) is None
+    pd.testing.assert_extension_array_equal(_categorical(codes, categories), expected)
+
+
+def test_attached_analyzers_match_parsed(corpus_dir):
+    parsed = MovieAnalyzer(download_dir=corpus_dir)
+    first = MovieAnalyzer(download_dir=corpus_dir, shared_store=True)
+    second = MovieAnalyzer(download_dir=corpus_dir, shared_store=True)
+    assert first.shared_version == second.shared_version == 1
+    assert parsed.shared_version is None
+
+    for name in ["movies", "actors", "summaries"]:
+        pd.testing.assert_frame_equal(getattr(second, f"{name}_df"), getattr(parsed, f"{name}_df"))
+    pd.testing.assert_frame_equal(second.actor_count(), parsed.actor_count())
+    pd.testing.assert_frame_equal(second.releases("Drama"), parsed.releases("Drama"))
+    pd.testing.assert_frame_equal(second.actor_distributions("All", 2.0, 1.5),
+                                  parsed.actor_distributions("All", 2.0, 1.5))
+    assert second.get_random_movie_info(seed=1) == parsed.get_random_movie_info(seed=1)
+
+
+def test_publishing_swaps_versions(corpus_dir):
+    analyzer = MovieAnalyzer(download_dir=corpus_dir, shared_store=True)
+    assert not analyzer.shared_outdated()
+    before = analyzer.actor_count()
+
+    assert analyzer.publish_shared() == 2
+    assert analyzer.publish_shared() == 3
+    assert current_version(analyzer.shared_dir) == 3
+    # The new and the previous version are kept.
+    assert sorted(os.listdir(analyzer.shared_dir)) == ["CURRENT", "load.lock", "publish.lock",
+                                                       "v2", "v3"]
+
+    assert analyzer.shared_outdated()
+    latest = analyzer.attach_latest()
+    assert latest.shared_version == 3 and not latest.shared_outdated()
+    pd.testing.assert_frame_equal(latest.actor_count(), before)
+    # The old analyzer keeps its version.
+    assert analyzer.shared_version == 1
+    pd.testing.assert_frame_equal(analyzer.actor_count(), before)
+
+
+def test_changed_sources_are_republished(corpus_dir):
+    first = MovieAnalyzer(download_dir=corpus_dir, shared_store=True)
+    path = os.path.join(first.extracted_folder, "movie.metadata.tsv")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    second = MovieAnalyzer(download_dir=corpus_dir, shared_store=True)
+    assert second.shared_version == 2
+    assert first.shared_outdated()
+
+
+def test_other_options_use_their_own_store(corpus_dir):
+    movies = MovieAnalyzer(download_dir=corpus_dir, shared_store=True, datasets=["movies"])
+    full = MovieAnalyzer(download_dir=corpus_dir, shared_store=True)
+    assert movies.shared_dir != full.shared_dir
+    assert movies.shared_version == full.shared_version == 1
+    # Neither replaced the other's live version.
+    assert not movies.shared_outdated() and not full.shared_outdated()
+    again = MovieAnalyzer(download_dir=corpus_dir, shared_store=True, datasets=["movies"])
+    assert again.shared_version == 1 and again.actors_df.empty
+
+
+def test_shared_store_rejects_out_of_core(corpus_dir):
+    with pytest.raises(Exception):
+        MovieAnalyzer(download_dir=corpus_dir, shared_store=True, out_of_core=True)
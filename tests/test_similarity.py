@@ -0,0 +1,76 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.movie_analyzer import MovieAnalyzer
+from src.search import SearchIndex, tokenize
+from src.similarity import SimilarityIndex
+from tests.conftest import SUMMARIES
+
+
+@pytest.fixture
+def analyzer(corpus_dir):
+    return MovieAnalyzer(download_dir=corpus_dir)
+
+
+def tfidf_cosines(texts):
+    """Reference dense TF-IDF cosine similarity matrix."""
+    docs = [Counter(tokenize(text)) for text in texts]
+    vocab = sorted(set().union(*docs))
+    df = {t: sum(t in d for d in docs) for t in vocab}
+    matrix = np.array([[(1 + math.log(d[t])) * (math.log((1 + len(docs)) / (1 + df[t])) + 1)
+                        if d[t] else 0.0 for t in vocab] for d in docs])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix @ matrix.T
+
+
+def test_similarities_match_dense_reference():
+    texts = pd.Series([summary for _, summary in SUMMARIES] * 2 + ["train heist war"])
+    index = SimilarityIndex.build(SearchIndex.build(texts))
+    expected = tfidf_cosines(texts)
+    np.fill_diagonal(expected, 0)
+
+    docs = np.arange(len(texts))
+    # Tiny blocks exercise the block splitting; the result must not change.
+    for block_pairs in [None, 1]:
+        neighbours, similarities = index.similar(docs, k=3, block_pairs=block_pairs)
+        for doc in docs:
+            best = sorted(range(len(texts)), key=lambda other: (-expected[doc, other], other))[:3]
+            assert neighbours[doc].tolist() == best
+            np.testing.assert_allclose(similarities[doc], expected[doc, best], rtol=1e-5)
+    terms, weights = index.vector(0)
+    assert np.all(np.diff(terms) > 0) and math.isclose(float((weights ** 2).sum()), 1, rel_tol=1e-5)
+
+
+def test_similar_movies_returns_neighbours_with_genres(analyzer):
+    result = analyzer.similar_movies(975900, k=3)
+    assert list(result.columns) == ["movie_id", "title", "similarity", "genres_list"]
+    assert 975900 not in result["movie_id"].tolist()
+    expected = tfidf_cosines([summary for _, summary in SUMMARIES])[0]
+    expected[0] = 0
+    assert result["movie_id"].iloc[0] == SUMMARIES[int(np.argmax(expected))][0]
+    henry = result[result["title"] == "Henry V"]
+    assert henry["genres_list"].tolist() == [[]]
+    assert result["similarity"].is_monotonic_decreasing
+    with pytest.raises(Exception):
+        analyzer.similar_movies(28463795)  # no summary
+    with pytest.raises(Exception):
+        analyzer.similar_movies(1)
+
+
+def test_batch_matches_single_lookups_and_is_cached(corpus_dir, analyzer):
+    ids = [975900, 171005, 261236]
+    batch = analyzer.similar_movies_batch(ids, k=2)
+    for movie_id in ids:
+        single = analyzer.similar_movies(movie_id, k=2)
+        part = batch[batch["query_movie_id"] == movie_id]
+        assert part["rank"].tolist() == list(range(1, len(single) + 1))
+        pd.testing.assert_frame_equal(part.drop(columns=["query_movie_id", "rank"])
+                                      .reset_index(drop=True), single)
+
+    reopened = MovieAnalyzer(download_dir=corpus_dir)
+    assert isinstance(reopened.similarity_index.doc_weights, np.memmap)
+    pd.testing.assert_frame_equal(reopened.similar_movies_batch(ids, k=2), batch)
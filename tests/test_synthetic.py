@@ -0,0 +1,76 @@
+import filecmp
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.dates import PRECISION_DAY, PRECISION_MONTH, PRECISION_NONE, PRECISION_YEAR
+from src.movie_analyzer import DATA_DIR_ENV, DATASET_FILES, MovieAnalyzer
+from src.synthetic import generate_corpus
+
+CLUSTER_FILES = ["name.clusters.txt", "tvtropes.clusters.txt"]
+
+
+def test_same_seed_gives_identical_files(tmp_path):
+    a = generate_corpus(str(tmp_path / "a"), 300, seed=7)
+    b = generate_corpus(str(tmp_path / "b"), 300, seed=7)
+    c = generate_corpus(str(tmp_path / "c"), 300, seed=8)
+    for filename in list(DATASET_FILES.values()) + CLUSTER_FILES:
+        assert filecmp.cmp(os.path.join(a, filename), os.path.join(b, filename), shallow=False)
+    assert not filecmp.cmp(os.path.join(a, DATASET_FILES["actors"]),
+                           os.path.join(c, DATASET_FILES["actors"]), shallow=False)
+
+
+def test_analyzer_loads_generated_corpus(tmp_path):
+    download_dir = str(tmp_path / "synthetic")
+    generate_corpus(download_dir, 2000, seed=1)
+    analyzer = MovieAnalyzer(download_dir=download_dir, use_cache=False)
+
+    movies, actors = analyzer.movies_df, analyzer.actors_df
+    assert len(movies) == 2000 and movies["movie_id"].is_unique
+    assert 4 * len(movies) < len(actors) < 7 * len(movies)
+    assert 0.4 < len(analyzer.summaries_df) / len(movies) < 0.65
+    assert set(analyzer.summaries_df["movie_id"]) <= set(movies["movie_id"])
+    # Mixed-precision dates and \N / empty nulls both parse.
+    assert set(movies["release_precision"]) == {PRECISION_NONE, PRECISION_YEAR,
+                                                PRECISION_MONTH, PRECISION_DAY}
+    assert not (movies["release_date"].astype(str) == "\\N").any()
+    assert actors["height"].notna().any() and actors["height"].isna().any()
+    # Skewed genres: the most common is far more frequent than the median one.
+    counts = analyzer.movie_type(N=50)["Count"]
+    assert counts.iloc[0] > 5 * counts.median()
+    # Skewed actors: some appear in many movies.
+    assert actors["actor_name"].value_counts().iloc[0] > 10
+    assert not analyzer.releases().empty and not analyzer.ages("M").empty
+
+
+def test_cluster_files_reference_character_map_ids(tmp_path):
+    folder = generate_corpus(str(tmp_path / "synthetic"), 3000, seed=2)
+    actors = pd.read_csv(os.path.join(folder, DATASET_FILES["actors"]), sep="\t", header=None,
+                         usecols=[0, 10], names=["movie_id", "map_id"])
+    map_ids = set(actors["map_id"])
+    names = pd.read_csv(os.path.join(folder, "name.clusters.txt"), sep="\t", header=None,
+                        names=["name", "map_id"])
+    tropes = pd.read_csv(os.path.join(folder, "tvtropes.clusters.txt"), sep="\t", header=None,
+                         names=["trope", "json"])
+    assert len(names) and len(tropes)
+    assert set(names["map_id"]) <= map_ids
+    assert {json.loads(j)["id"] for j in tropes["json"]} <= map_ids
+    # Every name cluster spans at least two movies.
+    movie_of = dict(zip(actors["map_id"], actors["movie_id"]))
+    spans = names.assign(movie=names["map_id"].map(movie_of)).groupby("name")["movie"].nunique()
+    assert (spans >= 2).all()
+
+
+def test_tarball_is_streamable_and_env_var_selects_corpus(tmp_path, monkeypatch):
+    download_dir = str(tmp_path / "synthetic")
+    generate_corpus(download_dir, 500, seed=3, tar=True)
+    streamed = MovieAnalyzer(download_dir=download_dir, use_cache=False, extract=False)
+    streamed.wait_until_loaded()
+    assert len(streamed.movies_df) == 500
+
+    monkeypatch.setenv(DATA_DIR_ENV, download_dir)
+    analyzer = MovieAnalyzer(use_cache=False)
+    assert analyzer.download_dir == download_dir
+    np.testing.assert_array_equal(analyzer.movies_df["movie_id"], streamed.movies_df["movie_id"])